@@ -128,6 +128,8 @@ class Routes:
                     amount_min, float (query):  Betragsfilter (größer gleich amount_min)
                     amount_max, float (query):  Betragsfilter (kleiner gleich amount_max)
                     page, int (query):      Seite für die Paginierung (default: 1)
+                    cursor, str (query):    Cursor der vorherigen Seite für die Paginierung
+                                            (Alternative zu 'page', Header 'X-Next-Cursor')
                     descending, bool (query): Sortierreihenfolge nach Datum (default: True)
                 Returns:
                     html: Startseite mit Navigation
@@ -141,17 +143,42 @@ class Routes:
                 # Table with Transactions
                 current_app.logger.debug(f"Using condition filter: {condition}")
                 sort_order = request.args.get('descending', 'true').lower() == 'true'
-                rows = parent.db_handler.select(iban, condition, descending=sort_order)
 
-                # If pagination is requested, do not serve the whole page and all metadata
+                # Only select the requested page (sorted and limited by the DB handler)
                 entries_per_page = 50
-                if 'page' in request.args:
-                    page = int(request.args.get('page'))
-                    start = (page - 1) * entries_per_page
-                    end = start + entries_per_page
-                    if start >= len(rows):
+                cursor = request.args.get('cursor')
+                if 'page' in request.args and cursor is None:
+                    page = max(int(request.args.get('page', 1)), 1)
+                    rows = parent.db_handler.select(
+                        iban, condition, descending=sort_order,
+                        limit=entries_per_page, offset=(page - 1) * entries_per_page
+                    )
+                    if not rows:
+                        return "", 404  # Return 404 if no more pages can be served
+                    return render_template('iban_page.html', transactions=rows)
+
+                try:
+                    page_result = parent.db_handler.select_page(
+                        iban, condition, descending=sort_order,
+                        limit=entries_per_page, cursor=cursor
+                    )
+
+                except ValueError:
+                    return "", 400
+
+                rows = page_result.get('transactions')
+                next_cursor = page_result.get('cursor')
+
+                # If pagination is requested, do not serve the whole page and all metadata
+                if cursor is not None:
+                    if not rows:
                         return "", 404  # Return 404 if no more pages can be served
-                    return render_template('iban_page.html', transactions=rows[start:end])
+                    response = make_response(
+                        render_template('iban_page.html', transactions=rows)
+                    )
+                    if next_cursor:
+                        response.headers['X-Next-Cursor'] = next_cursor
+                    return response
 
                 # All distinct Rule Names
                 # (must be filtered on our own because TinyDB doesn't support 'distinct' queries)
@@ -167,29 +194,11 @@ class Routes:
                 cat_rules = [r.get('name') for r in cat_rules if r.get('name')]
                 cat_rules.sort()
 
-                # All distinct Tags
-                # (must be filtered on our own because TinyDB doesn't support 'distinct' queries)
-                tags = []
-                tag_query = {'key': 'tags', 'value': [], 'compare': '!='}
-                for row in parent.db_handler.select(iban, condition=tag_query):
-                    for t in row.get('tags', []):
-                        if t not in tags:
-                            tags.append(t)
-
-                tags.sort()
-
-                # All distinct Categories
-                # (must be filtered on our own because TinyDB doesn't support 'distinct' queries)
-                cats = []
-                cat_query = {'key': 'category', 'value': None, 'compare': '!='}
-                for row in parent.db_handler.select(iban, condition=cat_query):
-                    c = row.get('category')
-                    if c and c not in cats:
-                        cats.append(c)
-
-                cats.sort()
+                # All distinct Tags and Categories
+                tags = parent.db_handler.distinct(iban, 'tags')
+                cats = parent.db_handler.distinct(iban, 'category')
 
-                return render_template('iban.html', transactions=rows[:entries_per_page],
+                return render_template('iban.html', transactions=rows, cursor=next_cursor,
                                        IBAN=iban, tags=tags, categories=cats,
                                        tag_rules=tag_rules, cat_rules=cat_rules,
                                        filters=frontend_filters)
@@ -214,23 +223,9 @@ class Routes:
                 if not tx_details:
                     return {'error': 'No transaction found'}, 404
 
-                # All distinct Tags
-                # (must be filtered on our own because TinyDB doesn't support 'distinct' queries)
-                tags = []
-                tag_query = {'key': 'tags', 'value': [], 'compare': '!='}
-                for row in parent.db_handler.select(iban, condition=tag_query):
-                    for t in row.get('tags', []):
-                        if t not in tags:
-                            tags.append(t)
-
-                # All distinct Categories
-                # (must be filtered on our own because TinyDB doesn't support 'distinct' queries)
-                cats = []
-                cat_query = {'key': 'category', 'value': None, 'compare': '!='}
-                for row in parent.db_handler.select(iban, condition=cat_query):
-                    c = row.get('category')
-                    if c and c not in cats:
-                        cats.append(c)
+                # All distinct Tags and Categories
+                tags = parent.db_handler.distinct(iban, 'tags')
+                cats = parent.db_handler.distinct(iban, 'category')
 
                 return render_template('tx.html', tx=tx_details[0], cats=cats, tags=tags)
 
@@ -259,26 +254,17 @@ class Routes:
                 condition, frontend_filters = parent.filter_to_condition(request.args)
                 # Table with Transactions
                 current_app.logger.debug(f"Using condition filter: {condition}")
-                rows = parent.db_handler.select(iban, condition)
+                totals = parent.db_handler.aggregate_sums(iban, condition,
+                                                          group_by=['category', 'tags'])
 
                 # Calculate TOP categories and tags
-                sums = {'categories': {}, 'tags': {}}
-                for row in rows:
-                    amount = row.get('amount', 0.0)
-                    cat = row.get('category', 'unkategorisiert')
-                    if cat not in sums['categories']:
-                        sums['categories'][cat] = 0.0
-
-                    sums['categories'][cat] += amount
-
-                    tags = row.get('tags', [])
-                    if not tags:
-                        tags = ['untagged']
-                    for tag in tags:
-                        if tag not in sums['tags']:
-                            sums['tags'][tag] = 0.0
-
-                        sums['tags'][tag] += amount
+                sums = {
+                    'categories': totals['category'],
+                    'tags': {
+                        'untagged' if tag is None else tag: amount
+                        for tag, amount in totals['tags'].items()
+                    }
+                }
 
                 # Sort Sums
                 sums['categories'] = dict(sorted(sums['categories'].items(),
@@ -417,64 +403,135 @@ class Routes:
                 """
                 Endpunkt für das Annehmen hochgeladener Kontoumsatzdateien.
                 Im Anschluss wird automatisch die Untersuchung der Inhalte angestoßen.
+                Werden mehrere Dateien übermittelt, werden diese parallel eingelesen
+                (ein Prozess je Datei) und das Ergebnis je Datei unter 'files' geliefert.
 
                 Args (multipart/form-data):
-                    file-input (binary): Dateiupload aus Formular-Submit
+                    file-batch (binary): Dateiupload(s) aus Formular-Submit
                     bank (str, optional): Bankkennung (Default: Generic)
+                    autotag (str, optional): Wenn gesetzt ('1', 'true', 'on'), werden die
+                                             Umsätze vor dem Speichern mit allen Regeln
+                                             getaggt und kategorisiert.
+                    background (str, optional): Wenn gesetzt ('1', 'true', 'on'), wird der
+                                                Import als Job ausgeführt (siehe getJob).
                 Returns:
-                    json: Informationen zur Datei und Ergebnis der Untersuchung.
+                    json: Informationen zur Datei und Ergebnis der Untersuchung
+                          bzw. die ID des Jobs (202).
                 """
-                input_file = request.files.get('file-batch')
-                if not input_file:
+                input_files = [f for f in request.files.getlist('file-batch') if f]
+                if not input_files:
                     return {'error': 'Es wurde keine Datei übermittelt.'}, 400
 
-                # Store Upload file to tmp
-                path = f"/tmp/{secrets.token_hex(12)}"
-                content_type, size = parent.mv_fileupload(input_file, path)
-
-                # Daten einlesen und in Object speichern (Bank und Format default bzw. wird geraten)
-                content_format = {
-                    'application/json': 'json',
-                    'text/csv': 'csv',
-                    'application/pdf': 'pdf',
-                    'text/plain': 'text',
-                }.get(content_type)
-
-                # Special handling for PDFs (extension needed)
-                if content_format == 'pdf':
-                    os.rename(path, f'{path}.pdf')
-                    path = f'{path}.pdf'
-
-                # Read Input and Parse the contents
-                try:
-                    parsed_data = parent.read_input(
-                        path, bank=request.form.get('bank', 'Generic'),
-                        data_format=content_format
+                uploads = []
+                for input_file in input_files:
+                    # Store Upload file to tmp
+                    path = f"/tmp/{secrets.token_hex(12)}"
+                    content_type, size = parent.mv_fileupload(input_file, path)
+
+                    # Format anhand des Content-Types (Bank default bzw. wird geraten)
+                    content_format = {
+                        'application/json': 'json',
+                        'text/csv': 'csv',
+                        'application/pdf': 'pdf',
+                        'text/plain': 'text',
+                    }.get(content_type)
+
+                    # Special handling for PDFs (extension needed)
+                    if content_format == 'pdf':
+                        os.rename(path, f'{path}.pdf')
+                        path = f'{path}.pdf'
+
+                    uploads.append({
+                        'path': path,
+                        'size': size,
+                        'filename': input_file.filename,
+                        'content_type': content_type,
+                        'format': content_format,
+                    })
+
+                bank = request.form.get('bank', 'Generic')
+                autotag = request.form.get('autotag', '').lower() in ('1', 'true', 'on')
+
+                if len(uploads) > 1:
+                    task = parent.import_batch(uploads, iban, bank, autotag)
+
+                else:
+                    task = parent.import_file(
+                        uploads[0]['path'], iban, bank=bank, data_format=uploads[0]['format'],
+                        autotag=autotag,
+                        chunk_size=current_app.config.get('UPLOAD_CHUNK_SIZE', 5000)
                     )
 
-                    # Verarbeitete Kontiumsätze in die DB speichern
-                    # und vom Objekt und Dateisystem löschen
-                    insert_result = parent.db_handler.insert(parsed_data, iban)
-                    inserted = insert_result.get('inserted')
+                if run_in_background():
+                    return start_job('upload', lambda: task)
+
+                # Read Input, Parse the contents and save them
+                result = {'inserted': 0}
+                try:
+                    for result in task:
+                        pass
 
                 except (KeyError, ValueError) as ex:
                     return {
-                        "error": (
-                            "Die hochgeladene Datei konnte nicht verarbeitet werden, "
-                            "da das Format unvollständig ist oder nicht erwartet wurde: "
-                            + ex.__class__.__name__ + " " + str(ex)
-                        )
+                        "error": parent.format_upload_error(ex),
+                        "inserted": result.get('inserted', 0)
                     }, 406
 
-                os.remove(path)
+                if len(uploads) == 1:
+                    # Informationen zur Datei
+                    result.pop('processed', None)
+                    result = {
+                        k: v for k, v in uploads[0].items() if k not in ('path', 'format')
+                    } | result
+
+                return result, 201 if result.get('inserted') else 200
+
+            def run_in_background():
+                """
+                Prüft, ob ein Request als Hintergrund-Job ausgeführt werden soll
+                ('background' als GET Argument, Formularfeld oder im JSON Body).
 
-                return_code = 201 if inserted else 200
+                Returns:
+                    bool: True, wenn ein Job gestartet werden soll
+                """
+                value = request.args.get('background', request.form.get('background'))
+                if value is None and request.is_json:
+                    value = (request.get_json(silent=True) or {}).get('background')
+
+                return str(value).lower() in ('1', 'true', 'on')
+
+            def start_job(name, func, *args, **kwargs):
+                """
+                Startet einen Hintergrund-Job und liefert die Antwort mit der Job-ID.
+
+                Args:
+                    name (str): Bezeichnung des Jobs
+                    func (callable): Aufgabe (siehe JobQueue.submit)
+                Returns:
+                    json: ID und Status des Jobs (202)
+                """
+                job = parent.jobs.submit(name, func, *args, **kwargs)
                 return {
-                    'size': size,
-                    'filename': input_file.filename,
-                    'content_type': content_type,
-                    'inserted': inserted,
-                }, return_code
+                    'job': job['uuid'],
+                    'status': job['status'],
+                    'url': f"/api/jobs/{job['uuid']}"
+                }, 202
+
+            @current_app.route('/api/jobs/<job_id>', methods=['GET'])
+            def getJob(job_id):
+                """
+                Liefert den Status und Fortschritt eines Hintergrund-Jobs.
+
+                Args (uri):
+                    job_id, str: ID des Jobs (siehe Antwort mit Statuscode 202)
+                Returns:
+                    json: Job-Datensatz (siehe JobQueue.get)
+                """
+                job = parent.jobs.get(job_id)
+                if job is None:
+                    return {'error': 'Job nicht gefunden'}, 404
+
+                return job, 200
 
             @current_app.route('/api/upload/metadata/<metadata>', methods=['POST'])
             def uploadRules(metadata):
@@ -523,22 +580,25 @@ class Routes:
                                     (Default: Alle Regeln werden angewendet)
                     dry_run, bool:  Switch to show, which TX would be updated. Do not update.
                     streaming, bool: Switch to enable streaming of partial results per matched rule.
+                    incremental, bool: Only check new or changed transactions.
                 Returns:
                     json: Informationen zum Ergebnis des Taggings.
                 """
                 rule_name = request.json.get('rule_name')
                 dry_run = request.json.get('dry_run', False)
                 streaming = request.json.get('streaming', False)
+                incremental = request.json.get('incremental', False)
 
                 if streaming:
                     @stream_with_context
                     def stream():
-                        for partial in parent.tagger.tag(iban, rule_name, dry_run, streaming=True):
+                        for partial in parent.tagger.tag(iban, rule_name, dry_run, streaming=True,
+                                                         incremental=incremental):
                             yield json.dumps(partial) + "\n"
 
                     return Response(stream(), content_type='application/x-ndjson')
 
-                return parent.tagger.tag(iban, rule_name, dry_run)
+                return parent.tagger.tag(iban, rule_name, dry_run, incremental=incremental)
 
             @current_app.route('/api/cat/<iban>', methods=['PUT'])
             def cat(iban) -> dict:
@@ -555,6 +615,7 @@ class Routes:
                                     (higher = more important)
                     prio_set, int:  Override: Compare with 'prio' but set this value instead.
                     streaming, bool: Switch to enable streaming of partial results per matched rule.
+                    incremental, bool: Only check new or changed transactions.
                 Returns:
                     json: Informationen zum Ergebnis des Taggings.
                 """
@@ -563,10 +624,12 @@ class Routes:
                 prio = request.json.get('prio')
                 prio_set = request.json.get('prio_set')
                 streaming = request.json.get('streaming', False)
+                incremental = request.json.get('incremental', False)
 
                 if streaming:
                     gen = parent.tagger.categorize(
-                        iban, rule_name, prio, prio_set, dry_run, streaming=True
+                        iban, rule_name, prio, prio_set, dry_run, streaming=True,
+                        incremental=incremental
                     )
 
                     @stream_with_context
@@ -576,7 +639,8 @@ class Routes:
 
                     return Response(stream(), content_type='application/x-ndjson')
 
-                return parent.tagger.categorize(iban, rule_name, prio, prio_set, dry_run)
+                return parent.tagger.categorize(iban, rule_name, prio, prio_set, dry_run,
+                                                incremental=incremental)
 
             @current_app.route('/api/tag-and-cat/<iban>', methods=['PUT'])
             def tag_and_cat(iban) -> dict:
@@ -608,33 +672,45 @@ class Routes:
                                     (higher = important)
                     prio_set:       Compare with 'prio' but set this value instead.
                     dry_run:        Switch to show, which TX would be updated. Do not update.
+                    incremental:    Only check new or changed transactions (preset rules).
+                    background:     Als Job ausführen (siehe getJob).
                 Returns:
-                    json: Informationen zum Ergebnis des Taggings.
+                    json: Informationen zum Ergebnis des Taggings bzw. die ID des Jobs (202).
                 """
                 data = request.json
                 if data.get('rule_name', "") == "ui_selected_custom":
                     # Custom Rule defined
                     custom_rule = data.get('rule', {})
-                    return parent.tagger.tag_or_cat_custom(
-                        iban,
-                        category=custom_rule.get('category'),
-                        tags=custom_rule.get('tags'),
-                        filters=custom_rule.get('filter'),
-                        parsed_keys=list(custom_rule.get('parsed', {}).keys()),
-                        parsed_vals=list(custom_rule.get('parsed', {}).values()),
-                        multi=custom_rule.get('multi', 'AND'),
-                        prio=custom_rule.get('prio', 1),
-                        prio_set=custom_rule.get('prio_set'),
-                        dry_run=data.get('dry_run', False)
-                    )
+                    func = parent.tagger.tag_or_cat_custom
+                    kwargs = {
+                        'category': custom_rule.get('category'),
+                        'tags': custom_rule.get('tags'),
+                        'filters': custom_rule.get('filter'),
+                        'parsed_keys': list(custom_rule.get('parsed', {}).keys()),
+                        'parsed_vals': list(custom_rule.get('parsed', {}).values()),
+                        'multi': custom_rule.get('multi', 'AND'),
+                        'prio': custom_rule.get('prio', 1),
+                        'prio_set': custom_rule.get('prio_set'),
+                        'dry_run': data.get('dry_run', False)
+                    }
+                    job_kwargs = {}
+
+                else:
+                    # Preset Rule defined or Default (if all None)
+                    func = parent.tagger.tag_and_cat
+                    kwargs = {
+                        'rule_name': data.get('rule_name'),
+                        'category_name': data.get('category_name'),
+                        'dry_run': data.get('dry_run', False),
+                        'incremental': data.get('incremental', False)
+                    }
+                    # Teilergebnisse je Regel als Fortschritt des Jobs
+                    job_kwargs = {'streaming': True}
 
-                # Preset Rule defined or Default (if all None)
-                return parent.tagger.tag_and_cat(
-                    iban,
-                    rule_name=data.get('rule_name'),
-                    category_name=data.get('category_name'),
-                    dry_run=data.get('dry_run', False)
-                )
+                if run_in_background():
+                    return start_job('tag-and-cat', func, iban, **kwargs, **job_kwargs)
+
+                return func(iban, **kwargs)
 
             @current_app.route('/api/setManualTag/<iban>/<t_id>', methods=['PUT'])
             def setManualTag(iban, t_id):
@@ -693,10 +769,11 @@ class Routes:
                 category = data.get('category')
                 t_ids = data.get('t_ids')
                 assert category and t_ids, 'No category or transactions provided'
-                for tx in t_ids:
+                with parent.db_handler.batch(iban):
+                    for tx in t_ids:
 
-                    updated = parent.set_manual_tag_and_cat(iban, tx, category=category)
-                    updated_entries['updated'] += updated.get('updated')
+                        updated = parent.set_manual_tag_and_cat(iban, tx, category=category)
+                        updated_entries['updated'] += updated.get('updated')
 
                 return updated_entries
 
@@ -721,12 +798,13 @@ class Routes:
                 t_ids = data.get('t_ids')
                 assert tags and t_ids, 'No tags or transactions provided'
                 overwrite = data.get('overwrite', False)
-                for tx in t_ids:
+                with parent.db_handler.batch(iban):
+                    for tx in t_ids:
 
-                    updated = parent.set_manual_tag_and_cat(
-                        iban, tx, tags=tags, overwrite=overwrite
-                    )
-                    updated_entries['updated'] += updated.get('updated')
+                        updated = parent.set_manual_tag_and_cat(
+                            iban, tx, tags=tags, overwrite=overwrite
+                        )
+                        updated_entries['updated'] += updated.get('updated')
 
                 return updated_entries
 
@@ -775,10 +853,11 @@ class Routes:
                 assert t_ids, 'No transactions provided'
 
                 updated_entries = {'updated': 0}
-                for t_id in t_ids:
+                with parent.db_handler.batch(iban):
+                    for t_id in t_ids:
 
-                    updated = parent.remove_tags(iban, t_id)
-                    updated_entries['updated'] += updated.get('updated')
+                        updated = parent.remove_tags(iban, t_id)
+                        updated_entries['updated'] += updated.get('updated')
 
                 return updated_entries
 
@@ -799,10 +878,11 @@ class Routes:
                 assert t_ids, 'No transactions provided'
 
                 updated_entries = {'updated': 0}
-                for t_id in t_ids:
+                with parent.db_handler.batch(iban):
+                    for t_id in t_ids:
 
-                    updated = parent.remove_cat(iban, t_id)
-                    updated_entries['updated'] += updated.get('updated')
+                        updated = parent.remove_cat(iban, t_id)
+                        updated_entries['updated'] += updated.get('updated')
 
                 return updated_entries
 
@@ -813,6 +893,8 @@ class Routes:
 
                 Args (uri):
                     iban, str: IBAN für die die Transaktionen reparsed werden sollen.
+                Args (json / GET):
+                    background, bool: Als Job ausführen (siehe getJob)
                 Returns (streaming):
                     dict: updated, int: Anzahl der gespeicherten Datensätzen
                 """
@@ -820,34 +902,16 @@ class Routes:
                 if not parent.check_requested_iban(iban):
                     return "", 404
 
-                iban_data = parent.db_handler.select(iban)
-                iban_len = len(iban_data)
-
-                # Select Rules (use private method beforehand to prevent loading in a loop)
-                parsers = parent.tagger._load_parsers() # pylint: disable=protected-access
+                if run_in_background():
+                    return start_job('reparse', parent.reparse, iban)
 
                 # Parse data with rules
                 @stream_with_context
-                def stream(iban_data, parsers):
-                    for idx in range(0, len(iban_data), 10):
-                        # Parse
-                        partial = iban_data[idx:idx+10]
-                        partial = parent.tagger.parse(partial, parsers=parsers)
-
-                        # Save new parsed data in DB
-                        updated = 0
-                        for p in partial:
-                            updated += parent.db_handler.update(
-                                p, iban, {'key': 'uuid', 'value': p.get('uuid')}, merge=False
-                            ).get('updated', 0)
-
-                        # Yield partial success
-                        processed = idx+10 if idx+10 < iban_len else iban_len
-                        yield json.dumps(
-                            {'updated': updated, 'processed': processed, 'count': iban_len}
-                        ) + "\n"
-
-                return Response(stream(iban_data, parsers), content_type='application/x-ndjson')
+                def stream(partials):
+                    for partial in partials:
+                        yield json.dumps(partial) + "\n"
+
+                return Response(stream(parent.reparse(iban)), content_type='application/x-ndjson')
 
             @current_app.route('/api/stats/<iban>', methods=['GET'])
             def statsIban(iban):
@@ -867,3 +931,88 @@ class Routes:
 
                 stats = parent.db_handler.min_max_collection(iban, 'date_tx')
                 return stats, 200
+
+            @current_app.route('/api/stats/<iban>/timeseries', methods=['GET'])
+            def statsTimeseries(iban):
+                """
+                Liefert Einnahmen, Ausgaben und Saldo je Monat oder Woche.
+
+                Args (uri):
+                    iban, str:  IBAN oder Gruppe
+                    interval, str (query):  ['month' | 'week'] Zeitraum, Default: 'month'
+                    split, str (query):     Optional 'category' für eine Aufteilung
+                                            nach Kategorien
+                    (weitere Filter wie bei '/<iban>', siehe filter_to_condition)
+                Returns:
+                    json: Zeitreihe der Beträge
+                        - interval, str: Verwendeter Zeitraum
+                        - series, list(dict): period, income, expense, net (und category)
+                """
+                if not parent.check_requested_iban(iban):
+                    return "", 404
+
+                interval = request.args.get('interval', 'month')
+                split_by = request.args.get('split')
+                if split_by not in (None, 'category'):
+                    return {'error': f"Unbekannte Aufteilung: {split_by}"}, 400
+
+                condition, _ = parent.filter_to_condition(request.args)
+                try:
+                    series = parent.db_handler.aggregate_timeseries(
+                        iban, condition, interval=interval, split_by=split_by
+                    )
+
+                except ValueError as ex:
+                    return {'error': str(ex)}, 400
+
+                return {'interval': interval, 'series': series}, 200
+
+            @current_app.route('/api/<iban>/distinct/<key>', methods=['GET'])
+            def getDistinct(iban, key):
+                """
+                Liefert alle unterschiedlichen Werte eines Schlüssels (z.B. 'tags' oder
+                'category') einer IBAN oder Gruppe.
+
+                Args (uri):
+                    iban, str: IBAN oder Gruppe
+                    key, str: Schlüssel, dessen Werte ermittelt werden sollen
+                Returns:
+                    json: Sortierte Liste der Werte
+                        - values, list: Unterschiedliche Werte
+                """
+                if not parent.check_requested_iban(iban):
+                    return "", 404
+
+                return {'values': parent.db_handler.distinct(iban, key)}, 200
+
+            @current_app.route('/api/transactions/<iban>', methods=['GET'])
+            def getTransactions(iban):
+                """
+                Liefert Transaktionen seitenweise ab einem Cursor (z.B. für endloses Scrollen).
+
+                Args (uri):
+                    iban, str:              IBAN oder Gruppe
+                    cursor, str (query):    Cursor aus der Antwort der vorherigen Seite
+                                            (default: erste Seite)
+                    limit, int (query):     Anzahl der Transaktionen je Seite (default: 50)
+                    descending, bool (query): Sortierreihenfolge nach Datum (default: True)
+                    Filter (query):         Siehe '/<iban>'
+                Returns:
+                    json: Seite mit Transaktionen
+                        - transactions, list: Transaktionen der Seite
+                        - cursor, str: Cursor für die nächste Seite oder None (letzte Seite)
+                """
+                if not parent.check_requested_iban(iban):
+                    return "", 404
+
+                condition, _ = parent.filter_to_condition(request.args)
+                sort_order = request.args.get('descending', 'true').lower() == 'true'
+                try:
+                    limit = min(max(int(request.args.get('limit', 50)), 1), 500)
+                    return parent.db_handler.select_page(
+                        iban, condition, descending=sort_order,
+                        limit=limit, cursor=request.args.get('cursor')
+                    ), 200
+
+                except ValueError as ex:
+                    return {'error': str(ex)}, 400
@@ -2,7 +2,6 @@
 
 const selectAllCheckbox = document.getElementById('select-all');
 let ROW_CHECKBOXES = null;
-let PAGE = 1;
 
 document.addEventListener('DOMContentLoaded', function () {
 
@@ -476,19 +475,31 @@ function getInfo(uuid, callback = alert) {
 
 
 function loadMore() {
-    // Increment global
-    PAGE += 1;
+    // The next page starts after the cursor of the last loaded page
+    const more_link = document.querySelector('.transactions + footer a');
+    const cursor = more_link.dataset.cursor;
+    if (!cursor) {
+        more_link.classList.add('hide');
+        return;
+    }
+
     // Get Page Content with a custom ajax call
     const ajax = createAjax(function (responseText, error) {
         if (error) {
             // No more Pages could be loaded
-            document.querySelector('.transactions + footer a').classList.add('hide');
+            more_link.classList.add('hide');
             return;
         }
 
         // Append new Rows
         document.querySelector('.transactions tbody').innerHTML += responseText;
 
+        // Remember the cursor for the next page (none on the last page)
+        more_link.dataset.cursor = ajax.getResponseHeader('X-Next-Cursor') || '';
+        if (!more_link.dataset.cursor) {
+            more_link.classList.add('hide');
+        }
+
         // enabling/disabling the edit button based on checkbox selection
         const selectAllCheckbox = document.getElementById('select-all');
         ROW_CHECKBOXES = document.querySelectorAll('.row-checkbox');
@@ -498,7 +509,7 @@ function loadMore() {
 
     // Call URI
     let get_args = '';
-    const page_args = concatURI({ 'page': PAGE });
+    const page_args = concatURI({ 'cursor': cursor });
 
     // -- Add Filter args if any
     const additional_filters = getFilteredList();
@@ -264,6 +264,7 @@ function uploadIban() {
     }
 
     const bank_id = document.getElementById('bank-type').value
+    const autotag = document.getElementById('upload-autotag').checked
     const fileInput = document.getElementById('file-input');
     if (fileInput.files.length === 0) {
         alert('Es wurde keine Datei ausgewählt.');
@@ -309,6 +310,7 @@ function uploadIban() {
         // Form
         const fileFormData = new FormData();
         fileFormData.append('bank', bank_id);
+        fileFormData.append('autotag', autotag);
         fileFormData.append('file-batch', file);
 
         // Wrap each ajax call in a Promise
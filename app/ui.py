@@ -4,7 +4,9 @@
 import sys
 import os
 import logging
+import multiprocessing
 from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
 from flask import current_app, redirect
 
 
@@ -19,8 +21,10 @@ from app.routes import Routes
 from handler.TinyDb import TinyDbHandler
 from handler.MongoDb import MongoDbHandler
 from handler.Tags import Tagger
+from handler.ParseCache import ParseCache
+from handler.Jobs import JobQueue
 
-from reader.Generic import Reader as Generic
+from reader.Generic import Reader as Generic, read_file
 from reader.Comdirect import Reader as Comdirect
 from reader.Commerzbank import Reader as Commerzbank
 from reader.Volksbank_Mittelhessen import Reader as Volksbank_Mittelhessen
@@ -29,6 +33,9 @@ from reader.Volksbank_Mittelhessen import Reader as Volksbank_Mittelhessen
 class UserInterface():
     """Basisklasse mit Methoden für den Programmablauf"""
 
+    # Formate, deren eingelesene Kontoumsätze im ParseCache gespeichert werden
+    CACHED_FORMATS = ('pdf',)
+
     def __init__(self):
         """
         Initialisiert eine Instanz der Basisklasse und lädt die Konfiguration sowie die Logunktion.
@@ -59,6 +66,23 @@ class UserInterface():
         # Tagger
         self.tagger = Tagger(self.db_handler)
 
+        # Cache eingelesener Dateien (optional)
+        self.parse_cache = None
+        if current_app.config.get('PARSE_CACHE_URI'):
+            self.parse_cache = ParseCache(
+                current_app.config['PARSE_CACHE_URI'],
+                current_app.config.get('PARSE_CACHE_SIZE', 100 * 1024 * 1024)
+            )
+
+        # Hintergrund-Jobs
+        self.jobs = JobQueue(
+            self.db_handler,
+            current_app._get_current_object(), # pylint: disable=protected-access
+            max_workers=current_app.config.get('JOB_WORKERS', 2),
+            save_interval=current_app.config.get('JOB_SAVE_INTERVAL', 5.0),
+            ttl=current_app.config.get('JOB_TTL')
+        )
+
         # Weitere Attribute
         self.reader = None
 
@@ -347,6 +371,24 @@ class UserInterface():
         Returns:
             list(dict): Geparste und getaggte Kontoumsätze
         """
+        return [
+            row for chunk in self.read_input_chunks(uri, bank, data_format) for row in chunk
+        ]
+
+    def read_input_chunks(self, uri, bank='Generic', data_format=None, chunk_size=1000):
+        """
+        Liest Kontoumsätze aus der Ressource blockweise ein und parst jeden Block.
+        CSV Dateien werden dabei gestreamt (siehe Reader.iter_csv), sodass auch große
+        Dateien mit begrenztem Speicher verarbeitet werden können.
+
+        Args:
+            uri (str): Pfad zur Ressource mit den Kontoumsätzen.
+            bank (str): Bezeichnung der Bank bzw. des einzusetzenden Readers.
+            data_format (str, optional): Bezeichnung des Ressourcenformats (http, csv, pdf).
+            chunk_size (int): Maximale Anzahl an Kontoumsätzen je Block.
+        Yields:
+            list(dict): Geparste Kontoumsätze eines Blocks
+        """
         # Format
         if data_format is None:
             # Fallback to CSV text
@@ -355,16 +397,271 @@ class UserInterface():
         # Reader
         self.reader = self.readers.get(
             bank, self.readers.get('Generic')
-        )()
+        )(pdf_workers=current_app.config.get('PDF_WORKERS'))
+
+        if data_format == 'csv':
+            chunks = self.reader.iter_csv(uri, chunk_size)
+
+        else:
+            parsing_method = {
+                'pdf': self.reader.from_pdf,
+                'http': self.reader.from_http
+            }.get(data_format)
+
+            cache_key = self._parse_cache_key(uri, data_format, type(self.reader))
+            data = self.parse_cache.get(cache_key) if cache_key else None
+            if data is None:
+                data = parsing_method(uri) or []
+                if cache_key:
+                    self.parse_cache.set(cache_key, data)
+
+            chunks = (data[i:i + chunk_size] for i in range(0, len(data), chunk_size))
+
+        for chunk in chunks:
+            yield self.parse_input(chunk)
+
+    def read_input_batch(self, files, bank='Generic'):
+        """
+        Liest Kontoumsätze aus mehreren Dateien parallel ein (ein Prozess je Datei)
+        und parst diese anschließend.
+
+        Args:
+            files (list(tuple)): Pfad und Format (csv, pdf, http) je Datei
+            bank (str): Bezeichnung der Bank bzw. des einzusetzenden Readers.
+        Yields:
+            list(dict) | Exception: Geparste Kontoumsätze oder der Fehler beim Einlesen
+                                    je Datei (in Reihenfolge der Dateien)
+        """
+        reader_class = self.readers.get(bank, self.readers.get('Generic'))
+        workers = current_app.config.get('PDF_WORKERS') or os.cpu_count() or 1
+
+        # Spawn instead of fork: Uploads also run in the threads of background jobs
+        spawn = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=max(1, min(workers, len(files))),
+                                 mp_context=spawn) as executor:
+            futures = []
+            for path, data_format in files:
+                data_format = data_format or 'csv'
+                cache_key = self._parse_cache_key(path, data_format, reader_class)
+                data = self.parse_cache.get(cache_key) if cache_key else None
+                if data is None:
+                    data = executor.submit(read_file, reader_class, path, data_format)
+
+                futures.append((cache_key, data))
+
+            for cache_key, future in futures:
+                if isinstance(future, list):
+                    # Aus dem Cache
+                    yield self.parse_input(future)
+                    continue
+
+                try:
+                    data = future.result()
+
+                except Exception as ex: # pylint: disable=broad-exception-caught
+                    # Fehler einer Datei (z.B. defektes PDF) brechen den Batch nicht ab
+                    yield ex
+                    continue
+
+                if cache_key:
+                    self.parse_cache.set(cache_key, data)
+
+                yield self.parse_input(data)
+
+    def parse_input(self, data):
+        """
+        Wendet die Parser auf eingelesene Kontoumsätze an. Große Listen werden
+        auf mehrere Prozesse verteilt (PARSE_WORKERS aus der Config).
+
+        Args:
+            data (list(dict)): Eingelesene Kontoumsätze
+        Returns:
+            list(dict): Kontoumsätze mit den Treffern der Parser unter 'parsed'
+        """
+        return self.tagger.parse_batch(
+            data, workers=current_app.config.get('PARSE_WORKERS', 1)
+        )
+
+    def import_file(self, path, iban, bank='Generic', data_format=None,
+                    autotag=False, chunk_size=5000):
+        """
+        Liest eine hochgeladene Datei blockweise ein und speichert die Kontoumsätze
+        (siehe read_input_chunks). Die Datei wird anschließend gelöscht.
+
+        Args:
+            path (str): Pfad zur hochgeladenen Datei
+            iban (str): IBAN des Kontos
+            bank (str): Bezeichnung der Bank bzw. des einzusetzenden Readers.
+            data_format (str, optional): Bezeichnung des Formats (http, csv, pdf).
+            autotag (bool): Umsätze vor dem Speichern taggen und kategorisieren
+            chunk_size (int): Maximale Anzahl an Kontoumsätzen je Block
+        Yields:
+            dict: Zwischenstand nach jedem Block und zuletzt das Ergebnis
+                - inserted, int: Anzahl der gespeicherten Kontoumsätze
+                - processed, int: Anzahl der eingelesenen Kontoumsätze
+                - tagged, int: Anzahl der Taggings (nur bei 'autotag')
+                - categorized, int: Anzahl der Kategorisierungen (nur bei 'autotag')
+        """
+        result = {'inserted': 0, 'processed': 0}
+        if autotag:
+            result.update({'tagged': 0, 'categorized': 0})
+
+        parsed_data = None
+        try:
+            for parsed_data in self.read_input_chunks(path, bank=bank, data_format=data_format,
+                                                      chunk_size=chunk_size):
+
+                # Optional: Tagging und Kategorisierung vor dem Speichern
+                if autotag:
+                    chunk_result = self.tagger.tag_and_cat_rows(parsed_data)
+                    result['tagged'] += chunk_result.get('tagged', 0)
+                    result['categorized'] += chunk_result.get('categorized', 0)
+
+                # Verarbeitete Kontiumsätze in die DB speichern
+                result['inserted'] += self.db_handler.insert(parsed_data, iban).get('inserted', 0)
+                result['processed'] += len(parsed_data)
+                yield dict(result)
+
+        finally:
+            if os.path.exists(path):
+                os.remove(path)
+
+        if parsed_data is None:
+            # Leere Datei: Ergebnis ohne Zwischenstand
+            yield result
+
+    def import_batch(self, uploads, iban, bank='Generic', autotag=False):
+        """
+        Liest mehrere hochgeladene Dateien parallel ein (siehe read_input_batch) und
+        speichert die Kontoumsätze je Datei. Die Dateien werden anschließend gelöscht.
+
+        Args:
+            uploads (list(dict)): Je Datei 'path' und 'format' sowie weitere Angaben
+                                  (z.B. 'filename'), die ins Ergebnis übernommen werden
+            iban (str): IBAN des Kontos
+            bank (str): Bezeichnung der Bank bzw. des einzusetzenden Readers.
+            autotag (bool): Umsätze vor dem Speichern taggen und kategorisieren
+        Yields:
+            dict: Zwischenstand nach jeder Datei und zuletzt das Ergebnis
+                - files, list(dict): Ergebnis je Datei ('inserted' oder 'error')
+                - inserted, int: Summe der gespeicherten Kontoumsätze
+                - tagged, int: Summe der Taggings (nur bei 'autotag')
+                - categorized, int: Summe der Kategorisierungen (nur bei 'autotag')
+        """
+        result = {'files': [], 'inserted': 0}
+        if autotag:
+            result.update({'tagged': 0, 'categorized': 0})
+
+        try:
+            batch = self.read_input_batch(
+                [(upload['path'], upload['format']) for upload in uploads], bank=bank
+            )
+            for i, parsed_data in enumerate(batch):
+                upload = {
+                    k: v for k, v in uploads[i].items() if k not in ('path', 'format')
+                }
+
+                if isinstance(parsed_data, Exception):
+                    upload['error'] = self.format_upload_error(parsed_data)
+                    result['files'].append(upload)
+                    continue
+
+                # Optional: Tagging und Kategorisierung vor dem Speichern
+                if autotag:
+                    upload.update(self.tagger.tag_and_cat_rows(parsed_data))
+                    result['tagged'] += upload['tagged']
+                    result['categorized'] += upload['categorized']
+
+                upload['inserted'] = self.db_handler.insert(
+                    parsed_data, iban
+                ).get('inserted', 0)
+                result['inserted'] += upload['inserted']
+                result['files'].append(upload)
+                yield dict(result)
 
-        parsing_method = {
-            'pdf': self.reader.from_pdf,
-            'csv': self.reader.from_csv,
-            'http': self.reader.from_http
-        }.get(data_format)
+        finally:
+            for upload in uploads:
+                if os.path.exists(upload['path']):
+                    os.remove(upload['path'])
 
-        data = parsing_method(uri)
-        if data is None:
-            return []
+        yield result
+
+    def reparse(self, iban, chunk_size=None):
+        """
+        Parsed alle Transaktionen einer IBAN erneut mit den aktuellen Parsern.
+        Nur Transaktionen, deren 'parsed' sich dabei ändert, werden gespeichert
+        (ein Schreibvorgang je Block, siehe BaseDb.update_many_by_uuid).
+
+        Args:
+            iban (str): IBAN des Kontos
+            chunk_size (int, optional): Anzahl der Transaktionen je Block und Zwischenstand
+                                        (Default: REPARSE_CHUNK_SIZE aus der Config)
+        Yields:
+            dict: Zwischenstand je Block
+                - updated, int: Anzahl der in diesem Block gespeicherten Datensätze
+                - processed, int: Anzahl der bisher verarbeiteten Datensätze
+                - count, int: Anzahl aller Datensätze
+        """
+        if chunk_size is None:
+            chunk_size = current_app.config.get('REPARSE_CHUNK_SIZE', 500)
+
+        iban_data = self.db_handler.select(iban)
+        iban_len = len(iban_data)
+
+        # Select Parsers (use private method beforehand to prevent loading in a loop)
+        parsers = self.tagger._parser_engine() # pylint: disable=protected-access
+
+        for idx in range(0, iban_len, chunk_size):
+            # Parse copies to compare them with the stored data
+            partial = iban_data[idx:idx+chunk_size]
+            parsed = self.tagger.parse([
+                {'text_tx': row.get('text_tx') or '', 'parsed': dict(row.get('parsed') or {})}
+                for row in partial
+            ], parsers=parsers)
+
+            # Save only changed data in DB (one write per chunk).
+            # Rules may use parsed values, so changed rows have to be tagged again.
+            updates = {
+                row['uuid']: {'parsed': new['parsed'], 'tag_version': None, 'cat_version': None}
+                for row, new in zip(partial, parsed)
+                if new['parsed'] != (row.get('parsed') or {})
+            }
+            updated = self.db_handler.update_many_by_uuid(
+                updates, iban, merge=False
+            ).get('updated', 0)
+
+            # Yield partial success
+            processed = min(idx + chunk_size, iban_len)
+            yield {'updated': updated, 'processed': processed, 'count': iban_len}
+
+    @staticmethod
+    def format_upload_error(ex):
+        """
+        Fehlermeldung für eine hochgeladene Datei, die nicht verarbeitet werden konnte.
+
+        Args:
+            ex (Exception): Fehler beim Einlesen
+        Returns:
+            str: Fehlermeldung
+        """
+        return (
+            "Die hochgeladene Datei konnte nicht verarbeitet werden, "
+            "da das Format unvollständig ist oder nicht erwartet wurde: "
+            + ex.__class__.__name__ + " " + str(ex)
+        )
+
+    def _parse_cache_key(self, uri, data_format, reader_class):
+        """
+        Ermittelt den Schlüssel einer Datei im ParseCache.
+
+        Args:
+            uri (str): Pfad zur Datei
+            data_format (str): Bezeichnung des Formats (http, csv, pdf)
+            reader_class (type): Klasse des Readers
+        Returns:
+            str: Schlüssel oder None, wenn der Cache nicht genutzt wird
+        """
+        if self.parse_cache is None or data_format not in self.CACHED_FORMATS:
+            return None
 
-        return self.tagger.parse(data)
+        return self.parse_cache.key(uri, reader_class)
@@ -1,18 +1,32 @@
 #!/usr/bin/python3 # pylint: disable=invalid-name
 """Basisklasse für die Vererbung an Datenbankhandler mit allgemeinen Funktionen"""
 
+import base64
 import hashlib
 import re
 import os
 import logging
 import glob
 import json
-from datetime import datetime
+from uuid import uuid4
+from contextlib import nullcontext
+from datetime import datetime, timezone
 from natsort import natsorted
 
 
 class BaseDb():
     """Basisklasse für die Vererbung an Datenbankhandler mit allgemeinen Funktionen"""
+
+    # Collection mit den monatlichen Summen je IBAN (siehe aggregate_sums)
+    ROLLUP_COLLECTION = 'rollup'
+    # Änderungen an diesen Schlüsseln verändern die monatlichen Summen
+    ROLLUP_KEYS = frozenset(('amount', 'date_tx', 'category', 'tags'))
+    ROLLUP_GROUPS = frozenset(('category', 'tags'))
+    # Collection mit dem Status der Hintergrund-Jobs (siehe handler.Jobs)
+    JOB_COLLECTION = 'jobs'
+    # Collection mit der Version der Metadaten (siehe metadata_version)
+    VERSION_COLLECTION = 'versions'
+
     def __init__(self):
         self.create()
         self._load_metadata()
@@ -47,7 +61,8 @@ class BaseDb():
         return self.set_metadata(new_group, overwrite=True)
 
     def select(self, collection:str, condition: dict|list[dict]=None, multi: str='AND',
-               descending: bool=True):
+               descending: bool=True, limit: int=None, offset: int=0,
+               sort_key: str='date_tx'):
         """
         Handler für das Vorbereiten der '_select' Methode, welche Datensätze aus der Datenbank
         selektiert, die die angegebene Bedingung erfüllen.
@@ -67,10 +82,65 @@ class BaseDb():
                           werden diese logisch wie hier angegeben verknüpft. Default: 'AND'
             descending (bool):   Wenn True, werden die Ergebnisse aufsteigend nach Datum sortiert.
                                  Default: True.
+            limit (int):        Maximale Anzahl der Ergebnisse (eine Seite). Die Sortierung
+                                und Begrenzung übernimmt das Backend. Default: Alle
+            offset (int):       Anzahl der zu überspringenden Ergebnisse. Default: 0
+            sort_key (str):     Schlüssel für die Sortierung (bei gleichen Werten wird
+                                zusätzlich nach 'uuid' sortiert). Default: 'date_tx'
         Returns:
             dict:
                 - result, list: Liste der ausgewählten Datensätze
         """
+        result_list = self._select_sorted(collection, condition, multi, descending,
+                                          limit=limit, offset=offset, sort_key=sort_key)
+        return self._format_dates(result_list)
+
+    def select_page(self, collection: str, condition: dict|list[dict]=None, multi: str='AND',
+                    descending: bool=True, limit: int=50, cursor: str=None,
+                    sort_key: str='date_tx'):
+        """
+        Selektiert eine Seite von Datensätzen ab einem Cursor (Keyset-Paginierung).
+        Anders als mit 'offset' springt das Backend direkt zur Position nach dem Cursor,
+        sodass auch späte Seiten schnell sind und sich durch neue Datensätze
+        nicht verschieben.
+
+        Args:
+            collection (str): Name der Collection oder Gruppe (siehe select)
+            condition (dict | list(dict)): Bedingungen (siehe select)
+            multi (str): ['AND' | 'OR'] Logische Verknüpfung der Bedingungen. Default: 'AND'
+            descending (bool): Absteigend sortieren. Default: True
+            limit (int): Anzahl der Datensätze je Seite. Default: 50
+            cursor (str): Cursor aus dem Ergebnis der vorherigen Seite. Default: Erste Seite
+            sort_key (str): Schlüssel für die Sortierung. Default: 'date_tx'
+        Returns:
+            dict:
+                - transactions, list: Datensätze der Seite
+                - cursor, str: Cursor für die nächste Seite oder None (letzte Seite)
+        Raises:
+            ValueError: Der Cursor ist ungültig
+        """
+        after = self.decode_cursor(cursor) if cursor else None
+        rows = self._select_sorted(collection, condition, multi, descending,
+                                   limit=limit, sort_key=sort_key, after=after)
+
+        next_cursor = None
+        if rows and len(rows) >= limit:
+            next_cursor = self.encode_cursor(rows[-1], sort_key)
+
+        return {'transactions': self._format_dates(rows), 'cursor': next_cursor}
+
+    def _select_sorted(self, collection: str, condition: dict|list[dict], multi: str,
+                       descending: bool, limit: int=None, offset: int=0,
+                       sort_key: str='date_tx', after: tuple=None):
+        """
+        Selektiert sortierte Datensätze (siehe select) ohne die Datumswerte zu formatieren.
+
+        Args:
+            after (tuple): (Wert von sort_key, uuid) des letzten Datensatzes der
+                           vorherigen Seite (nur zusammen mit 'limit')
+        Returns:
+            list: Sortierte Datensätze
+        """
         if not condition:
             # Catch empty lists
             condition = None
@@ -88,12 +158,386 @@ class BaseDb():
         if not isinstance(collection, list):
             collection = [collection]
 
-        result_list = self._select(collection, condition, multi)
+        if limit is None:
+            result_list = self._select(collection, condition, multi)
+
+            # Sort the result by date_tx
+            return sorted(result_list, reverse=descending, key=self._sort_key(sort_key))
+
+        # Sorted page from the backend
+        return self._select(collection, condition, multi, sort=(sort_key, descending),
+                            limit=limit, offset=offset, after=after)
+
+    def distinct(self, collection: str, key: str):
+        """
+        Ermittelt alle unterschiedlichen Werte eines Schlüssels (z.B. alle Tags
+        oder Kategorien eines Kontos). Bei Listen (z.B. 'tags') werden die
+        einzelnen Elemente betrachtet. Leere Werte werden ausgelassen.
+
+        Args:
+            collection (str): Name der Collection oder Gruppe
+            key (str): Schlüssel, dessen Werte ermittelt werden sollen
+        Returns:
+            list: Sortierte Liste der unterschiedlichen Werte
+        """
+        collections = self.get_group_ibans(collection, check_before=True)
+        values = set()
+        for col in collections:
+            values |= self._distinct(col, key)
+
+        values.discard(None)
+        values.discard('')
+        return natsorted(values, key=str)
+
+    def _distinct(self, collection: str, key: str):
+        """
+        Private Methode zum Ermitteln der unterschiedlichen Werte eines Schlüssels
+        in einer Collection. Siehe 'distinct' Methode.
+
+        Returns:
+            set: Unterschiedliche Werte
+        """
+        raise NotImplementedError()
+
+    def aggregate_sums(self, collection: str, condition=None, multi='AND', group_by=None):
+        """
+        Summiert die Beträge der Datensätze, die die Bedingung erfüllen, je Wert
+        der angegebenen Schlüssel. Bei Listen (z.B. 'tags') zählt der Betrag für
+        jedes Element, leere Listen und fehlende Werte werden unter None summiert.
+
+        Wird nur nach 'category' und/oder 'tags' gruppiert und schränkt die Bedingung
+        höchstens 'date_tx' auf ganze Monate ein, werden die Summen aus den monatlichen
+        Rollups gelesen (siehe _rollup_sums). Sonst werden die Datensätze durchsucht.
+
+        Args:
+            collection (str): Name der Collection oder Gruppe
+            condition (dict | list(dict)): Bedingungen (siehe select)
+            multi (str): ['AND' | 'OR'] Logische Verknüpfung der Bedingungen
+            group_by (list): Schlüssel, nach denen gruppiert wird.
+                             Default: ['category', 'tags']
+        Returns:
+            dict: Summe der Beträge je Schlüssel und Wert ({key: {value: float}})
+        """
+        if group_by is None:
+            group_by = ['category', 'tags']
+
+        bounds = None
+        if self.ROLLUP_GROUPS.issuperset(group_by):
+            bounds = self._rollup_bounds(condition, multi)
+
+        collections = self.get_group_ibans(collection, check_before=True)
+        sums = {key: {} for key in group_by}
+        for col in collections:
+            if bounds is not None:
+                col_sums = self._rollup_sums(col, bounds, group_by)
+            else:
+                col_sums = self._aggregate_sums(col, condition, multi, group_by)
+
+            for key, values in col_sums.items():
+                for value, total in values.items():
+                    sums[key][value] = sums[key].get(value, 0.0) + total
+
+        return sums
 
-        # Sort the result by date_tx
-        result_list = sorted(result_list, reverse=descending, key=lambda x: x.get('date_tx', 0))
+    def _aggregate_sums(self, collection: str, condition, multi, group_by: list):
+        """
+        Private Methode zum Summieren der Beträge einer Collection.
+        Siehe 'aggregate_sums' Methode.
 
-        for r in result_list:
+        Returns:
+            dict: Summe der Beträge je Schlüssel und Wert
+        """
+        raise NotImplementedError()
+
+    def _rollup_bounds(self, condition, multi: str='AND'):
+        """
+        Prüft, ob eine Bedingung aus den monatlichen Rollups beantwortet werden kann.
+        Das ist der Fall, wenn sie nur 'date_tx' auf Monatsgrenzen (UTC) einschränkt.
+
+        Args:
+            condition (dict | list(dict)): Bedingungen (siehe select)
+            multi (str): ['AND' | 'OR'] Logische Verknüpfung der Bedingungen
+        Returns:
+            tuple: Beginn (inklusive) und Ende (exklusive) als Timestamp oder None
+                   ohne Einschränkung. None, wenn die Rollups nicht genutzt werden können.
+        """
+        if condition is None:
+            return (None, None)
+
+        if isinstance(condition, dict):
+            condition = [condition]
+
+        if len(condition) > 1 and multi.upper() == 'OR':
+            return None
+
+        start, end = None, None
+        for c in condition:
+            value = c.get('value')
+            compare = c.get('compare', '==')
+            if c.get('key') != 'date_tx' or compare not in ('>=', '>', '<=', '<') \
+                    or isinstance(value, bool) or not isinstance(value, (int, float)):
+                return None
+
+            # Inclusive start and exclusive end in whole seconds
+            bound = value + (1 if compare in ('>', '<=') else 0)
+            if bound != int(bound) or int(bound) != self._bucket_start(bound, 'month'):
+                return None
+
+            bound = int(bound)
+
+            if compare in ('>=', '>'):
+                start = bound if start is None else max(start, bound)
+            else:
+                end = bound if end is None else min(end, bound)
+
+        return (start, end)
+
+    def _rollup_sums(self, collection: str, bounds: tuple, group_by: list):
+        """
+        Summiert die Beträge einer IBAN aus den monatlichen Rollups.
+        Veraltete Monate werden vorher neu berechnet (siehe _refresh_rollups).
+
+        Args:
+            collection (str): IBAN
+            bounds (tuple): Beginn (inklusive) und Ende (exklusive) als Timestamp
+                            oder None (siehe _rollup_bounds)
+            group_by (list): Schlüssel, nach denen gruppiert wird
+        Returns:
+            dict: Summe der Beträge je Schlüssel und Wert
+        """
+        start, end = bounds
+        sums = {key: {} for key in group_by}
+        for rollup in self._refresh_rollups(collection):
+            if (start is not None and rollup['start'] < start) or \
+                    (end is not None and rollup['start'] >= end):
+                continue
+
+            for key in group_by:
+                for value, total in rollup[key]:
+                    sums[key][value] = sums[key].get(value, 0.0) + total
+
+        return sums
+
+    def _refresh_rollups(self, collection: str):
+        """
+        Berechnet die als veraltet markierten Monate einer IBAN neu (siehe _mark_rollups).
+        Gibt es noch keine Rollups für die IBAN, werden alle Monate berechnet.
+
+        Args:
+            collection (str): IBAN
+        Returns:
+            list(dict): Aktuelle Rollups der IBAN (je Monat)
+                - month, str: Monat (Y-m)
+                - start, int: Beginn des Monats als Timestamp (UTC)
+                - category, list: Paare aus Kategorie und Summe
+                - tags, list: Paare aus Tag und Summe
+        """
+        rollup_col = self.ROLLUP_COLLECTION
+        docs = self._select([rollup_col], {'key': 'iban', 'value': collection})
+        built = any(d.get('built') for d in docs)
+        markers = [d for d in docs if d.get('stale')]
+        rollups = {d['start']: d for d in docs if d.get('month') and not d.get('stale')}
+        if built and not markers:
+            return list(rollups.values())
+
+        if built:
+            # Remove the markers first, so changes during the calculation mark again
+            for marker in markers:
+                self._delete(rollup_col, {'key': 'uuid', 'value': marker['uuid']})
+
+            starts = {marker['start'] for marker in markers}
+
+        else:
+            logging.info(f"Building monthly rollups for {collection}")
+            self._delete(rollup_col, {'key': 'iban', 'value': collection})
+            rollups = {}
+            starts = {start for start, _ in self._aggregate_timeseries(
+                collection, None, 'AND', 'month', None
+            )}
+
+        new_docs = []
+        for start in sorted(starts):
+            month = datetime.fromtimestamp(start, tz=timezone.utc).strftime('%Y-%m')
+            end = self._bucket_start(start + 32 * 86400, 'month')
+            sums = self._aggregate_sums(collection, [
+                {'key': 'date_tx', 'value': start, 'compare': '>='},
+                {'key': 'date_tx', 'value': end, 'compare': '<'}
+            ], 'AND', list(self.ROLLUP_GROUPS))
+
+            if built:
+                self._delete(rollup_col, {'key': 'uuid', 'value': f'{collection}/{month}'})
+
+            rollups.pop(start, None)
+            if not sums['category']:
+                # No transactions (left) in this month
+                continue
+
+            rollup = {
+                'uuid': f'{collection}/{month}',
+                'iban': collection,
+                'month': month,
+                'start': start,
+                'category': [[k, v] for k, v in sums['category'].items()],
+                'tags': [[k, v] for k, v in sums['tags'].items()],
+            }
+            rollups[start] = rollup
+            new_docs.append(rollup)
+
+        if not built:
+            new_docs.append({'uuid': f'{collection}/built', 'iban': collection, 'built': True})
+
+        if new_docs:
+            self._insert(new_docs, rollup_col)
+
+        return list(rollups.values())
+
+    def _mark_rollups(self, collection: str, dates: list):
+        """
+        Markiert die Monate der angegebenen Zeitpunkte einer IBAN als veraltet,
+        sodass sie bei der nächsten Abfrage neu berechnet werden.
+
+        Args:
+            collection (str): IBAN
+            dates (list): Geänderte Werte von 'date_tx' (None wird ignoriert)
+        """
+        starts = {self._bucket_start(d, 'month') for d in dates if d is not None}
+        if not starts:
+            return
+
+        markers = []
+        for start in starts:
+            month = datetime.fromtimestamp(start, tz=timezone.utc).strftime('%Y-%m')
+            markers.append({
+                'uuid': f'{collection}/{month}/stale',
+                'iban': collection,
+                'month': month,
+                'start': start,
+                'stale': True
+            })
+
+        self._insert(markers, self.ROLLUP_COLLECTION)
+
+    def _affected_dates(self, collection: str, condition, multi: str='AND'):
+        """
+        Liefert 'date_tx' aller Datensätze einer IBAN, die die Bedingung erfüllen
+        (vor einer Änderung, für _mark_rollups).
+
+        Args:
+            collection (str): IBAN
+            condition (dict | list(dict)): Bedingungen (siehe select)
+            multi (str): ['AND' | 'OR'] Logische Verknüpfung der Bedingungen
+        Returns:
+            list: Werte von 'date_tx'
+        """
+        return [row.get('date_tx') for row in self._select([collection], condition, multi)]
+
+    def _dates_by_uuid(self, collection: str, uuids: list):
+        """
+        Liefert 'date_tx' der Datensätze mit den angegebenen UUIDs
+        (vor einer Änderung, für _mark_rollups).
+
+        Args:
+            collection (str): IBAN
+            uuids (list): UUIDs der Datensätze
+        Returns:
+            list: Werte von 'date_tx'
+        """
+        raise NotImplementedError()
+
+    def aggregate_timeseries(self, collection: str, condition=None, multi='AND',
+                             interval='month', split_by=None):
+        """
+        Summiert Einnahmen und Ausgaben je Zeitraum (Monat oder Woche) über 'date_tx'.
+
+        Args:
+            collection (str): Name der Collection oder Gruppe
+            condition (dict | list(dict)): Bedingungen (siehe select)
+            multi (str): ['AND' | 'OR'] Logische Verknüpfung der Bedingungen
+            interval (str): ['month' | 'week'] Länge der Zeiträume.
+                            Wochen beginnen am Montag.
+            split_by (str): Optionaler Schlüssel (z.B. 'category'), nach dem die
+                            Zeiträume zusätzlich aufgeteilt werden
+        Returns:
+            list(dict): Zeiträume in chronologischer Reihenfolge
+                - period, str: Monat (Y-m) oder Wochenbeginn (Y-m-d)
+                - income, float: Summe der positiven Beträge
+                - expense, float: Summe der negativen Beträge
+                - net, float: Summe aller Beträge
+                - <split_by>, any: Wert des Schlüssels (nur mit 'split_by')
+        Raises:
+            ValueError: Unbekanntes Intervall
+        """
+        if interval not in ('month', 'week'):
+            raise ValueError(f"Unbekanntes Intervall: {interval}")
+
+        collections = self.get_group_ibans(collection, check_before=True)
+        buckets = {}
+        for col in collections:
+            col_buckets = self._aggregate_timeseries(col, condition, multi, interval, split_by)
+            for bucket, (income, expense) in col_buckets.items():
+                totals = buckets.setdefault(bucket, [0.0, 0.0])
+                totals[0] += income
+                totals[1] += expense
+
+        label = '%Y-%m' if interval == 'month' else '%Y-%m-%d'
+        series = []
+        for (start, split), (income, expense) in sorted(
+                buckets.items(), key=lambda item: (item[0][0], str(item[0][1]))):
+            entry = {
+                'period': datetime.fromtimestamp(start, tz=timezone.utc).strftime(label),
+                'income': round(income, 2),
+                'expense': round(expense, 2),
+                'net': round(income + expense, 2),
+            }
+            if split_by is not None:
+                entry[split_by] = split
+
+            series.append(entry)
+
+        return series
+
+    def _aggregate_timeseries(self, collection: str, condition, multi,
+                              interval: str, split_by: str):
+        """
+        Private Methode zum Summieren der Beträge einer Collection je Zeitraum.
+        Siehe 'aggregate_timeseries' Methode.
+
+        Returns:
+            dict: Einnahmen und Ausgaben je Zeitraum
+                  ({(Beginn als Timestamp (UTC), Wert von split_by): (income, expense)})
+        """
+        raise NotImplementedError()
+
+    @staticmethod
+    def _bucket_start(timestamp: int, interval: str):
+        """
+        Ermittelt den Beginn des Zeitraums (UTC) zu einem Timestamp.
+
+        Args:
+            timestamp (int): Zeitpunkt als Unix-Timestamp
+            interval (str): ['month' | 'week'] Länge der Zeiträume
+        Returns:
+            int: Beginn des Monats oder der Woche (Montag) als Unix-Timestamp
+        """
+        if interval == 'month':
+            date = datetime.fromtimestamp(timestamp, tz=timezone.utc)
+            return int(date.replace(day=1, hour=0, minute=0, second=0,
+                                    microsecond=0).timestamp())
+
+        # 01.01.1970 was a Thursday
+        days = int(timestamp // 86400)
+        return ((days + 3) // 7 * 7 - 3) * 86400
+
+    def _format_dates(self, rows: list):
+        """
+        Formatiert die Zeitstempel der Datensätze als Datumsstrings.
+
+        Args:
+            rows (list): Datensätze aus der Datenbank
+        Returns:
+            list: Die gleichen (geänderten) Datensätze
+        """
+        for r in rows:
             # Format Datestrings
             if isinstance(r.get('date_tx'), int):
                 r['date_tx'] = datetime.fromtimestamp(r['date_tx']).strftime('%d.%m.%Y')
@@ -101,19 +545,81 @@ class BaseDb():
             if isinstance(r.get('valuta'), int):
                 r['valuta'] = datetime.fromtimestamp(r['valuta']).strftime('%d.%m.%Y')
 
-        return result_list
+        return rows
+
+    @staticmethod
+    def encode_cursor(row: dict, sort_key: str='date_tx'):
+        """
+        Erstellt einen (für den Client undurchsichtigen) Cursor aus einem Datensatz.
+
+        Args:
+            row (dict): Letzter Datensatz einer Seite (mit unformatierten Werten)
+            sort_key (str): Schlüssel der Sortierung. Default: 'date_tx'
+        Returns:
+            str: URL-sicherer Cursor
+        """
+        value = BaseDb._sort_key(sort_key)(row)
+        return base64.urlsafe_b64encode(json.dumps(list(value)).encode('utf-8')).decode('ascii')
+
+    @staticmethod
+    def decode_cursor(cursor: str):
+        """
+        Liest einen Cursor (siehe encode_cursor).
 
-    def _select(self, collection: str, condition: dict|list[dict], multi: str):
+        Args:
+            cursor (str): Cursor einer vorherigen Seite
+        Returns:
+            tuple: (Wert des Sortierschlüssels, uuid)
+        Raises:
+            ValueError: Der Cursor ist ungültig
+        """
+        try:
+            value, uuid = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+
+        except (ValueError, TypeError, UnicodeError) as ex:
+            raise ValueError(f'Ungültiger Cursor: {cursor}') from ex
+
+        if not isinstance(value, (int, float)) or not isinstance(uuid, str):
+            raise ValueError(f'Ungültiger Cursor: {cursor}')
+
+        return (value, uuid)
+
+    def _select(self, collection: str, condition: dict|list[dict], multi: str,
+                sort: tuple=None, limit: int=None, offset: int=0, after: tuple=None):
         """
         Private Methode zum Selektieren von Datensätze aus der Datenbank,
         die die angegebene Bedingung erfüllen. Siehe 'select' Methode.
 
+        Args:
+            sort (tuple): Schlüssel und Richtung (key, descending) der Sortierung,
+                          nur zusammen mit 'limit'.
+            limit (int):  Maximale Anzahl der sortierten Ergebnisse über alle Collections
+            offset (int): Anzahl der zu überspringenden sortierten Ergebnisse
+            after (tuple): Nur Ergebnisse nach diesem Schlüssel (Wert, uuid)
+                           in Sortierreihenfolge (Keyset-Paginierung)
         Returns:
             dict:
                 - result, list: Liste der ausgewählten Datensätze
         """
         raise NotImplementedError()
 
+    @staticmethod
+    def _sort_key(sort_key: str='date_tx'):
+        """
+        Erstellt die Sortierfunktion für Transaktionen. Bei gleichen Werten
+        wird nach UUID sortiert, sodass die Reihenfolge für Seiten eindeutig ist.
+
+        Args:
+            sort_key (str): Schlüssel für die Sortierung. Default: 'date_tx'
+        Returns:
+            callable: Funktion für 'key' von sorted() oder heapq
+        """
+        def key(row):
+            value = row.get(sort_key)
+            return (value if value is not None else 0, row.get('uuid') or '')
+
+        return key
+
     def insert(self, data: dict|list[dict], collection: str):
         """
         Fügt einen oder mehrere Datensätze in die Datenbank ein.
@@ -137,17 +643,21 @@ class BaseDb():
         for transaction in tx_list:
 
             # Add generated IDs
-            transaction = self._generate_unique(transaction)
+            transaction = self.generate_unique(transaction)
 
             # Ensure default values
-            # - IBAN, Tagging priority, empty Tag list
+            # - IBAN, Tagging priority (keep if tagged before insert), empty Tag list
             transaction['iban'] = collection
-            transaction['prio'] = 0
+            transaction['prio'] = transaction.get('prio', 0)
             transaction['category'] = transaction.get('category')
             if not transaction.get('tags'):
                 transaction['tags'] = []
 
-        return self._insert(tx_list, collection)
+        result = self._insert(tx_list, collection)
+        if result.get('inserted'):
+            self._mark_rollups(collection, [t.get('date_tx') for t in tx_list])
+
+        return result
 
     def _insert(self, data: dict|list[dict], collection: str):
         """
@@ -184,14 +694,26 @@ class BaseDb():
             dict:
                 - updated, int: Anzahl der aktualisierten Datensätze
         """
+        # Changed transactions have to be checked again by incremental tagging
+        data = {**data, 'tag_version': None, 'cat_version': None}
+        changes_rollups = not self.ROLLUP_KEYS.isdisjoint(data)
+
+        def update_iban(iban):
+            dates = self._affected_dates(iban, condition, multi) if changes_rollups else []
+            result = self._update(data, iban, condition, multi, merge)
+            if result.get('updated'):
+                self._mark_rollups(iban, dates + [data.get('date_tx')])
+
+            return result
+
         if self.check_collection_is_iban(collection):
             # Directly update IBAN collection
-            return self._update(data, collection, condition, multi, merge)
+            return update_iban(collection)
 
         # Update all IBANs in group
         update_result = 0
         for iban in self.get_group_ibans(collection):
-            update_result += self._update(data, iban, condition, multi, merge).get('updated', 0)
+            update_result += update_iban(iban).get('updated', 0)
 
         return {'updated': update_result}
 
@@ -206,6 +728,74 @@ class BaseDb():
         """
         raise NotImplementedError()
 
+    def update_many_by_uuid(self, updates: dict, collection: str, merge: bool=True):
+        """
+        Aktualisiert mehrere Datensätze anhand ihrer UUID in einem einzigen Schreibvorgang.
+        Jeder Datensatz kann dabei eigene aktualisierte Daten erhalten.
+
+        Args:
+            updates (dict): Aktualisierte Daten je Datensatz ({uuid: dict})
+            collection (str): Name der Collection oder Gruppe, in der aktualisiert werden soll.
+            merge (bool): Wenn False, werden Listenfelder nicht gemerged, sondern
+                          komplett überschrieben. Default: True
+        Returns:
+            dict:
+                - updated, int: Anzahl der aktualisierten Datensätze
+        """
+        if not updates:
+            return {'updated': 0}
+
+        # care about the right format
+        for data in updates.values():
+            if data.get('tags') is not None and not isinstance(data.get('tags'), list):
+                data['tags'] = [data.get('tags')]
+
+        changed = [uuid for uuid, data in updates.items()
+                   if not self.ROLLUP_KEYS.isdisjoint(data)]
+
+        def update_iban(iban):
+            dates = self._dates_by_uuid(iban, changed) if changed else []
+            result = self._update_many_by_uuid(updates, iban, merge)
+            if result.get('updated'):
+                self._mark_rollups(iban, dates + [d.get('date_tx') for d in updates.values()])
+
+            return result
+
+        if self.check_collection_is_iban(collection):
+            # Directly update IBAN collection
+            return update_iban(collection)
+
+        # Update all IBANs in group
+        update_result = 0
+        for iban in self.get_group_ibans(collection):
+            update_result += update_iban(iban).get('updated', 0)
+
+        return {'updated': update_result}
+
+    def _update_many_by_uuid(self, updates: dict, collection: str, merge: bool=True):
+        """
+        Private Methode zum Aktualisieren mehrerer Datensätze anhand ihrer UUID.
+        Siehe 'update_many_by_uuid' Methode.
+
+        Returns:
+            dict:
+                - updated, int: Anzahl der aktualisierten Datensätze
+        """
+        raise NotImplementedError()
+
+    def batch(self, collection: str=None): # pylint: disable=unused-argument
+        """
+        Fasst mehrere Datenbankoperationen zusammen, sodass Schreibvorgänge
+        gesammelt und am Ende des Blocks gemeinsam gespeichert werden können.
+        Ohne Wirkung, wenn das Backend keine Sammlung unterstützt.
+
+        Args:
+            collection (str, optional): Collection, in die geschrieben wird.
+        Returns:
+            Kontextmanager für einen 'with' Block
+        """
+        return nullcontext()
+
     def delete(self, collection: str, condition: dict | list[dict]=None, multi: str='AND'):
         """
         Löscht Datensätze in der Datenbank, die die angegebene Bedingung erfüllen.
@@ -225,14 +815,22 @@ class BaseDb():
             dict:
                 - deleted, int: Anzahl der gelöschten Datensätze
         """
+        def delete_iban(iban):
+            dates = self._affected_dates(iban, condition, multi)
+            result = self._delete(iban, condition, multi)
+            if result.get('deleted'):
+                self._mark_rollups(iban, dates)
+
+            return result
+
         if self.check_collection_is_iban(collection):
             # Directly update IBAN collection
-            return self._delete(collection, condition, multi)
+            return delete_iban(collection)
 
         # Update all IBANs in group
         update_result = 0
         for iban in self.get_group_ibans(collection):
-            update_result += self._delete(iban, condition, multi).get('deleted', 0)
+            update_result += delete_iban(iban).get('deleted', 0)
 
         return {'deleted': update_result}
 
@@ -271,6 +869,7 @@ class BaseDb():
                 }
             ])
 
+        self._delete(self.ROLLUP_COLLECTION, {'key': 'iban', 'value': collection})
         return self._truncate(collection)
 
     def _truncate(self, collection):
@@ -332,6 +931,132 @@ class BaseDb():
         """
         raise NotImplementedError()
 
+    def save_job(self, job: dict):
+        """
+        Speichert oder ersetzt den Datensatz eines Hintergrund-Jobs.
+        Die Jobs liegen nicht in den Metadaten, da jede Änderung dort die
+        Caches des Taggers ungültig machen würde (siehe _metadata_changed).
+
+        Ein bestehender Datensatz wird mit einem Schreibvorgang aktualisiert, sodass
+        der Job für andere Prozesse zu keinem Zeitpunkt fehlt.
+
+        Args:
+            job (dict): Job-Datensatz mit 'uuid' (siehe JobQueue.get)
+        Returns:
+            dict:
+                - updated, int: Anzahl der aktualisierten Datensätze
+                - inserted, int: Anzahl der neu eingefügten Datensätze
+        """
+        result = self._update_many_by_uuid({job['uuid']: job}, self.JOB_COLLECTION, merge=False)
+        if result.get('updated'):
+            return {'updated': result['updated'], 'inserted': 0}
+
+        return {'updated': 0, **self._insert(job, self.JOB_COLLECTION)}
+
+    def get_job(self, uuid: str):
+        """
+        Ruft den Datensatz eines Hintergrund-Jobs ab.
+
+        Args:
+            uuid (str): ID des Jobs
+        Returns:
+            dict: Job-Datensatz oder None, wenn der Job nicht existiert
+        """
+        result = self._select([self.JOB_COLLECTION], {'key': 'uuid', 'value': uuid})
+        return dict(result[0]) if result else None
+
+    def list_jobs(self, status: list=None) -> list:
+        """
+        Ruft die Datensätze der Hintergrund-Jobs ab.
+
+        Args:
+            status (list): Nur Jobs mit einem dieser Status. Default: Alle Jobs
+        Returns:
+            list(dict): Job-Datensätze
+        """
+        condition = None
+        if status:
+            condition = [{'key': 'status', 'value': s} for s in status]
+
+        return [dict(job) for job in self._select([self.JOB_COLLECTION], condition, 'OR')]
+
+    def delete_jobs(self, before: float) -> dict:
+        """
+        Löscht abgeschlossene Hintergrund-Jobs ('done' oder 'failed'),
+        die vor dem angegebenen Zeitpunkt zuletzt geändert wurden.
+
+        Args:
+            before (float): Zeitpunkt (Timestamp)
+        Returns:
+            dict:
+                - deleted, int: Anzahl der gelöschten Datensätze
+        """
+        return self._delete(self.JOB_COLLECTION, [
+            {'key': 'updated', 'value': before, 'compare': '<'},
+            {'key': 'status', 'value': 'queued', 'compare': '!='},
+            {'key': 'status', 'value': 'running', 'compare': '!='},
+        ])
+
+    @property
+    def metadata_version(self):
+        """
+        Version der Metadaten. Sie liegt in der Datenbank, damit Caches (z.B. kompilierte
+        Regeln und Parser im Tagger) auch Änderungen anderer Prozesse erkennen.
+
+        Returns:
+            str: Version oder None, wenn die Metadaten noch nie geändert wurden
+        """
+        result = self._select([self.VERSION_COLLECTION], {'key': 'uuid', 'value': 'metadata'})
+        return result[0].get('version') if result else None
+
+    def _metadata_changed(self):
+        """
+        Speichert eine neue Version der Metadaten, damit Caches in allen Prozessen
+        neu geladen werden. Wird von 'set_metadata' und 'delete_metadata'
+        (und damit auch von 'import_metadata') aufgerufen.
+
+        Die Version ist eine zufällige ID statt eines Zählers, damit gleichzeitige
+        Änderungen zweier Prozesse nie dieselbe Version ergeben.
+        """
+        self._delete(self.VERSION_COLLECTION, {'key': 'uuid', 'value': 'metadata'})
+        self._insert({'uuid': 'metadata', 'version': uuid4().hex}, self.VERSION_COLLECTION)
+
+    def ruleset_version(self, collection: str, key: str):
+        """
+        Version des Regelwerks, mit der alle Transaktionen einer IBAN zuletzt
+        vollständig geprüft wurden.
+
+        Args:
+            collection (str): IBAN oder Gruppe. Bei Gruppen muss die Version
+                              für alle IBANs der Gruppe gelten.
+            key (str): Art der Markierung ('tag_version' oder 'cat_version')
+        Returns:
+            str: Version oder None, wenn keine (gemeinsame) Version gespeichert ist
+        """
+        versions = set()
+        for iban in self.get_group_ibans(collection, check_before=True):
+            result = self._select([self.VERSION_COLLECTION],
+                                  {'key': 'uuid', 'value': f'{key}:{iban}'})
+            versions.add(result[0].get('version') if result else None)
+
+        return versions.pop() if len(versions) == 1 else None
+
+    def set_ruleset_version(self, collection: str, key: str, version: str):
+        """
+        Speichert die Version des Regelwerks, mit der alle Transaktionen einer IBAN
+        vollständig geprüft wurden. Die Transaktionen selbst müssen dadurch nur
+        neu markiert werden, wenn sie neu sind oder sich geändert haben.
+
+        Args:
+            collection (str): IBAN oder Gruppe (Version gilt für alle IBANs der Gruppe)
+            key (str): Art der Markierung ('tag_version' oder 'cat_version')
+            version (str): Version des Regelwerks
+        """
+        for iban in self.get_group_ibans(collection, check_before=True):
+            uuid = f'{key}:{iban}'
+            self._delete(self.VERSION_COLLECTION, {'key': 'uuid', 'value': uuid})
+            self._insert({'uuid': uuid, 'version': version}, self.VERSION_COLLECTION)
+
     def get_group_ibans(self, group: str, check_before: bool=False):
         """
         Ruft die Liste von IBANs einer Gruppe aus der Datenbank ab.
@@ -410,7 +1135,7 @@ class BaseDb():
         """
         raise NotImplementedError()
 
-    def _generate_unique(self, tx_entry: dict | list[dict]):
+    def generate_unique(self, tx_entry: dict | list[dict]):
         """
         Erstellt einen einmaligen ID für jede Transaktion aus den Transaktionsdaten.
 
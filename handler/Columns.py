@@ -0,0 +1,369 @@
+#!/usr/bin/python3 # pylint: disable=invalid-name
+"""Spaltenorientierter In-Memory Cache der Transaktionen eines Tables für Auswertungen."""
+
+import math
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class ColumnCache():
+    """
+    Spalten (NumPy Arrays) aller Transaktionen eines Tables, mit denen Filter und
+    Summen vektorisiert berechnet werden, ohne die Dokumente einzeln zu durchlaufen.
+
+    - Zahlen ('date_tx', 'valuta', 'amount', 'prio') als float64 (NaN, wenn leer)
+    - 'category', 'peer' und 'art' als Codes (int32) auf eine Liste der Werte
+      (-1, wenn der Schlüssel fehlt)
+    - 'tags' als Paare aus Zeile und Code (eine Zeile je Tag)
+    - 'uuid' und die doc_ids
+
+    Der Cache bezieht sich auf genau einen Stand der Rohdaten eines Tables
+    (siehe 'raw_table') und wird bei Änderungen neu aufgebaut (wie handler.Index).
+    """
+
+    NUMERIC_KEYS = ('date_tx', 'valuta', 'amount', 'prio')
+    CODED_KEYS = ('category', 'peer', 'art')
+    LIST_KEYS = ('tags',)
+
+    def __init__(self, raw_table: dict):
+        """
+        Baut alle Spalten aus den Rohdaten eines Tables auf.
+
+        Args:
+            raw_table (dict): Dokumente des Tables ({doc_id (str): dict})
+        """
+        self.raw_table = raw_table
+        docs = list(raw_table.values())
+        self.size = len(docs)
+
+        self.doc_ids = np.fromiter((int(i) for i in raw_table), dtype=np.int64, count=self.size)
+        self.uuids = np.array([d.get('uuid') for d in docs], dtype=object)
+
+        self.numeric = {}
+        self.present = {}
+        for key in self.NUMERIC_KEYS:
+            self.numeric[key] = np.fromiter(
+                (self._number(d.get(key)) for d in docs), dtype=np.float64, count=self.size
+            )
+            # Missing keys never match (as in the query), other NaN values may
+            self.present[key] = np.fromiter(
+                (key in d for d in docs), dtype=bool, count=self.size
+            )
+
+        # Dictionary encoding: {key: [values]} and {key: codes}
+        self.values = {}
+        self.codes = {}
+        for key in self.CODED_KEYS:
+            lookup = {}
+            codes = np.fromiter(
+                (self._encode(lookup, d[key]) if key in d else -1 for d in docs),
+                dtype=np.int32, count=self.size
+            )
+            self.values[key] = list(lookup)
+            self.codes[key] = codes
+
+        lookup = {}
+        rows, codes = [], []
+        self.tags_are_list = np.zeros(self.size, dtype=bool)
+        for row, doc in enumerate(docs):
+            tags = doc.get('tags')
+            if not isinstance(tags, list):
+                continue
+
+            self.tags_are_list[row] = True
+            for tag in tags:
+                code = self._encode(lookup, tag)
+                if code >= 0:
+                    rows.append(row)
+                    codes.append(code)
+
+        self.values['tags'] = list(lookup)
+        self.tag_rows = np.array(rows, dtype=np.int64)
+        self.tag_codes = np.array(codes, dtype=np.int32)
+        self.tag_counts = np.bincount(self.tag_rows, minlength=self.size)
+
+    @staticmethod
+    def available():
+        """
+        Prüft, ob NumPy für den Cache installiert ist.
+
+        Returns:
+            bool: True, wenn der Cache genutzt werden kann
+        """
+        return np is not None
+
+    def mask(self, condition, multi: str='AND'):
+        """
+        Ermittelt vektorisiert alle Zeilen, die eine Condition erfüllen.
+        Die Vergleiche folgen TinyDbHandler._form_where und _form_complete_query.
+
+        Args:
+            condition (dict | list(dict)): Bedingungen (siehe BaseDb.select)
+            multi (str): ['AND' | 'OR'] Logische Verknüpfung der Bedingungen
+        Returns:
+            numpy.ndarray: Boolesche Maske je Zeile oder None, wenn eine Bedingung
+                           nicht mit den Spalten geprüft werden kann
+        """
+        if condition is None:
+            return np.ones(self.size, dtype=bool)
+
+        if isinstance(condition, dict):
+            condition = [condition]
+
+        is_or = multi.upper() == 'OR' and len(condition) > 1
+        result = None
+        prio = None
+        for c in condition:
+            mask = self._condition_mask(c)
+            if mask is None:
+                return None
+
+            if c.get('key') == 'prio' and len(condition) > 1:
+                # Prio is always ANDed
+                prio = mask
+                continue
+
+            if result is None:
+                result = mask
+            elif is_or:
+                result = result | mask
+            else:
+                result = result & mask
+
+        if result is None:
+            result = np.ones(self.size, dtype=bool)
+
+        if prio is not None:
+            result = result & prio
+
+        return result
+
+    def documents(self, mask):
+        """
+        Liefert die doc_ids der Zeilen einer Maske.
+
+        Args:
+            mask (numpy.ndarray): Boolesche Maske je Zeile (siehe mask)
+        Returns:
+            list: doc_ids in der Reihenfolge des Tables
+        """
+        return self.doc_ids[mask].tolist()
+
+    def group_sums(self, mask, key: str):
+        """
+        Summiert die Beträge der Zeilen einer Maske je Wert eines Schlüssels
+        (wie TinyDbHandler._aggregate_sums: leere und fehlende Werte unter None).
+
+        Args:
+            mask (numpy.ndarray): Boolesche Maske je Zeile (siehe mask)
+            key (str): Schlüssel aus CODED_KEYS oder LIST_KEYS
+        Returns:
+            dict: Summe der Beträge je Wert
+        """
+        amounts = np.nan_to_num(self.numeric['amount'])
+        values = self.values[key]
+
+        if key in self.LIST_KEYS:
+            selected = mask[self.tag_rows]
+            codes = self.tag_codes[selected]
+            totals = np.bincount(codes, weights=amounts[self.tag_rows[selected]],
+                                 minlength=len(values))
+            sums = {values[code]: float(totals[code]) for code in np.unique(codes).tolist()}
+
+            # Empty or missing tag lists are summed as None
+            untagged = mask & (self.tag_counts == 0)
+            if untagged.any():
+                sums[None] = sums.get(None, 0.0) + float(amounts[untagged].sum())
+
+            return sums
+
+        # Missing keys (-1) are summed as None
+        codes = self.codes[key][mask] + 1
+        totals = np.bincount(codes, weights=amounts[mask], minlength=len(values) + 1)
+        sums = {}
+        for code in np.unique(codes).tolist():
+            value = values[code - 1] if code > 0 else None
+            sums[value] = sums.get(value, 0.0) + float(totals[code])
+
+        return sums
+
+    def split_codes(self, key: str):
+        """
+        Liefert die Codes und Werte eines Schlüssels für die Aufteilung von Summen.
+
+        Args:
+            key (str): Schlüssel aus CODED_KEYS oder None
+        Returns:
+            tuple: Codes je Zeile (numpy.ndarray) und Liste der Werte je Code
+        """
+        if key is None:
+            return np.zeros(self.size, dtype=np.int64), [None]
+
+        # Missing keys (-1) are split as None
+        return self.codes[key].astype(np.int64) + 1, [None] + self.values[key]
+
+    def _condition_mask(self, condition: dict):
+        """
+        Ermittelt die Maske für eine einzelne Condition.
+
+        Args:
+            condition (dict): Bedingung (siehe BaseDb.select)
+        Returns:
+            numpy.ndarray: Boolesche Maske oder None, wenn die Condition
+                           nicht mit den Spalten geprüft werden kann
+        """
+        key = condition.get('key')
+        compare = condition.get('compare', '==')
+        value = condition.get('value')
+        if not isinstance(key, str):
+            return None
+
+        if key in self.LIST_KEYS:
+            return self._list_mask(compare, value)
+
+        if isinstance(value, (list, tuple)):
+            return None
+
+        # Numbers are compared as float (as in the query)
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            pass
+
+        if key in self.NUMERIC_KEYS:
+            if not isinstance(value, float):
+                return None
+
+            column = self.numeric[key]
+            with np.errstate(invalid='ignore'):
+                result = {
+                    '==': lambda: column == value,
+                    '!=': lambda: (column != value) & self.present[key],
+                    '<': lambda: column < value,
+                    '>': lambda: column > value,
+                    '<=': lambda: column <= value,
+                    '>=': lambda: column >= value,
+                }.get(compare, lambda: None)()
+
+            return result
+
+        if key in self.CODED_KEYS and compare in ('==', '!='):
+            codes = self.codes[key]
+            try:
+                code = self.values[key].index(value)
+            except ValueError:
+                code = -2
+
+            if compare == '==':
+                return codes == code
+
+            return (codes != code) & (codes != -1)
+
+        if key == 'uuid' and compare == '==':
+            return self.uuids == value
+
+        return None
+
+    def _list_mask(self, compare: str, value):
+        """
+        Ermittelt die Maske für eine Condition auf 'tags'.
+
+        Args:
+            compare (str): ['in' | 'notin' | 'all' | 'exact']
+            value (list): Vergleichswerte
+        Returns:
+            numpy.ndarray: Boolesche Maske oder None, wenn der Vergleich
+                           nicht unterstützt wird
+        """
+        if compare not in ('in', 'notin', 'all', 'exact') or not isinstance(value, (list, tuple)):
+            return None
+
+        lookup = self.values['tags']
+        wanted = []
+        for v in set(value):
+            try:
+                wanted.append(lookup.index(v))
+            except ValueError:
+                wanted.append(-1)
+
+        matches = np.isin(self.tag_codes, [w for w in wanted if w >= 0])
+        hits = np.bincount(self.tag_rows[matches], minlength=self.size)
+
+        if compare == 'in':
+            return self.tags_are_list & (hits > 0)
+        if compare == 'notin':
+            return self.tags_are_list & (hits == 0)
+
+        # Every wanted tag has to be present (duplicate tags count once in a row)
+        unique_hits = self._unique_hits(matches)
+        all_present = self.tags_are_list & (unique_hits == len(wanted))
+        if compare == 'all':
+            return all_present
+
+        distinct = self._unique_hits(np.ones(len(self.tag_codes), dtype=bool))
+        return all_present & (distinct == len(wanted))
+
+    def _unique_hits(self, matches):
+        """Anzahl unterschiedlicher Tags je Zeile unter den Treffern"""
+        rows = self.tag_rows[matches]
+        codes = self.tag_codes[matches]
+        if not len(rows):
+            return np.zeros(self.size, dtype=np.int64)
+
+        pairs = np.unique(rows * (len(self.values['tags']) + 1) + codes)
+        return np.bincount(pairs // (len(self.values['tags']) + 1), minlength=self.size)
+
+    @staticmethod
+    def _number(value):
+        """Wandelt einen Wert für eine Zahlenspalte um (NaN, wenn keine Zahl)"""
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            return math.nan
+
+        return float(value)
+
+    @staticmethod
+    def _encode(lookup: dict, value):
+        """Liefert den Code eines Werts und ergänzt unbekannte Werte"""
+        try:
+            return lookup.setdefault(value, len(lookup))
+        except TypeError:
+            # Unhashable values can't be encoded
+            return -1
+
+
+def bucket_sums(dates, amounts, codes, split_values: list, interval: str):
+    """
+    Summiert Einnahmen und Ausgaben je Zeitraum und Code vektorisiert.
+
+    Args:
+        dates (numpy.ndarray): 'date_tx' je Zeile (int64, Unix-Timestamp)
+        amounts (numpy.ndarray): Beträge je Zeile (float64)
+        codes (numpy.ndarray): Code der Aufteilung je Zeile (int64, 0 ohne Aufteilung)
+        split_values (list): Wert je Code
+        interval (str): ['month' | 'week'] Länge der Zeiträume
+    Returns:
+        dict: Einnahmen und Ausgaben je (Beginn des Zeitraums, Wert der Aufteilung)
+    """
+    if interval == 'month':
+        starts = dates.astype('datetime64[s]').astype('datetime64[M]')
+        starts = starts.astype('datetime64[s]').astype(np.int64)
+    else:
+        # 01.01.1970 was a Thursday
+        starts = ((dates // 86400 + 3) // 7 * 7 - 3) * 86400
+
+    keys = (starts // 86400) * len(split_values) + codes
+    unique_keys, inverse = np.unique(keys, return_inverse=True)
+    income = np.bincount(inverse, weights=np.where(amounts > 0, amounts, 0.0))
+    expense = np.bincount(inverse, weights=np.where(amounts < 0, amounts, 0.0))
+
+    buckets = {}
+    for i, key in enumerate(unique_keys.tolist()):
+        day, code = divmod(key, len(split_values))
+        bucket = (day * 86400, split_values[code])
+        totals = buckets.get(bucket, (0.0, 0.0))
+        buckets[bucket] = (totals[0] + float(income[i]), totals[1] + float(expense[i]))
+
+    return buckets
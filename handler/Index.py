@@ -0,0 +1,207 @@
+#!/usr/bin/python3 # pylint: disable=invalid-name
+"""In-Memory Indexes für die Tables der TinyDB."""
+
+from bisect import bisect_left, bisect_right
+
+
+class TableIndex():
+    """
+    Index über alle Dokumente eines Tables, mit dem die Kandidaten einer Abfrage
+    vor dem Prüfen der vollständigen Query eingegrenzt werden.
+
+    - Sortierte Listen für Bereichsabfragen und Sortierung auf 'date_tx' und 'amount'
+      (bei gleichen Werten nach 'uuid' sortiert, siehe BaseDb._sort_key)
+    - Invertierte Indexes für 'category', 'tags' und 'uuid'
+
+    Der Index bezieht sich auf genau einen Stand der Rohdaten eines Tables
+    (siehe 'raw_table') und wird bei Änderungen neu aufgebaut.
+    """
+
+    SORTED_KEYS = ('date_tx', 'amount')
+    INVERTED_KEYS = ('category', 'uuid')
+    LIST_KEYS = ('tags',)
+
+    def __init__(self, raw_table: dict):
+        """
+        Baut alle Indexes aus den Rohdaten eines Tables auf.
+
+        Args:
+            raw_table (dict): Dokumente des Tables ({doc_id (str): dict})
+        """
+        self.raw_table = raw_table
+
+        # Sorted values and the matching doc_ids per key (ties sorted by uuid)
+        self.sorted = {}
+        entries = {key: [] for key in self.SORTED_KEYS}
+
+        # Inverted: {key: {value: set(doc_ids)}}
+        self.inverted = {key: {} for key in self.INVERTED_KEYS + self.LIST_KEYS}
+
+        for doc_id, doc in raw_table.items():
+            doc_id = int(doc_id)
+
+            for key in self.SORTED_KEYS:
+                value = doc.get(key)
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    entries[key].append((value, doc.get('uuid') or '', doc_id))
+
+            for key in self.INVERTED_KEYS:
+                value = doc.get(key)
+                try:
+                    self.inverted[key].setdefault(value, set()).add(doc_id)
+                except TypeError:
+                    # Unhashable values can't be looked up
+                    continue
+
+            for key in self.LIST_KEYS:
+                values = doc.get(key)
+                if not isinstance(values, list):
+                    continue
+
+                for value in values:
+                    try:
+                        self.inverted[key].setdefault(value, set()).add(doc_id)
+                    except TypeError:
+                        continue
+
+        for key, key_entries in entries.items():
+            key_entries.sort()
+            self.sorted[key] = (
+                [e[0] for e in key_entries],
+                [e[2] for e in key_entries],
+                [e[1] for e in key_entries]
+            )
+
+    def candidates(self, condition, multi: str='AND'):
+        """
+        Ermittelt die doc_ids, die eine Condition erfüllen können.
+        Die vollständige Query muss auf die Kandidaten trotzdem angewendet werden.
+
+        Args:
+            condition (dict | list(dict)): Bedingungen (siehe BaseDb.select)
+            multi (str): ['AND' | 'OR'] Logische Verknüpfung der Bedingungen
+        Returns:
+            set: Mögliche doc_ids oder None, wenn der Index die Abfrage
+                 nicht eingrenzen kann (alle Dokumente prüfen)
+        """
+        if condition is None:
+            return None
+
+        if isinstance(condition, dict):
+            condition = [condition]
+
+        is_or = multi.upper() == 'OR'
+        result = None
+        for c in condition:
+            if c.get('key') == 'prio' and len(condition) > 1:
+                # Prio is always ANDed and not indexed
+                continue
+
+            ids = self._condition_candidates(c)
+            if ids is None:
+                if is_or:
+                    # Any not indexed condition could match
+                    return None
+
+                continue
+
+            if result is None:
+                result = set(ids)
+
+            elif is_or:
+                result |= ids
+
+            else:
+                result &= ids
+
+        return result
+
+    def counts(self, key: str):
+        """
+        Liefert die Häufigkeit jedes Werts eines invertierten Schlüssels.
+
+        Args:
+            key (str): Invertierter Schlüssel (siehe INVERTED_KEYS und LIST_KEYS)
+        Returns:
+            dict: Anzahl der Dokumente je Wert
+        """
+        return {value: len(doc_ids) for value, doc_ids in self.inverted[key].items() if doc_ids}
+
+    def seek(self, key: str, value, uuid: str):
+        """
+        Sucht die Position eines Schlüssels (Wert, uuid) in der sortierten Liste.
+
+        Args:
+            key (str): Sortierter Schlüssel (siehe SORTED_KEYS)
+            value (int | float): Wert des Schlüssels
+            uuid (str): UUID bei gleichen Werten
+        Returns:
+            tuple: Position des ersten Eintrags >= (value, uuid)
+                   und des ersten Eintrags > (value, uuid)
+        """
+        values, _, uuids = self.sorted[key]
+        lo = bisect_left(values, value)
+        hi = bisect_right(values, value)
+        return bisect_left(uuids, uuid, lo, hi), bisect_right(uuids, uuid, lo, hi)
+
+    def _condition_candidates(self, condition: dict):
+        """
+        Ermittelt die doc_ids für eine einzelne Condition.
+        Die Vergleiche folgen TinyDbHandler._form_where.
+
+        Args:
+            condition (dict): Bedingung (siehe BaseDb.select)
+        Returns:
+            set: Mögliche doc_ids oder None, wenn der Key nicht indiziert ist
+        """
+        key = condition.get('key')
+        compare = condition.get('compare', '==')
+        value = condition.get('value')
+        if not isinstance(key, str):
+            return None
+
+        if key in self.LIST_KEYS and compare in ('in', 'all', 'exact'):
+            if not isinstance(value, (list, tuple)):
+                return None
+
+            index = self.inverted[key]
+            sets = [index.get(v, set()) for v in value]
+            if compare == 'in':
+                return set().union(*sets)
+
+            if not sets:
+                # Every list contains all of no values
+                return None
+
+            return set.intersection(*sets)
+
+        if isinstance(value, (list, tuple)):
+            return None
+
+        # Numbers are compared as float (as in the query)
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            pass
+
+        if key in self.INVERTED_KEYS and compare == '==':
+            try:
+                return set(self.inverted[key].get(value, set()))
+            except TypeError:
+                return None
+
+        if key in self.SORTED_KEYS and isinstance(value, float):
+            values, doc_ids, _ = self.sorted[key]
+            bounds = {
+                '==': (bisect_left(values, value), bisect_right(values, value)),
+                '>': (bisect_right(values, value), len(values)),
+                '>=': (bisect_left(values, value), len(values)),
+                '<': (0, bisect_left(values, value)),
+                '<=': (0, bisect_right(values, value)),
+            }.get(compare)
+            if bounds is None:
+                return None
+
+            return set(doc_ids[bounds[0]:bounds[1]])
+
+        return None
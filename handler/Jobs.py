@@ -0,0 +1,247 @@
+#!/usr/bin/python3 # pylint: disable=invalid-name
+"""Hintergrund-Jobs für lang laufende Aufgaben (Upload, Reparse, Tagging)."""
+
+import os
+import time
+import uuid
+import socket
+import logging
+import threading
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+
+
+class JobQueue():
+    """
+    Führt lang laufende Aufgaben in einem Thread-Pool außerhalb des Requests aus.
+    Der Status jedes Jobs wird in der Datenbank gespeichert (siehe BaseDb.save_job),
+    sodass er per Job-ID abgefragt werden kann.
+
+    Eine Aufgabe ist eine Funktion, die entweder das Ergebnis (dict) zurückgibt oder
+    ein Generator, der Zwischenstände liefert (wie die Generatoren des Taggers).
+    Das zuletzt gelieferte dict ist dann das Ergebnis des Jobs.
+
+    Status eines Jobs: 'queued' -> 'running' -> 'done' | 'failed'
+
+    Abgeschlossene Jobs werden nach 'ttl' Sekunden gelöscht. Jobs, deren Prozess
+    beendet wurde, ohne sie abzuschließen, werden beim Start als 'failed' markiert.
+    """
+
+    # Nicht abgeschlossene Jobs aller Instanzen in diesem Prozess
+    _active = set()
+
+    def __init__(self, db_handler, app, max_workers: int=2, save_interval: float=5.0,
+                 ttl: float=None):
+        """
+        Initialisiert den Thread-Pool, markiert verwaiste Jobs als fehlgeschlagen
+        und löscht abgelaufene Jobs.
+
+        Args:
+            db_handler (BaseDb): Datenbankhandler für die Job-Datensätze
+            app (Flask): App, in deren Kontext die Jobs ausgeführt werden
+            max_workers (int): Anzahl gleichzeitig laufender Jobs
+            save_interval (float): Mindestabstand in Sekunden zwischen dem Speichern
+                                   von Zwischenständen eines Jobs
+            ttl (float): Sekunden, die abgeschlossene Jobs abrufbar bleiben.
+                         Default: Jobs werden nicht gelöscht
+        """
+        self.db_handler = db_handler
+        self.app = app
+        self.save_interval = save_interval
+        self.ttl = ttl
+        self.host = socket.gethostname()
+        self.executor = ThreadPoolExecutor(max_workers=max_workers,
+                                           thread_name_prefix='pynance-job')
+
+        # Jobs, die noch nicht abgeschlossen sind ({uuid: dict})
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+        self._fail_orphaned()
+        self.prune()
+
+    def submit(self, name: str, func, *args, **kwargs) -> dict:
+        """
+        Legt einen Job an und reiht die Aufgabe in den Thread-Pool ein.
+
+        Args:
+            name (str): Bezeichnung des Jobs (z.B. 'upload', 'reparse')
+            func (callable): Aufgabe, die mit *args und **kwargs aufgerufen wird
+        Returns:
+            dict: Job-Datensatz (siehe get)
+        """
+        now = time.time()
+        job = {
+            'uuid': uuid.uuid4().hex,
+            'name': name,
+            'status': 'queued',
+            'progress': None,
+            'result': None,
+            'error': None,
+            'created': now,
+            'updated': now,
+            'host': self.host,
+            'pid': os.getpid(),
+        }
+        with self._lock:
+            self._jobs[job['uuid']] = job
+            self._active.add(job['uuid'])
+
+        self._save(job)
+        self.executor.submit(self._run, job, func, args, kwargs)
+        self.prune()
+        return dict(job)
+
+    def get(self, job_id: str):
+        """
+        Liefert den aktuellen Stand eines Jobs.
+
+        Args:
+            job_id (str): ID des Jobs
+        Returns:
+            dict: Job-Datensatz oder None, wenn der Job nicht existiert
+                - uuid, str: ID des Jobs
+                - name, str: Bezeichnung des Jobs
+                - status, str: ['queued' | 'running' | 'done' | 'failed']
+                - progress, dict: Letzter Zwischenstand (Listen als Anzahl)
+                - result, dict: Ergebnis (bei 'done', Listen als Anzahl)
+                - error, str: Fehlermeldung (bei 'failed')
+                - created, float: Zeitpunkt der Erstellung (Timestamp)
+                - updated, float: Zeitpunkt der letzten Änderung (Timestamp)
+                - host, str: Rechner des Prozesses, der den Job ausführt
+                - pid, int: ID des Prozesses, der den Job ausführt
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                return dict(job)
+
+        return self.db_handler.get_job(job_id)
+
+    def prune(self) -> dict:
+        """
+        Löscht abgeschlossene Jobs, die älter als 'ttl' Sekunden sind.
+
+        Returns:
+            dict:
+                - deleted, int: Anzahl der gelöschten Jobs
+        """
+        if self.ttl is None:
+            return {'deleted': 0}
+
+        try:
+            return self.db_handler.delete_jobs(time.time() - self.ttl)
+
+        except Exception as ex: # pylint: disable=broad-exception-caught
+            logging.error(f"Abgelaufene Jobs konnten nicht gelöscht werden: {ex}")
+            return {'deleted': 0}
+
+    def _fail_orphaned(self):
+        """
+        Markiert Jobs als fehlgeschlagen, die noch als 'queued' oder 'running'
+        gespeichert sind, deren Prozess auf diesem Rechner aber nicht mehr läuft
+        (z.B. nach einem Neustart). Jobs anderer Rechner werden nicht geändert.
+        """
+        for job in self.db_handler.list_jobs(['queued', 'running']):
+            if not self._is_orphaned(job):
+                continue
+
+            logging.warning(f"Job {job['uuid']} ({job.get('name')}) wurde abgebrochen")
+            self._update(job, status='failed',
+                         error='Der Prozess des Jobs wurde vorzeitig beendet')
+
+    def _is_orphaned(self, job: dict) -> bool:
+        """
+        Prüft, ob der Prozess eines nicht abgeschlossenen Jobs beendet wurde.
+
+        Args:
+            job (dict): Job-Datensatz
+        Returns:
+            bool: True, wenn der Job nicht mehr ausgeführt wird
+        """
+        if job.get('host', self.host) != self.host:
+            return False
+
+        pid = job.get('pid')
+        if pid == os.getpid():
+            # Same process (or a reused PID after a restart)
+            return job['uuid'] not in self._active
+
+        try:
+            os.kill(pid, 0)
+
+        except PermissionError:
+            # Process of another user
+            return False
+
+        except (TypeError, OSError):
+            return True
+
+        return False
+
+    def _run(self, job: dict, func, args: tuple, kwargs: dict):
+        """
+        Führt die Aufgabe eines Jobs im App-Kontext aus und speichert den Status.
+
+        Args:
+            job (dict): Job-Datensatz
+            func (callable): Aufgabe
+            args (tuple): Argumente der Aufgabe
+            kwargs (dict): Keyword-Argumente der Aufgabe
+        """
+        with self.app.app_context():
+            self._update(job, status='running')
+            try:
+                result = func(*args, **kwargs)
+                if isinstance(result, Iterator):
+                    last, last_save = None, time.monotonic()
+                    for partial in result:
+                        last = partial
+                        job['progress'] = self._summary(partial)
+                        if time.monotonic() - last_save >= self.save_interval:
+                            self._update(job)
+                            last_save = time.monotonic()
+
+                    result = last
+
+                self._update(job, status='done', result=self._summary(result))
+
+            except Exception as ex: # pylint: disable=broad-exception-caught
+                logging.exception(f"Job {job['uuid']} ({job['name']}) ist fehlgeschlagen")
+                self._update(job, status='failed', error=f"{ex.__class__.__name__} {ex}")
+
+            finally:
+                with self._lock:
+                    self._jobs.pop(job['uuid'], None)
+                    self._active.discard(job['uuid'])
+
+    def _update(self, job: dict, **values):
+        """Ändert Werte eines Jobs und speichert ihn"""
+        with self._lock:
+            job.update(values)
+            job['updated'] = time.time()
+
+        self._save(job)
+
+    def _save(self, job: dict):
+        """Speichert eine Kopie des Jobs in der Datenbank"""
+        try:
+            self.db_handler.save_job(dict(job))
+
+        except Exception as ex: # pylint: disable=broad-exception-caught
+            logging.error(f"Job {job['uuid']} konnte nicht gespeichert werden: {ex}")
+
+    @staticmethod
+    def _summary(partial):
+        """
+        Kopiert einen Zwischenstand oder das Ergebnis, da der Generator diesen
+        weiter verändern kann. Listen (z.B. 'entries') werden dabei nur als Anzahl
+        übernommen, damit die Job-Datensätze klein bleiben.
+        """
+        if not isinstance(partial, dict):
+            return partial
+
+        return {
+            key: len(value) if isinstance(value, list) else value
+            for key, value in partial.items()
+        }
@@ -3,6 +3,7 @@
 
 import re
 import logging
+from datetime import timezone
 from flask import current_app
 import pymongo
 
@@ -37,7 +38,63 @@ class MongoDbHandler(BaseDb):
                 [("uuid", pymongo.TEXT)], unique=True
             )
 
-    def _select(self, collection: list, condition=None, multi='AND'):
+        # Index für Sortierung und Paginierung nach Datum (auch für bestehende Konten)
+        for collection in self._get_collections():
+            if self.check_collection_is_iban(collection):
+                self.connection[collection].create_index(
+                    [("date_tx", pymongo.DESCENDING), ("uuid", pymongo.DESCENDING)]
+                )
+
+            elif collection != 'metadata':
+                self._repair_uuid_index(collection)
+
+    def _create_indexes(self, collection: str):
+        """
+        Legt die Indexes einer neuen Collection an.
+
+        Konten erhalten einen eindeutigen Textindex auf 'uuid' (MD5 Hash) und einen Index
+        für die Sortierung nach Datum. Hilfs-Collections (Rollups, Versionen, Jobs)
+        nutzen zusammengesetzte IDs wie '{iban}/{monat}'. Da ein eindeutiger Textindex
+        je Wort statt je Wert gilt, erhalten sie einen normalen eindeutigen Index.
+
+        Args:
+            collection (str): Name der Collection
+        """
+        if not self.check_collection_is_iban(collection):
+            self.connection[collection].create_index([("uuid", pymongo.ASCENDING)], unique=True)
+            return
+
+        self.connection[collection].create_index(
+            [("uuid", pymongo.TEXT)], unique=True
+        )
+        # Sorting and pagination by date
+        self.connection[collection].create_index(
+            [("date_tx", pymongo.DESCENDING), ("uuid", pymongo.DESCENDING)]
+        )
+
+    def _repair_uuid_index(self, collection: str):
+        """
+        Ersetzt den Textindex auf 'uuid' einer Hilfs-Collection aus älteren Versionen
+        durch einen normalen eindeutigen Index (siehe _create_indexes). Rollups, die
+        mit dem Textindex gespeichert wurden, sind unvollständig und werden verworfen.
+
+        Args:
+            collection (str): Name der Collection
+        """
+        col = self.connection[collection]
+        for name, info in col.index_information().items():
+            if pymongo.TEXT not in (kind for _, kind in info.get('key', [])):
+                continue
+
+            logging.warning(f"Ersetze den Textindex auf 'uuid' der Collection {collection}")
+            col.drop_index(name)
+            if collection == self.ROLLUP_COLLECTION:
+                col.delete_many({})
+
+        col.create_index([("uuid", pymongo.ASCENDING)], unique=True)
+
+    def _select(self, collection: list, condition=None, multi='AND',
+                sort=None, limit=None, offset=0, after=None):
         """
         Selektiert Datensätze aus der Datenbank, die die angegebene Bedingung erfüllen.
 
@@ -56,6 +113,11 @@ class MongoDbHandler(BaseDb):
             multi, str ['AND' | 'OR']:      Wenn 'condition' eine Liste mit conditions ist,
                                             werden diese logisch wie hier angegeben verknüpft.
                                             Default: 'AND'
+            sort, tuple:                    (key, descending) Sortierung für 'limit'
+            limit, int:                     Nur die ersten sortierten Ergebnisse liefern
+            offset, int:                    Anzahl der zu überspringenden Ergebnisse
+            after, tuple:                   Nur Ergebnisse nach (Wert, uuid) in
+                                            Sortierreihenfolge (Keyset-Paginierung)
         Returns:
             list: Liste der ausgewählten Datensätze
         """
@@ -63,6 +125,10 @@ class MongoDbHandler(BaseDb):
         query = self._form_complete_query(condition, multi)
         result = []
 
+        if limit is not None:
+            return self._select_page(collection, query, sort or ('date_tx', True),
+                                     limit, offset, after)
+
         for col in collection:
             col = self.connection[col]
             db_result = list(col.find(query))
@@ -75,6 +141,51 @@ class MongoDbHandler(BaseDb):
 
         return result
 
+    def _select_page(self, collection: list, query: dict, sort: tuple,
+                     limit: int, offset: int, after: tuple=None):
+        """
+        Selektiert eine sortierte Seite mit sort().skip().limit() über den
+        Index auf (date_tx, uuid). Mit 'after' wird über den Index direkt zur
+        Position nach dem Cursor gesprungen. Bei mehreren Collections werden
+        die ersten offset + limit Datensätze je Collection zusammengeführt.
+
+        Args:
+            collection (list): Namen der Collections
+            query (dict): MongoDB Filter
+            sort (tuple): (key, descending) Sortierung
+            limit (int): Anzahl der Datensätze
+            offset (int): Anzahl der zu überspringenden Datensätze
+            after (tuple): Nur Datensätze nach (Wert, uuid) in Sortierreihenfolge
+        Returns:
+            list: Sortierte Datensätze
+        """
+        sort_key, descending = sort
+        direction = pymongo.DESCENDING if descending else pymongo.ASCENDING
+        sort_spec = [(sort_key, direction), ('uuid', direction)]
+        projection = {'_id': False}
+
+        if after is not None:
+            # Keyset: (sort_key, uuid) after the cursor
+            value, uuid = after
+            op = '$lt' if descending else '$gt'
+            keyset = {'$or': [
+                {sort_key: {op: value}},
+                {sort_key: value, 'uuid': {op: uuid}},
+            ]}
+            query = {'$and': [query, keyset]} if query else keyset
+
+        if len(collection) == 1:
+            cursor = self.connection[collection[0]].find(query, projection)
+            return list(cursor.sort(sort_spec).skip(offset).limit(limit))
+
+        rows = []
+        for col in collection:
+            cursor = self.connection[col].find(query, projection)
+            rows.extend(cursor.sort(sort_spec).limit(offset + limit))
+
+        rows.sort(key=self._sort_key(sort_key), reverse=descending)
+        return rows[offset:offset + limit]
+
     def _insert(self, data: dict|list[dict], collection: str):
         """
         Fügt einen oder mehrere Datensätze in die Datenbank ein.
@@ -89,9 +200,7 @@ class MongoDbHandler(BaseDb):
         # Da eine collection mit dem ersten Insert erstellt wird,
         # muss ggf. direkt der Index zunächst gesetzt werden.
         if collection not in self._get_collections():
-            self.connection[collection].create_index(
-                [("uuid", pymongo.TEXT)], unique=True
-            )
+            self._create_indexes(collection)
 
         if isinstance(data, list):
             # Insert Many (INSERT IGNORE)
@@ -109,7 +218,7 @@ class MongoDbHandler(BaseDb):
             result = self.connection[collection].insert_one(data)
             return {'inserted': 1}
 
-        except pymongo.errors.BulkWriteError:
+        except (pymongo.errors.BulkWriteError, pymongo.errors.DuplicateKeyError):
             return {'inserted': 0}
 
     def _update(self, data, collection, condition=None, multi='AND', merge=True):
@@ -151,29 +260,65 @@ class MongoDbHandler(BaseDb):
             logging.error('Using "merge" without a query is not possible')
             return { 'error': 'Using "merge" without a query is not possible', 'updated': 0 }
 
-        if merge:
-            # Care about lists and merge with special command
-            unmerged_data = {}
-            add_to_set = {}
-            for d in data.keys():
+        update_op = self._form_update_op(data, merge)
 
-                if isinstance(data[d], list):
-                    add_to_set[d] = {'$each': data[d]}
-                    continue
+        update_result = collection.update_many(query, update_op)
+        return {'updated': update_result.modified_count}
 
-                unmerged_data[d] = data[d]
+    def _update_many_by_uuid(self, updates, collection, merge=True):
+        """
+        Aktualisiert mehrere Datensätze anhand ihrer UUID mit einem einzigen
+        Bulk-Write.
 
-            # Set all list keys to operation (or not if none)
-            update_op = {'$set': unmerged_data}
-            if add_to_set:
-                update_op['$addToSet'] = add_to_set
+        Args:
+            updates (dict): Aktualisierte Daten je Datensatz ({uuid: dict})
+            collection (str): Name der Collection, in der aktualisiert werden soll.
+            merge (bool): Wenn False, werden Listenfelder nicht gemerged, sondern
+                          komplett überschrieben. Default: True
+        Returns:
+            dict:
+                - updated, int: Anzahl der aktualisierten Datensätze
+        """
+        collection = self.connection[collection]
+        operations = [
+            pymongo.UpdateOne({'uuid': uuid}, self._form_update_op(data, merge))
+            for uuid, data in updates.items()
+        ]
 
-        else:
+        update_result = collection.bulk_write(operations, ordered=False)
+        return {'updated': update_result.modified_count}
+
+    def _form_update_op(self, data, merge=True):
+        """
+        Erstellt die Update-Operation für die übergebenen Daten.
+
+        Args:
+            data (dict): Aktualisierte Daten
+            merge (bool): Wenn True, werden Listenfelder mit '$addToSet' gemerged.
+        Returns:
+            dict: Update-Operation für MongoDB
+        """
+        if not merge:
             # No special handling
-            update_op = {'$set': data}
+            return {'$set': data}
 
-        update_result = collection.update_many(query, update_op)
-        return {'updated': update_result.modified_count}
+        # Care about lists and merge with special command
+        unmerged_data = {}
+        add_to_set = {}
+        for d in data.keys():
+
+            if isinstance(data[d], list):
+                add_to_set[d] = {'$each': data[d]}
+                continue
+
+            unmerged_data[d] = data[d]
+
+        # Set all list keys to operation (or not if none)
+        update_op = {'$set': unmerged_data}
+        if add_to_set:
+            update_op['$addToSet'] = add_to_set
+
+        return update_op
 
     def _delete(self, collection, condition=None, multi='AND'):
         """
@@ -248,11 +393,13 @@ class MongoDbHandler(BaseDb):
 
             # Insert new Entry
             result = collection.insert_one(entry)
+            self._metadata_changed()
             return {'inserted': (1 if result else 0)}
 
         # Only insert if not exists
         if not collection.find_one({'uuid': entry.get('uuid')}):
             result = collection.insert_one(entry)
+            self._metadata_changed()
             return {'inserted': (1 if result else 0)}
 
         return {'inserted': 0}
@@ -260,6 +407,9 @@ class MongoDbHandler(BaseDb):
     def delete_metadata(self, uuid):
         collection = self.connection['metadata']
         delete_result = collection.delete_one({'uuid': uuid})
+        if delete_result.deleted_count:
+            self._metadata_changed()
+
         return {'deleted': delete_result.deleted_count}
 
     def _form_condition(self, condition):
@@ -382,6 +532,120 @@ class MongoDbHandler(BaseDb):
 
         return query
 
+    def _distinct(self, collection: str, key: str):
+        """
+        Ermittelt die unterschiedlichen Werte eines Schlüssels mit 'distinct'
+        (Listen werden dabei von MongoDB aufgelöst).
+
+        Args:
+            collection (str): Name der Collection
+            key (str): Schlüssel
+        Returns:
+            set: Unterschiedliche Werte
+        """
+        values = set()
+        for value in self.connection[collection].distinct(key):
+            try:
+                values.add(value)
+            except TypeError:
+                # Unhashable (e.g. nested documents)
+                continue
+
+        return values
+
+    def _aggregate_sums(self, collection: str, condition, multi, group_by: list):
+        """
+        Summiert die Beträge mit einer Aggregation ($match, $unwind, $group),
+        sodass nur die Summen je Gruppe übertragen werden.
+
+        Args:
+            collection (str): Name der Collection
+            condition (dict | list(dict)): Bedingungen (siehe BaseDb.select)
+            multi (str): ['AND' | 'OR'] Logische Verknüpfung der Bedingungen
+            group_by (list): Schlüssel, nach denen gruppiert wird
+        Returns:
+            dict: Summe der Beträge je Schlüssel und Wert
+        """
+        query = self._form_complete_query(condition, multi)
+        facets = {}
+        for i, key in enumerate(group_by):
+            facets[f'g{i}'] = [
+                {'$unwind': {'path': f'${key}', 'preserveNullAndEmptyArrays': True}},
+                {'$group': {'_id': f'${key}', 'total': {'$sum': '$amount'}}}
+            ]
+
+        pipeline = [{'$match': query}, {'$facet': facets}]
+        result = next(self.connection[collection].aggregate(pipeline), {})
+
+        sums = {key: {} for key in group_by}
+        for i, key in enumerate(group_by):
+            for group in result.get(f'g{i}', []):
+                sums[key][group['_id']] = sums[key].get(group['_id'], 0.0) + group['total']
+
+        return sums
+
+    def _aggregate_timeseries(self, collection: str, condition, multi,
+                              interval: str, split_by: str):
+        """
+        Summiert Einnahmen und Ausgaben je Zeitraum in der Datenbank
+        ($match, $group über $dateTrunc von 'date_tx').
+
+        Args:
+            collection (str): Name der Collection
+            condition (dict | list(dict)): Bedingungen (siehe BaseDb.select)
+            multi (str): ['AND' | 'OR'] Logische Verknüpfung der Bedingungen
+            interval (str): ['month' | 'week'] Länge der Zeiträume
+            split_by (str): Optionaler Schlüssel für die Aufteilung der Zeiträume
+        Returns:
+            dict: Einnahmen und Ausgaben je (Beginn des Zeitraums, Wert von split_by)
+        """
+        query = self._form_complete_query(condition, multi)
+        query = {'$and': [query, {'date_tx': {'$ne': None}}]}
+        group_id = {
+            'start': {'$dateTrunc': {
+                'date': {'$toDate': {'$multiply': ['$date_tx', 1000]}},
+                'unit': interval,
+                'startOfWeek': 'monday'
+            }}
+        }
+        if split_by is not None:
+            group_id['split'] = f'${split_by}'
+
+        pipeline = [
+            {'$match': query},
+            {'$group': {
+                '_id': group_id,
+                'income': {'$sum': {'$cond': [{'$gt': ['$amount', 0]}, '$amount', 0]}},
+                'expense': {'$sum': {'$cond': [{'$lt': ['$amount', 0]}, '$amount', 0]}},
+            }}
+        ]
+
+        buckets = {}
+        for group in self.connection[collection].aggregate(pipeline):
+            start = int(group['_id']['start'].replace(tzinfo=timezone.utc).timestamp())
+            split = group['_id'].get('split')
+            if isinstance(split, (list, dict)):
+                split = str(split)
+
+            buckets[(start, split)] = (group['income'], group['expense'])
+
+        return buckets
+
+    def _dates_by_uuid(self, collection: str, uuids: list):
+        """
+        Liefert 'date_tx' der Datensätze mit den angegebenen UUIDs.
+
+        Args:
+            collection (str): Name der Collection
+            uuids (list): UUIDs der Datensätze
+        Returns:
+            list: Werte von 'date_tx'
+        """
+        cursor = self.connection[collection].find(
+            {'uuid': {'$in': list(uuids)}}, {'_id': False, 'date_tx': True}
+        )
+        return [row.get('date_tx') for row in cursor]
+
     def _get_collections(self):
         """
         Liste alle collections der Datenbank.
@@ -0,0 +1,153 @@
+#!/usr/bin/python3 # pylint: disable=invalid-name
+"""Cache der eingelesenen Kontoumsätze hochgeladener Dateien auf dem Dateisystem."""
+
+import os
+import json
+import gzip
+import hashlib
+import logging
+import tempfile
+
+
+class ParseCache():
+    """
+    Speichert die Kontoumsätze, die ein Reader aus einer Datei gelesen hat, damit die
+    (bei PDFs teure) Extraktion der Tabellen beim erneuten Upload der gleichen Datei
+    übersprungen werden kann.
+
+    - Schlüssel ist der SHA-256 Hash des Dateiinhalts zusammen mit der Klasse und der
+      Version des Readers (siehe Reader.VERSION)
+    - Je Schlüssel eine Datei mit den Kontoumsätzen als komprimiertes JSON
+    - Überschreitet der Cache die maximale Größe, werden die am längsten nicht mehr
+      genutzten Dateien gelöscht (LRU anhand der Änderungszeit)
+    """
+
+    SUFFIX = '.json.gz'
+
+    def __init__(self, directory: str, max_size: int):
+        """
+        Initialisiert den Cache in einem Verzeichnis.
+
+        Args:
+            directory (str): Verzeichnis für die Dateien des Caches
+            max_size (int): Maximale Größe aller Dateien in Bytes
+        """
+        self.directory = directory
+        self.max_size = max_size
+
+        # Nur für den Benutzer der App lesbar (enthält Kontoumsätze)
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        if os.stat(directory).st_mode & 0o077:
+            logging.warning(f"Das Verzeichnis des ParseCache {directory} ist "
+                            "auch für andere Benutzer zugänglich")
+
+    def key(self, filepath: str, reader_class: type) -> str:
+        """
+        Ermittelt den Schlüssel einer Datei für einen Reader.
+
+        Args:
+            filepath (str): Pfad zur Datei
+            reader_class (type): Klasse des Readers
+        Returns:
+            str: Schlüssel (Hex-String)
+        """
+        digest = hashlib.sha256()
+        with open(filepath, 'rb') as f:
+            for block in iter(lambda: f.read(65536), b''):
+                digest.update(block)
+
+        reader = f"{reader_class.__module__}.{reader_class.__qualname__}"
+        version = getattr(reader_class, 'VERSION', 0)
+        digest.update(f"\0{reader}\0{version}".encode('utf-8'))
+        return digest.hexdigest()
+
+    def get(self, key: str):
+        """
+        Lädt die gespeicherten Kontoumsätze zu einem Schlüssel.
+
+        Args:
+            key (str): Schlüssel (siehe key)
+        Returns:
+            list(dict): Kontoumsätze oder None, wenn der Schlüssel nicht gespeichert ist
+        """
+        path = self._path(key)
+        try:
+            with gzip.open(path, 'rb') as f:
+                rows = json.loads(f.read())
+
+        except FileNotFoundError:
+            return None
+
+        except (OSError, ValueError) as ex:
+            logging.warning(f"Eintrag {key} im Parse-Cache ist nicht lesbar: {ex}")
+            self._remove(path)
+            return None
+
+        # Als zuletzt genutzt markieren
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+        return rows
+
+    def set(self, key: str, rows: list):
+        """
+        Speichert die Kontoumsätze zu einem Schlüssel (atomar) und löscht anschließend
+        die ältesten Einträge, bis die maximale Größe eingehalten wird.
+
+        Args:
+            key (str): Schlüssel (siehe key)
+            rows (list(dict)): Vom Reader gelesene Kontoumsätze
+        """
+        data = json.dumps(rows, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(gzip.compress(data))
+
+            os.replace(tmp_path, self._path(key))
+
+        except OSError as ex:
+            logging.warning(f"Eintrag {key} konnte nicht im Parse-Cache gespeichert werden: {ex}")
+            self._remove(tmp_path)
+            return
+
+        self._evict()
+
+    def _evict(self):
+        """Löscht die am längsten nicht genutzten Einträge, bis max_size eingehalten wird"""
+        entries = []
+        total = 0
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if not entry.name.endswith(self.SUFFIX):
+                    continue
+
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_size:
+                break
+
+            self._remove(path)
+            total -= size
+
+    def _path(self, key: str) -> str:
+        """Pfad der Datei zu einem Schlüssel"""
+        return os.path.join(self.directory, f"{key}{self.SUFFIX}")
+
+    @staticmethod
+    def _remove(path: str):
+        """Löscht eine Datei des Caches, falls vorhanden"""
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,594 @@
+#!/usr/bin/python3 # pylint: disable=invalid-name
+"""Regelwerk für die Auswertung von Tagging-, Kategorisierungs- und Parsingregeln im Arbeitsspeicher."""
+
+import re
+import logging
+
+try:
+    # Python >= 3.11
+    from re import _parser as sre_parse
+except ImportError:
+    import sre_parse
+
+
+class RuleEngine():
+    """
+    Kompiliert die Conditions mehrerer Regeln zu Prädikaten und wendet diese
+    in einem einzigen Durchlauf auf bereits geladene Transaktionen an.
+    Die Vergleiche folgen der Condition-Syntax der Datenbankhandler.
+    """
+
+    def __init__(self, rules: dict, prefilter: bool=True):
+        """
+        Kompiliert alle übergebenen Regeln in der angegebenen Reihenfolge.
+
+        Args:
+            rules (dict): Verzeichnis nach Namen der Regeln mit
+                - condition, list(dict): Bedingungen (siehe BaseDb.select)
+                - multi, str: ['AND' | 'OR'] Logische Verknüpfung der Bedingungen
+            prefilter (bool): Wenn True, werden nur die Regeln vollständig geprüft,
+                              deren Pflicht-Literale im Text vorkommen. Default: True
+        """
+        self.rules = {}
+        for r_name, rule in rules.items():
+            self.rules[r_name] = self.compile_query(
+                rule.get('condition'), rule.get('multi', 'AND')
+            )
+
+        # Literal-Vorfilter je Schlüssel und Regeln ohne Vorfilter
+        self.prefilters = {}
+        self.unfiltered = set(self.rules)
+        if prefilter:
+            self._build_prefilters(rules)
+
+    def run(self, rows: list, action) -> dict:
+        """
+        Prüft jede Transaktion nacheinander gegen alle Regeln. Änderungen einer Regel
+        werden sofort auf die Transaktion angewendet, sodass nachfolgende Regeln
+        den aktualisierten Stand sehen (wie bei einer Abfrage je Regel).
+
+        Args:
+            rows (list(dict)): Transaktionen (werden im Speicher aktualisiert)
+            action (callable): Wird je Treffer mit (rule_name, row) aufgerufen und gibt
+                               die zu setzenden Daten (dict) oder None zurück.
+        Returns:
+            dict:
+                - matched, dict: UUIDs der Treffer je Regel
+                - changed, dict: UUIDs der geänderten Transaktionen je Regel
+                - updates, dict: Zu speichernde Daten je UUID ({uuid: dict})
+        """
+        result = {
+            'matched': {r_name: [] for r_name in self.rules},
+            'changed': {r_name: [] for r_name in self.rules},
+            'updates': {},
+        }
+
+        for row in rows:
+
+            uuid = row.get('uuid')
+            if uuid is None:
+                raise ValueError(f'The following data in the DB has no UUID ! - {row}')
+
+            candidates = self.candidates(row)
+            for r_name, predicate in self.rules.items():
+                if r_name not in candidates or not predicate(row):
+                    continue
+
+                result['matched'][r_name].append(uuid)
+                new_data = action(r_name, row)
+                if not new_data:
+                    continue
+
+                # Apply changes in memory (merge list items)
+                for key, value in new_data.items():
+                    if isinstance(value, list) and isinstance(row.get(key), list):
+                        row[key] = row[key] + [v for v in value if v not in row[key]]
+                    else:
+                        row[key] = value
+
+                    result['updates'].setdefault(uuid, {})[key] = row[key]
+
+                result['changed'][r_name].append(uuid)
+
+                if any(path[0] in new_data for path in self.prefilters):
+                    # Prefiltered values changed
+                    candidates = self.candidates(row)
+
+        return result
+
+    def candidates(self, row: dict) -> set:
+        """
+        Ermittelt mit einem Durchlauf je vorgefiltertem Schlüssel,
+        welche Regeln auf eine Transaktion zutreffen können.
+
+        Args:
+            row (dict): Transaktion
+        Returns:
+            set: Namen der Regeln, die vollständig geprüft werden müssen
+        """
+        if not self.prefilters:
+            return self.unfiltered
+
+        candidates = set(self.unfiltered)
+        for path, prefilter in self.prefilters.items():
+            value = row
+            for part in path:
+                value = value.get(part) if isinstance(value, dict) else None
+
+            candidates |= prefilter.candidates(value)
+
+        return candidates
+
+    def _build_prefilters(self, rules: dict):
+        """
+        Ermittelt je Regel die Literale, von denen mindestens eines im Text
+        vorkommen muss, damit die Regel treffen kann, und erstellt daraus
+        einen gemeinsamen Vorfilter je Schlüssel.
+
+        Args:
+            rules (dict): Regeln (siehe __init__)
+        """
+        literals_by_path = {}
+        for r_name, rule in rules.items():
+            requirement = self._rule_literals(rule.get('condition'), rule.get('multi', 'AND'))
+            if requirement is None:
+                continue
+
+            path, literals = requirement
+            for literal in literals:
+                literals_by_path.setdefault(path, {}).setdefault(literal, set()).add(r_name)
+
+            self.unfiltered.discard(r_name)
+
+        self.prefilters = {
+            path: LiteralPrefilter(literals) for path, literals in literals_by_path.items()
+        }
+
+    def _rule_literals(self, condition: dict|list[dict], multi: str='AND'):
+        """
+        Ermittelt die Pflicht-Literale einer Regel.
+
+        Args:
+            condition (dict | list(dict)): Bedingung(en) der Regel
+            multi (str): ['AND' | 'OR'] Logische Verknüpfung der Bedingungen
+        Returns:
+            tuple(tuple, set) | None: Schlüsselpfad und Literale oder None,
+                                      wenn die Regel nicht vorgefiltert werden kann
+        """
+        if not condition:
+            return None
+
+        if not isinstance(condition, list):
+            condition = [condition]
+
+        requirements = [
+            self._condition_literals(c) for c in condition
+            if not (c.get('key') == 'prio' and len(condition) > 1)
+        ]
+        if not requirements:
+            return None
+
+        if multi.upper() == 'OR':
+            # Every condition has to be prefiltered on the same key
+            if None in requirements or len({r[0] for r in requirements}) != 1:
+                return None
+
+            return requirements[0][0], set().union(*[r[1] for r in requirements])
+
+        # One prefiltered condition is enough for AND
+        requirements = [r for r in requirements if r is not None]
+        if not requirements:
+            return None
+
+        return max(requirements, key=lambda r: literals_score(r[1]))
+
+    def _condition_literals(self, condition: dict):
+        """
+        Ermittelt die Pflicht-Literale einer einzelnen Condition.
+
+        Args:
+            condition (dict): Bedingung (siehe BaseDb.select)
+        Returns:
+            tuple(tuple, set) | None: Schlüsselpfad und Literale oder None
+        """
+        condition_method = condition.get('compare', '==')
+        condition_key = condition.get('key')
+        condition_val = condition.get('value')
+
+        literals = None
+        if condition_method == 'regex':
+            try:
+                literals = required_literals(sre_parse.parse(str(condition_val)))
+            except re.error:
+                return None
+
+        elif condition_method == 'like':
+            literals = {str(condition_val).casefold()}
+
+        # Too short literals would match nearly every text
+        if not literals or min(len(l) for l in literals) < 2:
+            return None
+
+        path = (condition_key,)
+        if isinstance(condition_key, dict):
+            path = tuple(next(iter(condition_key.items())))
+
+        return path, literals
+
+    def compile_query(self, condition: dict|list[dict], multi: str='AND'):
+        """
+        Erstellt aus einer oder mehreren Conditions ein Prädikat.
+        Eine Condition auf 'prio' wird immer mit AND verknüpft.
+
+        Args:
+            condition (dict | list(dict)): Bedingung(en) (siehe BaseDb.select)
+            multi (str): ['AND' | 'OR'] Logische Verknüpfung der Bedingungen
+        Returns:
+            callable: Prädikat, das für eine Transaktion True oder False liefert
+        """
+        if condition is None:
+            return lambda row: True
+
+        if not isinstance(condition, list):
+            condition = [condition]
+
+        prio_tests = []
+        tests = []
+        for c in condition:
+            if c.get('key') == 'prio' and len(condition) > 1:
+                # Special handle prio (always AND)
+                prio_tests.append(self.compile_condition(c))
+                continue
+
+            tests.append(self.compile_condition(c))
+
+        logical_concat = any if multi.upper() == 'OR' else all
+
+        def predicate(row):
+            if not all(t(row) for t in prio_tests):
+                return False
+
+            return logical_concat(t(row) for t in tests)
+
+        return predicate
+
+    def compile_condition(self, condition: dict):
+        """
+        Erstellt aus einem Condition-Dict ein Prädikat.
+
+        Args:
+            condition (dict): Bedingung (siehe BaseDb.select)
+        Returns:
+            callable: Prädikat, das für eine Transaktion True oder False liefert
+        """
+        condition_method = condition.get('compare', '==')
+        condition_key = condition.get('key')
+        condition_val = condition.get('value')
+
+        # Nested or Plain Key
+        path = [condition_key]
+        if isinstance(condition_key, dict):
+            path = list(next(iter(condition_key.items())))
+
+        test = self._form_test(condition_method, condition_val)
+
+        def predicate(row):
+            value = row
+            for part in path:
+                if not isinstance(value, dict) or part not in value:
+                    return False
+                value = value[part]
+
+            try:
+                return test(value)
+            except TypeError:
+                return False
+
+        return predicate
+
+    def _form_test(self, condition_method: str, condition_val):
+        """
+        Erstellt die Vergleichsfunktion für einen Wert aus der Transaktion.
+
+        Args:
+            condition_method (str): Vergleichsoperator der Condition
+            condition_val (any): Vergleichswert der Condition
+        Returns:
+            callable: Vergleichsfunktion
+        """
+        # RegEx Suche
+        if condition_method == 'regex':
+            regex = re.compile(str(condition_val))
+            return lambda value: isinstance(value, str) and regex.search(value) is not None
+
+        # Like Suche
+        if condition_method == 'like':
+            search = str(condition_val).lower()
+            return lambda value: isinstance(value, str) and search in value.lower()
+
+        # List Queries
+        if condition_method == 'in':
+            return lambda value: any(item in condition_val for item in value)
+        if condition_method == 'notin':
+            return lambda value: not any(item in condition_val for item in value)
+        if condition_method == 'all':
+            return lambda value: all(item in value for item in condition_val)
+        if condition_method == 'exact':
+            return lambda value: set(value) == set(condition_val)
+
+        # Standard Query
+        try:
+            # Transfer to a number for comparison
+            condition_val = float(condition_val)
+        except (TypeError, ValueError):
+            pass
+
+        tests = {
+            '==': lambda value: value == condition_val,
+            '!=': lambda value: value != condition_val,
+            '>=': lambda value: value >= condition_val,
+            '<=': lambda value: value <= condition_val,
+            '>': lambda value: value > condition_val,
+            '<': lambda value: value < condition_val,
+        }
+        if condition_method not in tests:
+            logging.warning(f"Unbekannter Vergleich '{condition_method}' trifft nichts")
+            return lambda value: False
+
+        return tests[condition_method]
+
+
+class LiteralPrefilter():
+    """
+    Findet mit einem einzigen Scan alle Literale mehrerer Regeln in einem Text.
+    """
+
+    def __init__(self, literals: dict):
+        """
+        Erstellt aus allen Literalen eine kombinierte Alternation.
+
+        Args:
+            literals (dict): Regeln je Literal ({literal: set(rule_names)})
+        """
+        self.literals = literals
+
+        # Longest literals first (leftmost-longest match per position)
+        ordered = sorted(literals, key=len, reverse=True)
+        self.scanner = re.compile('|'.join(re.escape(literal) for literal in ordered))
+
+        # A found literal implies all literals it contains
+        self.lookup = {}
+
+        # Literals starting within a found literal and ending behind it
+        # are not found by the non-overlapping scan and checked separately
+        self.overlaps = {}
+
+        for literal in ordered:
+            self.lookup[literal] = set().union(*[
+                r_names for other, r_names in literals.items() if other in literal
+            ])
+            self.overlaps[literal] = [
+                other for other in ordered
+                if other not in literal and any(
+                    other.startswith(literal[i:]) for i in range(1, len(literal))
+                )
+            ]
+
+    def candidates(self, text) -> set:
+        """
+        Liefert die Regeln, deren Literale im Text vorkommen.
+
+        Args:
+            text (str): Zu durchsuchender Text
+        Returns:
+            set: Namen der Regeln
+        """
+        if not isinstance(text, str):
+            return set()
+
+        text = text.casefold()
+        found = set(self.scanner.findall(text))
+        candidates = set().union(*[self.lookup[literal] for literal in found])
+
+        for literal in found:
+            for other in self.overlaps[literal]:
+                if other in text:
+                    candidates |= self.literals[other]
+
+        return candidates
+
+
+class ParserEngine():
+    """
+    Wendet alle Parser (benannte RegExes mit genau einer Gruppe) auf Transaktionen an.
+    Vor einem RegEx wird geprüft, ob eines seiner Pflicht-Literale (z.B. 'SAGT DANKE')
+    im Text vorkommt. Ist das nicht der Fall, kann der Parser nicht treffen und die
+    Suche entfällt.
+
+    Beginnt ein RegEx mit einem Literal (z.B. 'MREF:' oder 'EREF:'), sucht re selbst
+    schon schnell danach, sodass die Prüfung nur zusätzlich kosten würde. Diese Parser
+    werden wie Parser ohne Literale immer angewendet. Eine gemeinsame Alternation aller
+    Parser wäre dagegen langsamer (Lookaheads verhindern die Optimierungen der
+    einzelnen RegExes) und liefert je Position nur einen Treffer.
+    """
+
+    def __init__(self, parsers: dict, prefilter: bool=True):
+        """
+        Ermittelt die Pflicht-Literale aller Parser.
+
+        Args:
+            parsers (dict): Kompilierte RegExes nach Namen der Parser
+            prefilter (bool): Wenn True, werden Parser nur angewendet, wenn ihre
+                              Pflicht-Literale im Text vorkommen. Default: True
+        """
+        self.parsers = dict(parsers)
+
+        # Literals per parser (None: parser is always applied)
+        self.literals = {
+            name: self._parser_literals(regex) if prefilter else None
+            for name, regex in self.parsers.items()
+        }
+        self.unfiltered = {name for name, literals in self.literals.items() if literals is None}
+
+        # (name, search, literals, casefold) in parser order
+        self._checks = [
+            (name, regex.search, self.literals[name], bool(regex.flags & re.IGNORECASE))
+            for name, regex in self.parsers.items()
+        ]
+
+    @staticmethod
+    def _parser_literals(regex):
+        """
+        Pflicht-Literale eines Parsers (exakt oder casefolded bei IGNORECASE).
+
+        Args:
+            regex (re.Pattern): Kompilierter RegEx des Parsers
+        Returns:
+            tuple | None: Literale oder None, wenn sich keine lohnenden finden
+        """
+        casefold = bool(regex.flags & re.IGNORECASE)
+        try:
+            parsed = sre_parse.parse(regex.pattern, regex.flags)
+        except (re.error, TypeError):
+            return None
+
+        # re already searches for a literal prefix by itself
+        if not casefold and len(parsed) and parsed[0][0].name == 'LITERAL':
+            return None
+
+        literals = required_literals(parsed, casefold)
+
+        # Too short literals would match nearly every text
+        if not literals or min(len(l) for l in literals) < 2:
+            return None
+
+        return tuple(sorted(literals, key=len))
+
+    def search(self, text: str) -> dict:
+        """
+        Wendet alle Parser auf einen Text an.
+
+        Args:
+            text (str): Buchungstext
+        Returns:
+            dict: Treffer (erste Gruppe, ohne Leerzeichen am Rand) nach Namen der Parser
+        """
+        result = {}
+        folded = None
+        for name, regex_search, literals, casefold in self._checks:
+            if literals is not None:
+                if casefold:
+                    if folded is None:
+                        folded = text.casefold()
+                    haystack = folded
+                else:
+                    haystack = text
+
+                for literal in literals:
+                    if literal in haystack:
+                        break
+                else:
+                    continue
+
+            re_match = regex_search(text)
+            if re_match:
+                result[name] = re_match.group(1).strip()
+
+        return result
+
+    def parse(self, rows: list) -> list:
+        """
+        Ergänzt die Treffer aller Parser unter 'parsed' jeder Transaktion.
+
+        Args:
+            rows (list(dict)): Transaktionen mit 'text_tx' und 'parsed'
+        Returns:
+            list(dict): Die aktualisierten Transaktionen
+        """
+        for row in rows:
+            found = self.search(row['text_tx'])
+            if found:
+                row['parsed'].update(found)
+
+        return rows
+
+    def search_many(self, texts: list) -> list:
+        """
+        Wendet alle Parser auf mehrere Texte an (Aufgabe eines Prozesses in Tagger.parse_batch).
+
+        Args:
+            texts (list(str)): Buchungstexte
+        Returns:
+            list(dict): Treffer je Text (siehe search)
+        """
+        return [self.search(text) for text in texts]
+
+
+def required_literals(parsed, casefold: bool=True) -> set:
+    """
+    Durchläuft einen geparsten RegEx und sucht eine Menge von Literalen,
+    von denen jeder Treffer des RegEx mindestens eines enthalten muss.
+
+    Args:
+        parsed (list): Geparster RegEx (sre_parse)
+        casefold (bool): Literale für einen Vergleich ohne Groß-/Kleinschreibung
+                         liefern. Bei False müssen die Literale exakt im Text
+                         vorkommen (nur für RegExes ohne IGNORECASE). Default: True
+    Returns:
+        set | None: Literale oder None, wenn es keine gibt
+    """
+    best = None
+    run = []
+
+    def consider(literals):
+        nonlocal best
+        if not literals:
+            return
+        if best is None or literals_score(literals) > literals_score(best):
+            best = literals
+
+    def flush():
+        if run:
+            consider({''.join(run)})
+            run.clear()
+
+    for op, av in parsed:
+        op_name = op.name
+
+        if op_name == 'LITERAL':
+            run.append(chr(av).casefold() if casefold else chr(av))
+            continue
+
+        if op_name == 'IN':
+            # Character sets like [Aa] are literals, too
+            chars = {chr(a).casefold() if casefold else chr(a)
+                     for o, a in av if o.name == 'LITERAL'}
+            if len(chars) == 1 and all(o.name == 'LITERAL' for o, a in av):
+                run.append(chars.pop())
+                continue
+
+        flush()
+
+        if op_name == 'SUBPATTERN':
+            # Scoped (?i:...) groups can not be checked with exact literals
+            if casefold or not av[1] & re.IGNORECASE:
+                consider(required_literals(av[-1], casefold))
+
+        elif op_name == 'ATOMIC_GROUP':
+            consider(required_literals(av, casefold))
+
+        elif op_name == 'BRANCH':
+            branches = [required_literals(b, casefold) for b in av[1]]
+            if all(branches):
+                consider(set().union(*branches))
+
+        elif op_name in ('MAX_REPEAT', 'MIN_REPEAT', 'POSSESSIVE_REPEAT') and av[0] >= 1:
+            consider(required_literals(av[2], casefold))
+
+    flush()
+    return best
+
+
+def literals_score(literals: set) -> tuple:
+    """Bewertet Literale: Längere und weniger Alternativen filtern besser"""
+    return (min(len(l) for l in literals), -len(literals))
@@ -2,9 +2,17 @@
 """Ausgelagerter Handler für die Umsatzuntersuchung."""
 
 import copy
+import hashlib
+import os
+import json
 import random
 import re
 import logging
+import itertools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from handler.Rules import RuleEngine, ParserEngine
 
 
 class Tagger():
@@ -13,6 +21,12 @@ class Tagger():
     def __init__(self, db_handler):
         self.db_handler = db_handler
 
+        # Cache für kompilierte Parser und Regeln (je Version der Metadaten)
+        self._cache = {}
+        self._cache_version = None
+        self.cache_hits = 0
+        self.cache_misses = 0
+
     def parse(self, input_data, parsers=None) -> list:
         """
         Untersucht die Daten eines Standard-Objekts (hauptsächlich den Text)
@@ -22,28 +36,60 @@ class Tagger():
         Args:
             input_data, list(dict): Liste mit Transaktionen,
                                     auf die das Parsing angewendet werden soll.
-            parsers, dict: Optionales Dict mit Parsern (Key: Bezeichner, Value: RegEx Pattern).
+            parsers, dict | ParserEngine: Optionales Dict mit Parsern
+                                          (Key: Bezeichner, Value: RegEx Pattern)
+                                          oder eine bereits erstellte ParserEngine.
 
         Returns:
             list(dict): Updated input_data
         """
-        # RegExes
-        # Der Key wird als Bezeichner für das Ergebnis verwendet.
-        # Jeder RegEx muss genau eine Gruppe matchen.
-        if parsers is None:
-            parsers = self._load_parsers()
+        return self._parser_engine(parsers).parse(input_data)
 
-        for d in input_data:
-            for name, regex in parsers.items():
-                re_match = regex.search(d['text_tx'])
-                if re_match:
-                    d['parsed'][name] = re_match.group(1).strip()
+    def parse_batch(self, input_data, parsers=None, workers: int=None,
+                    chunk_size: int=2000) -> list:
+        """
+        Wie parse, verteilt große Listen aber blockweise auf mehrere Prozesse.
+        Kleine Listen (weniger als zwei Blöcke) oder ein einzelner Worker
+        werden ohne Prozess-Pool bearbeitet.
+
+        Args:
+            input_data, list(dict): Liste mit Transaktionen,
+                                    auf die das Parsing angewendet werden soll.
+            parsers, dict | ParserEngine: Optionale Parser (siehe parse).
+            workers, int: Anzahl der Prozesse. Default: Anzahl der CPUs
+            chunk_size, int: Anzahl der Transaktionen je Block. Default: 2000
+
+        Returns:
+            list(dict): Updated input_data
+        """
+        engine = self._parser_engine(parsers)
+        if workers is None:
+            workers = os.cpu_count() or 1
+
+        chunk_count = -(-len(input_data) // chunk_size)
+        if workers < 2 or chunk_count < 2:
+            return engine.parse(input_data)
+
+        # Only the texts are sent to the processes, results are merged here
+        texts = [d['text_tx'] for d in input_data]
+        chunks = [texts[i:i+chunk_size] for i in range(0, len(texts), chunk_size)]
+        # Forked processes would inherit locks held by other threads (e.g. jobs)
+        spawn = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=min(workers, chunk_count),
+                                 mp_context=spawn) as executor:
+            results = itertools.chain.from_iterable(
+                executor.map(engine.search_many, chunks)
+            )
+            for d, found in zip(input_data, results):
+                if found:
+                    d['parsed'].update(found)
 
         return input_data
 
     def _cat_generator(self, iban: str, rule_name: str = None,
                               prio: int = None, prio_set: int = None,
-                              dry_run: bool = False) -> dict:
+                              dry_run: bool = False, incremental: bool = False,
+                              rows: list = None) -> dict:
         """Generator that yields partial results per rule and finally the overall result.
 
         Yields partial dicts for each rule (and per-row partials where appropriate)
@@ -73,23 +119,21 @@ class Tagger():
             prio_set = cat_rules[rule_name].get('prioriry')
             prio = prio if prio is not None else 99
 
+        compiled_rules = {}
+        new_categories = {}
         for r_name, rule in cat_rules.items():
-            logging.info(f"Kategorisierung mit Rule {r_name}...")
-
-            # Partial Result for this rule (for streaming)
-            partial_result = {'rule': r_name, 'categorized': 0, 'entries': [], 'matched': 0}
 
             if rule.get('category') is None:
                 logging.warning(f"Rule '{r_name}' hat keine Kategorie - skipping...")
                 continue
 
             # Updated Category Object
-            new_categories = {'category': rule.get('category')}
+            new_categories[r_name] = {'category': rule.get('category')}
 
             if prio_set is not None:
-                new_categories['prio'] = prio_set
+                new_categories[r_name]['prio'] = prio_set
             else:
-                new_categories['prio'] = rule.get('prio', 1)
+                new_categories[r_name]['prio'] = rule.get('prio', 1)
 
             # Allgemeiner Startfilter und spezielle Conditions einer Rule
             if prio is not None:
@@ -100,31 +144,31 @@ class Tagger():
                 # use rule prio or default
                 query_args = self._form_tag_query(iban, rule.get('prio', 1))
 
-            # -- Add all Filters
-            for f in rule.get('filter', []):
-                f['compare'] = f.get('compare', '==')
-                query_args['condition'].append(f)
+            compiled_rules[r_name] = self._form_rule_query(rule, query_args)
 
-            # -- Add Parsed Values
-            if rule.get('parsed') is not None:
+        # Load all candidates once and apply every rule in one pass
+        def set_category(r_name, row): # pylint: disable=unused-argument
+            if dry_run:
+                return None
 
-                for key, val in rule.get('parsed').items():
-                    query_args['condition'].append({
-                        'key': {'parsed': key},
-                        'value': val,
-                        'compare': '=='
-                    })
+            return new_categories[r_name]
 
-            # Multi AND/OR for all conditions
-            multi = rule.get('multi', 'AND')
+        # Only a run with the complete ruleset marks the transactions as categorized
+        stamp = None
+        if rule_name is None and prio is None:
+            stamp = ('cat_version', self._ruleset_version('category', cat_rules))
 
-            # Dry Run first (store results)
-            logging.debug(f"Query Args: {query_args.get('condition')}")
-            matched = self.db_handler.select(
-                collection=query_args.get('collection'),
-                condition=query_args.get('condition'),
-                multi=multi
-            )
+        engine_result = self._run_rules(iban, compiled_rules, set_category,
+                                        cache_key=('engine', 'category', rule_name, prio),
+                                        stamp=stamp, incremental=incremental,
+                                        dry_run=dry_run, rows=rows)
+
+        for r_name in compiled_rules:
+            logging.info(f"Kategorisierung mit Rule {r_name}...")
+
+            # Partial Result for this rule (for streaming)
+            partial_result = {'rule': r_name, 'categorized': 0, 'entries': [], 'matched': 0}
+            matched = engine_result['matched'][r_name]
 
             # Nothing to update
             if not matched:
@@ -134,34 +178,16 @@ class Tagger():
             logging.info(f"Rule '{r_name}' trifft {len(matched)} transactions.")
             partial_result['matched'] = len(matched)
 
-            # Create updated Data and get UUIDs
-            for row in matched:
+            for uuid in matched:
 
                 # yield partial result for this rule (streaming)
                 yield partial_result
 
-                # UUIDs
-                uuid = row.get('uuid')
-                if uuid is None:
-                    raise ValueError(f'The following data in the DB has no UUID ! - {row}')
-
                 result['entries'].append(uuid)
                 partial_result['entries'].append(uuid)
 
-                # Update Request / Dry run
-                if dry_run:
-                    continue
-
-                query = {'key': 'uuid', 'value': uuid}
-                updated = self.db_handler.update(new_categories, iban, query)
-
-                # soft Exception Handling
-                if not updated:
-                    logging.error((f"Bei Rule '{r_name}' konnte der Eintrag "
-                                    f"'{uuid}' nicht geupdated werden - skipping..."))
-                    continue
-
-                updated = updated.get('updated')
+            if engine_result['written']:
+                updated = len(engine_result['changed'][r_name])
                 result['categorized'] += updated
                 partial_result['categorized'] += updated
 
@@ -172,7 +198,8 @@ class Tagger():
         result['entries'] = list(set(result['entries']))
         yield result
 
-    def _tag_generator(self, iban: str, rule_name: str=None, dry_run: bool=False):
+    def _tag_generator(self, iban: str, rule_name: str=None, dry_run: bool=False,
+                       incremental: bool=False, rows: list=None):
         """Generator that yields partial results per rule and finally the overall result.
 
         Yields partial dicts for each rule (and per-row partials where appropriate)
@@ -197,40 +224,45 @@ class Tagger():
         # Allgemeine Startfilter für die Condition (ignore Prio bei Tagging)
         query_args = self._form_tag_query(iban, 99)
 
+        # Spezielle Conditions je Rule
+        compiled_rules = {}
         for r_name, rule in tagging_rules.items():
-            logging.info(f"Tagging mit Rule {r_name}...")
+            compiled_rules[r_name] = self._form_rule_query(rule, query_args)
 
-            # Partial Result for this rule (for streaming)
-            partial_result = {'rule': r_name, 'tagged': 0, 'entries': [], 'matched': 0}
+        # Load all candidates once and apply every rule in one pass
+        def set_tags(r_name, row):
+            if dry_run:
+                return None
 
-            # Spezielle Conditions einer Rule
-            rule_args = copy.deepcopy(query_args)
+            # Do not duplicate Tags
+            existing_tags = row.get('tags', [])
+            new_tags = tagging_rules[r_name].get('tags', [])
+            tags_to_set = [t for t in new_tags if t not in existing_tags]
 
-            # -- Add all Filters
-            for f in rule.get('filter', []):
-                f['compare'] = f.get('compare', '==')
-                rule_args['condition'].append(f)
+            if not tags_to_set:
+                logging.info((f"Rule '{r_name}' hat keine neuen Tags "
+                                f"für {row.get('uuid')} - skipping (tag only)..."))
+                return None
 
-            # -- Add Parsed Values
-            if rule.get('parsed') is not None:
+            # New tags may change the categorization
+            return {'tags': tags_to_set, 'cat_version': None}
 
-                for key, val in rule.get('parsed').items():
-                    rule_args['condition'].append({
-                        'key': {'parsed': key},
-                        'value': val,
-                        'compare': '=='
-                    })
+        # Only a run with the complete ruleset marks the transactions as tagged
+        stamp = None
+        if rule_name is None:
+            stamp = ('tag_version', self._ruleset_version('rule', tagging_rules))
 
-            # Multi AND/OR for all conditions
-            multi = rule.get('multi', 'AND')
+        engine_result = self._run_rules(iban, compiled_rules, set_tags,
+                                        cache_key=('engine', 'rule', rule_name),
+                                        stamp=stamp, incremental=incremental,
+                                        dry_run=dry_run, rows=rows)
 
-            # Dry Run first (store results)
-            logging.debug(f"Query Args: {rule_args.get('condition')}")
-            matched = self.db_handler.select(
-                collection=rule_args.get('collection'),
-                condition=rule_args.get('condition'),
-                multi=multi
-            )
+        for r_name in tagging_rules:
+            logging.info(f"Tagging mit Rule {r_name}...")
+
+            # Partial Result for this rule (for streaming)
+            partial_result = {'rule': r_name, 'tagged': 0, 'entries': [], 'matched': 0}
+            matched = engine_result['matched'][r_name]
 
             # Nothing to update
             if not matched:
@@ -242,47 +274,16 @@ class Tagger():
             logging.info(f"Rule '{r_name}' trifft {len(matched)} transactions.")
             partial_result['matched'] = len(matched)
 
-            # Tags to set when matched
-            new_tags = rule.get('tags', [])
-
-            # Create updated Data and get UUIDs
-            for row in matched:
+            for uuid in matched:
 
                 # yield partial result for this rule (streaming)
                 yield partial_result
 
-                # UUIDs
-                uuid = row.get('uuid')
-                if uuid is None:
-                    raise ValueError(f'The following data in the DB has no UUID ! - {row}')
-
                 result['entries'].append(uuid)
                 partial_result['entries'].append(uuid)
 
-                # Update Request / Dry run
-                if dry_run:
-                    continue
-
-                # Do not duplicate Tags
-                existing_tags = row.get('tags', [])
-                tags_to_set = [t for t in new_tags if t not in existing_tags]
-
-                if not tags_to_set:
-                    # Skip this loop
-                    logging.info((f"Rule '{r_name}' hat keine neuen Tags "
-                                    f"für {uuid} - skipping (tag only)..."))
-                    continue
-
-                query = {'key': 'uuid', 'value': uuid}
-                updated = self.db_handler.update({'tags': tags_to_set}, iban, query)
-
-                # soft Exception Handling
-                if not updated:
-                    logging.error((f"Bei Rule '{r_name}' konnte der Eintrag "
-                                    f"'{uuid}' nicht geupdated werden - skipping..."))
-                    continue
-
-                updated = updated.get('updated')
+            if engine_result['written']:
+                updated = len(engine_result['changed'][r_name])
                 result['tagged'] += updated
                 partial_result['tagged'] += updated
 
@@ -293,8 +294,134 @@ class Tagger():
         result['entries'] = list(set(result['entries']))
         yield result
 
+    def _form_rule_query(self, rule: dict, query_args: dict) -> dict:
+        """
+        Ergänzt die Standardabfrage-Filter um die speziellen Conditions einer Regel.
+
+        Args:
+            rule, dict: Regel mit 'filter', 'parsed' und 'multi'
+            query_args, dict: Standardabfrage-Filter (siehe _form_tag_query)
+        Return:
+            dict: Conditions und logische Verknüpfung der Regel
+        """
+        condition = copy.deepcopy(query_args.get('condition'))
+
+        # -- Add all Filters
+        for f in rule.get('filter', []):
+            f['compare'] = f.get('compare', '==')
+            condition.append(f)
+
+        # -- Add Parsed Values
+        if rule.get('parsed') is not None:
+
+            for key, val in rule.get('parsed').items():
+                condition.append({
+                    'key': {'parsed': key},
+                    'value': val,
+                    'compare': '=='
+                })
+
+        # Multi AND/OR for all conditions
+        return {'condition': condition, 'multi': rule.get('multi', 'AND')}
+
+    def _run_rules(self, iban: str, rules: dict, action, cache_key: tuple=None,
+                   stamp: tuple=None, incremental: bool=False, dry_run: bool=False,
+                   rows: list=None) -> dict:
+        """
+        Lädt alle Kandidaten einer IBAN einmalig, wendet die Regeln in einem Durchlauf
+        im Arbeitsspeicher an und speichert alle Änderungen mit einem Schreibvorgang.
+
+        Args:
+            iban, str: IBAN oder Gruppenname
+            rules, dict: Conditions je Regel (siehe _form_rule_query)
+            action, callable: Liefert die zu setzenden Daten je Treffer (siehe RuleEngine.run)
+            cache_key, tuple: Schlüssel, unter dem die kompilierten Regeln gecached werden.
+                              Default: Kein Caching
+            stamp, tuple: Schlüssel und Version des Regelwerks, mit der neue und geänderte
+                          Transaktionen sowie die IBAN markiert werden.
+                          Default: Keine Markierung
+            incremental, bool: Nur Transaktionen prüfen, die noch nicht mit der
+                               Version aus 'stamp' markiert sind. Default: False
+            dry_run, bool: Keine Markierungen speichern. Default: False
+            rows, list(dict): Transaktionen, die nur im Arbeitsspeicher aktualisiert
+                              werden sollen. Default: Kandidaten aus der Datenbank laden
+        Return:
+            dict: Ergebnis von RuleEngine.run und
+                - written, bool: Änderungen wurden gespeichert
+        """
+        if not rules:
+            return {'matched': {}, 'changed': {}, 'updates': {}, 'written': False}
+
+        in_memory = rows is not None
+        if not in_memory:
+            # Startfilter: Die am wenigsten einschränkende Prio aller Regeln
+            prio = max(
+                c.get('value') for r in rules.values()
+                for c in r.get('condition') if c.get('key') == 'prio'
+            )
+            query_args = self._form_tag_query(iban, prio)
+            rows = self.db_handler.select(
+                collection=query_args.get('collection'),
+                condition=query_args.get('condition'),
+                multi=query_args.get('multi')
+            )
+
+        # All stored transactions were checked with this ruleset before
+        complete = False
+        if stamp is not None and not in_memory:
+            stamp_key, version = stamp
+            complete = self.db_handler.ruleset_version(iban, stamp_key) == version
+
+        if incremental and stamp is not None:
+            # Skip transactions already checked with this ruleset
+            stamp_key, version = stamp
+            if complete:
+                rows = [r for r in rows if r.get(stamp_key) is None]
+            else:
+                rows = [r for r in rows if r.get(stamp_key) != version]
+            logging.info(f"Inkrementeller Lauf prüft {len(rows)} Transaktionen")
+
+        if cache_key is None:
+            engine = RuleEngine(rules)
+        else:
+            engine = self._cached(cache_key, lambda: RuleEngine(rules))
+
+        engine_result = engine.run(rows, action)
+        engine_result['written'] = False
+
+        if stamp is not None and not dry_run:
+            # Mark new and changed transactions only, the version of the
+            # complete check is stored once per IBAN (see ruleset_version)
+            stamp_key, version = stamp
+            for row in rows:
+                uuid = row.get('uuid')
+                if in_memory or row.get(stamp_key) is None or uuid in engine_result['updates']:
+                    row[stamp_key] = version
+                    engine_result['updates'].setdefault(uuid, {})[stamp_key] = version
+
+        if in_memory:
+            # Changes are already applied to the given rows
+            engine_result['written'] = not dry_run
+            return engine_result
+
+        if engine_result['updates']:
+            updated = self.db_handler.update_many_by_uuid(engine_result['updates'], iban)
+
+            # soft Exception Handling
+            if not updated:
+                logging.error("Die Einträge konnten nicht geupdated werden - skipping...")
+                return engine_result
+
+            engine_result['written'] = True
+
+        if stamp is not None and not dry_run and not complete:
+            self.db_handler.set_ruleset_version(iban, *stamp)
+
+        return engine_result
+
     def categorize(self, iban: str, rule_name: str = None, prio: int = None,
-                   prio_set: int = None, dry_run: bool = False, streaming: bool = False) -> dict:
+                   prio_set: int = None, dry_run: bool = False, streaming: bool = False,
+                   incremental: bool = False) -> dict:
         """
         Kategorisiert die Kontoumsätze anhand von hinterlegten Regeln je Kategorie.
 
@@ -306,6 +433,9 @@ class Tagger():
                             in comparison with already cat. transactions (higher = important)
             prio_set:       Override: Compare with 'prio' but set this value instead.
             dry_run:        Switch to show, which TX would be updated. Do not update.
+            incremental:    Only check transactions that were not categorized with the
+                            current ruleset yet (new or changed transactions).
+                            Ignored when a single rule or prio is given.
         Returns:
             dict (final result):
                 - categorized (int): Summe aller erfolgreichen Kategorisierungen (0 bei dry_run)
@@ -317,7 +447,7 @@ class Tagger():
         """
         gen = self._cat_generator(iban, rule_name=rule_name,
                                   prio=prio, prio_set=prio_set,
-                                  dry_run=dry_run)
+                                  dry_run=dry_run, incremental=incremental)
         if streaming:
             return gen
 
@@ -328,7 +458,7 @@ class Tagger():
         return last
 
     def tag(self, iban: str, rule_name: str=None, dry_run: bool=False,
-            streaming: bool=False) -> dict:
+            streaming: bool=False, incremental: bool=False) -> dict:
         """
         Tagged Transaktionen anhand von Regeln in der Datenbank.
         Gibt bei `streming` einen Generator zurück mit teilweisen Ergebnissen pro Regel.
@@ -339,6 +469,9 @@ class Tagger():
             rule_name:      Name of a rule to apply on users transactions.
                             Default: All rules are applied
             dry_run:        Switch to show, which TX would be updated. Do not update.
+            incremental:    Only check transactions that were not tagged with the
+                            current ruleset yet (new or changed transactions).
+                            Ignored when a single rule is given.
 
         Returns:
             dict (partial resutl):
@@ -356,7 +489,8 @@ class Tagger():
         `_tag_generator`. Otherwise the generator is consumed and the final
         yielded result is returned as a normal `dict`.
         """
-        gen = self._tag_generator(iban, rule_name=rule_name, dry_run=dry_run)
+        gen = self._tag_generator(iban, rule_name=rule_name, dry_run=dry_run,
+                                  incremental=incremental)
         if streaming:
             return gen
 
@@ -394,27 +528,21 @@ class Tagger():
             count += c
             entries.append(entry)
 
-        # Update Request
+        # Update Request (all entries at once)
         if count and not dry_run:
 
-            for entry in entries:
-
-                uuid = entry.get('uuid')
-                query = {'key': 'uuid', 'value': uuid}
-
-                # Updated Category
-                new_category = {
-                    'guess': entry.get('guess')
-                }
-                updated = self.db_handler.update(new_category, iban, query)
-                updated = updated.get('updated')
+            updates = {
+                entry.get('uuid'): {'guess': entry.get('guess')}
+                for entry in entries
+            }
+            updated = self.db_handler.update_many_by_uuid(updates, iban)
+            updated = updated.get('updated')
 
-                # soft Exception Handling
-                if not updated:
-                    logging.error(("Beim AI Tagging konnte der Eintrag "
-                                   f"'{uuid}' nicht geupdated werden - skipping..."))
-                    continue
+            # soft Exception Handling
+            if not updated:
+                logging.error("Beim AI Tagging konnten die Einträge nicht geupdated werden")
 
+            else:
                 tagged += updated
 
         result = {
@@ -426,9 +554,11 @@ class Tagger():
         return result
 
     def tag_and_cat(self, iban: str, rule_name: str = None, category_name: str = None,
-                    dry_run: bool = False) -> dict:
+                    dry_run: bool = False, incremental: bool = False,
+                    streaming: bool = False) -> dict:
         """
         Tagged und kategorisiert die Kontoumsätze, indem Unterfunktionen aufgerufen werden.
+        Gibt bei `streaming` einen Generator zurück mit teilweisen Ergebnissen pro Regel.
 
         Args:
             iban            Name der Collection
@@ -440,32 +570,106 @@ class Tagger():
                             Default: Es werden alle Regeln des Benutzers angewendet.
             dry_run:        Switch to show, which TX would be updated. Do not update.
                             Default: False
+            incremental:    Only check new or changed transactions, unless the
+                            rulesets changed since the last run. Default: False
         Returns dict:
             - tagged (int): Summe aller erfolgreichen Taggings (0 bei dry_run)
             - categorized (int): Summe aller erfolgreichen Kategorisierungen (0 bei dry_run)
             - entries (list): Betroffene UUIDs dieser Operation (auch bei dry_run)
+
+        If `streaming` is True the caller receives the generator returned by
+        `_tag_and_cat_generator`. Otherwise the generator is consumed and the final
+        yielded result is returned as a normal `dict`.
+        """
+        gen = self._tag_and_cat_generator(iban, rule_name=rule_name,
+                                          category_name=category_name,
+                                          dry_run=dry_run, incremental=incremental)
+        if streaming:
+            return gen
+
+        last = None
+        for item in gen:
+            last = item
+
+        return last
+
+    def _tag_and_cat_generator(self, iban: str, rule_name: str = None,
+                               category_name: str = None, dry_run: bool = False,
+                               incremental: bool = False):
+        """Generator that yields the partial results of tagging and categorization
+        per rule (marked with 'step': 'tag' | 'cat') and finally the overall result.
         """
         result = { 'tagged': 0, 'categorized': 0, 'entries': [] }
 
         # Tagging Rules (specific rule or all - but not ai)
+        tagging_result = None
         if rule_name != 'ai':
             # Start Tagging (loop until none found)
-            tagging_result = self.tag(iban, rule_name, dry_run=dry_run)
+            for tagging_result in self._tag_generator(iban, rule_name=rule_name,
+                                                      dry_run=dry_run,
+                                                      incremental=incremental):
+                yield {'step': 'tag', **tagging_result}
 
         else:
             # AI only
             tagging_result = self.tag_ai(iban, dry_run=dry_run)
+            yield {'step': 'tag', **tagging_result}
 
         # Store tagging results
-        result['tagged'] = tagging_result['tagged']
-        result['entries'] = tagging_result['entries']
+        if tagging_result is not None:
+            result['tagged'] = tagging_result['tagged']
+            result['entries'] = list(tagging_result['entries'])
 
         # Kategorisierung wird einmal und nicht rekursiv durchgeführt
-        categorization_results = self.categorize(iban, category_name, dry_run=dry_run)
+        categorization_results = None
+        for categorization_results in self._cat_generator(iban, rule_name=category_name,
+                                                          dry_run=dry_run,
+                                                          incremental=incremental):
+            yield {'step': 'cat', **categorization_results}
 
         # Store categorization results
-        result['categorized'] = categorization_results['categorized']
-        result['entries'] += categorization_results['entries']
+        if categorization_results is not None:
+            result['categorized'] = categorization_results['categorized']
+            result['entries'] += categorization_results['entries']
+
+        yield result
+
+    def tag_and_cat_rows(self, rows: list) -> dict:
+        """
+        Tagged und kategorisiert Transaktionen, die noch nicht in der Datenbank
+        gespeichert sind (z.B. beim Import), mit allen Regeln im Arbeitsspeicher.
+        Die Transaktionen werden direkt aktualisiert und als geprüft markiert.
+
+        Args:
+            rows, list(dict): Geparste Transaktionen
+        Returns dict:
+            - tagged (int): Summe aller erfolgreichen Taggings
+            - categorized (int): Summe aller erfolgreichen Kategorisierungen
+        """
+        result = { 'tagged': 0, 'categorized': 0 }
+
+        # Defaults wie beim Speichern in der Datenbank
+        for row in rows:
+            self.db_handler.generate_unique(row)
+            row['prio'] = row.get('prio', 0)
+            row['category'] = row.get('category')
+            if not row.get('tags'):
+                row['tags'] = []
+
+        for key, generator in (('tagged', self._tag_generator),
+                               ('categorized', self._cat_generator)):
+            last = None
+            try:
+                for item in generator(None, rows=rows):
+                    last = item
+
+            except ValueError as ex:
+                # No rules (yet)
+                logging.info(f"Automatisches Tagging beim Import übersprungen: {ex}")
+                continue
+
+            if last is not None:
+                result[key] = last[key]
 
         return result
 
@@ -557,6 +761,7 @@ class Tagger():
         result['matched'] = len(matched)
 
         # Create updated Data and get UUIDs
+        updates = {}
         for row in matched:
 
             # UUIDs
@@ -570,28 +775,31 @@ class Tagger():
             if dry_run:
                 continue
 
-            query = {'key': 'uuid', 'value': uuid}
+            updates[uuid] = dict(update_data)
 
             if category is None:
                 # This is a tagging -> do not duplicate Tags
                 existing_tags = row.get('tags', [])
-                update_data['tags'] = [t for t in tags if t not in existing_tags]
+                updates[uuid]['tags'] = [t for t in tags if t not in existing_tags]
 
-            updated = self.db_handler.update(update_data, iban, query)
+        if not updates:
+            return result
 
-            # soft Exception Handling
-            if not updated:
-                logging.error(("Bei einer Custom Rule konnte der Eintrag "
-                              f"'{uuid}' nicht geupdated werden - skipping..."))
-                return result
+        # Write all updates of this rule at once
+        updated = self.db_handler.update_many_by_uuid(updates, iban)
 
-            if category is None:
-                # This was a tagging
-                result['tagged'] += updated.get('updated')
+        # soft Exception Handling
+        if not updated:
+            logging.error("Bei einer Custom Rule konnten die Einträge nicht geupdated werden")
+            return result
 
-            else:
-                # This was a categorization
-                result['categorized'] += updated.get('updated')
+        if category is None:
+            # This was a tagging
+            result['tagged'] += updated.get('updated')
+
+        else:
+            # This was a categorization
+            result['categorized'] += updated.get('updated')
 
         return result
 
@@ -690,14 +898,34 @@ class Tagger():
         Der Key wird als Bezeichner für das Ergebnis verwendet.
         Jeder RegEx muss genau eine Gruppe matchen.
         """
-        raw_parser = self.db_handler.filter_metadata(
-            {"key": "metatype", "value": "parser"}
-        )
-        parsers = {}
-        for p in raw_parser:
-            parsers[p['name']] = re.compile(p.get('regex'))
+        def load():
+            raw_parser = self.db_handler.filter_metadata(
+                {"key": "metatype", "value": "parser"}
+            )
+            parsers = {}
+            for p in raw_parser:
+                parsers[p['name']] = re.compile(p.get('regex'))
+
+            return parsers
+
+        return self._cached(('parser',), load)
+
+    def _parser_engine(self, parsers=None) -> ParserEngine:
+        """
+        Liefert die ParserEngine für die gespeicherten oder die übergebenen Parser.
+
+        Args:
+            parsers (dict | ParserEngine): Optionale Parser (siehe parse)
+        Returns:
+            ParserEngine: Engine mit allen Parsern (gecached, wenn aus der Datenbank)
+        """
+        if isinstance(parsers, ParserEngine):
+            return parsers
 
-        return parsers
+        if parsers is not None:
+            return ParserEngine(parsers)
+
+        return self._cached(('parser', 'engine'), lambda: ParserEngine(self._load_parsers()))
 
     def _load_ruleset(self, rule_name=None, categories=False) -> dict:
         """
@@ -712,6 +940,21 @@ class Tagger():
             dict: Verzeichnis nach Namen der Filterregeln
         """
         rule_type = "category" if categories else "rule"
+        return self._cached(
+            (rule_type, rule_name),
+            lambda: self._load_ruleset_from_db(rule_type, rule_name)
+        )
+
+    def _load_ruleset_from_db(self, rule_type: str, rule_name: str=None) -> dict:
+        """
+        Lädt Regeln eines Typs aus den Metadaten (siehe _load_ruleset).
+
+        Args:
+            rule_type (str): Metatype der Regeln ('rule' oder 'category')
+            rule_name (str, optional): Lädt die Regel mit diesem Namen.
+        Returns:
+            dict: Verzeichnis nach Namen der Filterregeln
+        """
         if rule_name:
             # Bestimmte Regel laden
             raw_rule = self.db_handler.filter_metadata(
@@ -737,3 +980,65 @@ class Tagger():
             rules[r.get('name')] = r
 
         return rules
+
+    def _ruleset_version(self, rule_type: str, rules: dict) -> str:
+        """
+        Erstellt eine Version (Hash) des vollständigen Regelwerks eines Typs.
+        Transaktionen werden mit dieser Version markiert, sobald sie mit dem
+        vollständigen Regelwerk geprüft wurden.
+
+        Args:
+            rule_type (str): Metatype der Regeln ('rule' oder 'category')
+            rules (dict): Geladene Regeln (siehe _load_ruleset)
+        Returns:
+            str: Hash über den Inhalt aller Regeln
+        """
+        def load():
+            dump = json.dumps(rules, sort_keys=True, default=str)
+            return hashlib.md5(dump.encode()).hexdigest()
+
+        return self._cached(('version', rule_type), load)
+
+    def cache_info(self) -> dict:
+        """
+        Liefert Statistiken zum Cache der kompilierten Parser und Regeln.
+
+        Returns:
+            dict:
+                - hits, int: Anzahl der Abrufe aus dem Cache
+                - misses, int: Anzahl der Abrufe aus der Datenbank
+                - size, int: Anzahl der gecachten Einträge
+                - version, int: Version der Metadaten, für die der Cache gilt
+        """
+        return {
+            'hits': self.cache_hits,
+            'misses': self.cache_misses,
+            'size': len(self._cache),
+            'version': self._cache_version,
+        }
+
+    def _cached(self, key: tuple, loader):
+        """
+        Liefert einen Eintrag aus dem Cache oder lädt ihn mit 'loader'.
+        Der Cache wird verworfen, sobald sich die Version der Metadaten
+        im Datenbankhandler geändert hat.
+
+        Args:
+            key (tuple): Schlüssel des Eintrags
+            loader (callable): Lädt den Eintrag, wenn er nicht im Cache ist
+        Returns:
+            any: Gecachter oder neu geladener Eintrag
+        """
+        version = self.db_handler.metadata_version
+        if version != self._cache_version:
+            self._cache = {}
+            self._cache_version = version
+
+        if key in self._cache:
+            self.cache_hits += 1
+            return self._cache[key]
+
+        self.cache_misses += 1
+        value = loader()
+        self._cache[key] = value
+        return value
@@ -2,14 +2,37 @@
 """Datenbankhandler für die Interaktion mit einer TinyDB Datenbankdatei."""
 
 import os
+import heapq
 import operator
 import logging
 import re
-from tinydb import TinyDB, Query, where, JSONStorage, middlewares
+import threading
+from collections import Counter
+from contextlib import contextmanager, ExitStack
+import json
+from tinydb import TinyDB, Query, where, JSONStorage, Storage, middlewares
+from tinydb.table import Document, Table
 from flask import current_app
 import portalocker
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 from handler.BaseDb import BaseDb
+from handler.Index import TableIndex
+from handler.Columns import ColumnCache, bucket_sums
 
 
 class FileLockMiddleware(middlewares.Middleware):
@@ -18,38 +41,422 @@ class FileLockMiddleware(middlewares.Middleware):
     (siehe: https://tinydb.readthedocs.io/en/latest/_modules/tinydb/middlewares.html).
     Sie wird hier für ein Datei-Locking benötigt, um parallele (Flask) Requests 
     auf die TindyDB zu ermöglichen.
+
+    In der Lock-Datei wird ein Generationszähler geführt, der bei jedem Schreibvorgang
+    erhöht wird. Darunterliegende Middlewares mit Cache (siehe RevalidatingCacheMiddleware)
+    werden so über Änderungen anderer Prozesse informiert.
     """
-    def __init__(self, storage_cls):
+    def __init__(self, storage_cls, lock_file: str=None):
         super().__init__(storage_cls)
-        self.lock_file = os.path.join(current_app.config['DATABASE_URI'], 'db.lock')
+        self.lock_file = lock_file or os.path.join(current_app.config['DATABASE_URI'], 'db.lock')
+        self._thread_lock = threading.RLock()
+        self._file_lock = None
+        self._depth = 0
+        self._written = False
+        self._generation = None
+
+    @contextmanager
+    def batch(self):
+        """
+        Hält das Lock für mehrere Operationen. Schreibvorgänge innerhalb des Blocks
+        werden von einer Cache-Middleware gesammelt und erst am Ende
+        gemeinsam in die Datei geschrieben.
+        """
+        with self._thread_lock:
+            if self._depth == 0:
+                self._file_lock = portalocker.Lock(self.lock_file, mode='a+', timeout=5)
+                self._revalidate(self._file_lock.acquire())
+
+            self._depth += 1
+            try:
+                yield self
+
+            finally:
+                self._depth -= 1
+                if self._depth == 0:
+                    try:
+                        self._flush()
+
+                    finally:
+                        self._file_lock.release()
+                        self._file_lock = None
 
     def read(self):
         """Hook into the database read operation with file locking."""
-        with portalocker.Lock(self.lock_file, timeout=5):
+        with self.batch():
             return self.storage.read()
 
     def write(self, data):
         """Hook into the database write operation with file locking."""
-        with portalocker.Lock(self.lock_file, timeout=5):
+        with self.batch():
             self.storage.write(data)
+            self._written = True
+
+    def close(self):
+        """Schreibt ausstehende Änderungen und schließt den Storage."""
+        with self.batch():
+            pass
+
+        self.storage.close()
+
+    def discard(self):
+        """
+        Verwirft den Cache der darunterliegenden Middleware inklusive ungespeicherter
+        Änderungen, damit der nächste Lesevorgang die Datei neu parsed.
+        """
+        with self._thread_lock:
+            invalidate = getattr(self.storage, 'invalidate', None)
+            if invalidate is not None:
+                invalidate(force=True)
+
+            self._written = False
+
+    def _revalidate(self, fh):
+        """
+        Liest den Generationszähler aus der Lock-Datei und verwirft den Cache der
+        darunterliegenden Middleware, wenn ein anderer Prozess geschrieben hat.
+
+        Args:
+            fh (file): Geöffnete und gelockte Lock-Datei
+        """
+        fh.seek(0)
+        generation = fh.read().strip()
+        if generation != self._generation:
+            invalidate = getattr(self.storage, 'invalidate', None)
+            if invalidate is not None:
+                invalidate()
+
+            self._generation = generation
+
+    def _flush(self):
+        """
+        Schreibt gesammelte Änderungen und erhöht den Generationszähler
+        in der (noch gelockten) Lock-Datei.
+        """
+        if not self._written:
+            return
+
+        self._written = False
+        flush = getattr(self.storage, 'flush', None)
+        if flush is not None:
+            flush()
+
+        generation = int(self._generation) + 1 if self._generation else 1
+        fh = self._file_lock.fh
+        fh.seek(0)
+        fh.truncate()
+        fh.write(str(generation))
+        fh.flush()
+        self._generation = str(generation)
+
+
+class RevalidatingCacheMiddleware(middlewares.Middleware):
+    """
+    Middleware Klasse, die die geparste Datenbank im Arbeitsspeicher hält.
+    Sie wird unter der FileLockMiddleware eingesetzt, die alle Zugriffe lockt.
+
+    Ein Lesevorgang parsed die Datei nur neu, wenn sie sich seit dem letzten Lesen
+    geändert hat (Generationszähler der FileLockMiddleware oder inode, Größe
+    und Änderungszeitpunkt der Datei). Schreibvorgänge werden gesammelt und mit
+    flush() in die Datei geschrieben.
+    """
+    def __init__(self, storage_cls):
+        super().__init__(storage_cls)
+        self.path = None
+        self.cache = None
+        self.signature = None
+        self.valid = False
+        self.dirty = False
+
+    def __call__(self, *args, **kwargs):
+        self.path = args[0] if args else kwargs.get('path')
+        return super().__call__(*args, **kwargs)
+
+    def read(self):
+        """Liefert die Datenbank aus dem Cache oder parsed die geänderte Datei neu."""
+        if self.dirty:
+            return self.cache
+
+        signature = self._signature()
+        if not self.valid or signature != self.signature:
+            self.cache = self.storage.read()
+            self.signature = signature
+            self.valid = True
+
+        return self.cache
+
+    def write(self, data):
+        """Übernimmt die Daten in den Cache, bis flush() aufgerufen wird."""
+        self.cache = data
+        self.valid = True
+        self.dirty = True
+
+    def flush(self):
+        """Schreibt den Cache in die Datei, falls es ungespeicherte Änderungen gibt."""
+        if not self.dirty:
+            return
+
+        try:
+            self.storage.write(self.cache)
+
+        except Exception:
+            # Cache does not match the file anymore
+            self.invalidate(force=True)
+            raise
+
+        self.dirty = False
+        self.signature = self._signature()
+
+    def invalidate(self, force=False):
+        """
+        Verwirft den Cache, damit der nächste Lesevorgang die Datei neu parsed.
+
+        Args:
+            force (bool): Auch ungespeicherte Änderungen verwerfen. Default: False
+        """
+        if self.dirty and not force:
+            return
+
+        self.cache = None
+        self.valid = False
+        self.dirty = False
+
+    def close(self):
+        """Schreibt ausstehende Änderungen und schließt den Storage."""
+        self.flush()
+        self.storage.close()
+
+    def _signature(self):
+        """
+        Erstellt eine Signatur der Datenbankdatei.
+
+        Returns:
+            tuple: inode, Größe und Änderungszeitpunkt der Datei
+        """
+        try:
+            stat = os.stat(self.path)
+
+        except (OSError, TypeError):
+            return None
+
+        return (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+
+class DetachedDocument(Document):
+    """
+    Dokument mit eigenen Kopien verschachtelter Werte (z.B. 'tags' oder 'parsed').
+    Die Rohdaten liegen im Cache der RevalidatingCacheMiddleware und dürfen nicht
+    durch Änderungen an ausgewählten Datensätzen verändert werden.
+    """
+    def __init__(self, value, doc_id):
+        super().__init__(value, doc_id)
+        for key, val in self.items():
+            if isinstance(val, (dict, list)):
+                self[key] = copy_nested(val)
+
+
+class DetachedTable(Table):
+    """
+    Table, der nur DetachedDocuments liefert und Rohdaten im Cache schützt:
+
+    - Kein Query-Cache: TinyDB würde dieselben Dokumente an alle Aufrufer geben
+      und den Cache nur bei eigenen Schreibvorgängen leeren, sodass Änderungen
+      anderer Prozesse nicht gefunden würden.
+    - Schlägt ein Schreibvorgang fehl (z.B. eine Update-Funktion wirft eine
+      Exception), wurden die Rohdaten im Cache eventuell schon teilweise geändert.
+      Der Cache wird dann verworfen (siehe FileLockMiddleware.discard).
+    """
+    document_class = DetachedDocument
+
+    def __init__(self, storage, name, cache_size=0):
+        super().__init__(storage, name, cache_size=cache_size)
+
+    def _update_table(self, updater):
+        try:
+            super()._update_table(updater)
+
+        except Exception:
+            discard = getattr(self.storage, 'discard', None)
+            if discard is not None:
+                discard()
+
+            raise
+
+
+def copy_nested(value):
+    """
+    Kopiert verschachtelte JSON-Daten (dicts und Listen) schneller als copy.deepcopy.
+
+    Args:
+        value (any): Zu kopierender Wert
+    Returns:
+        any: Kopie von dicts und Listen, alle anderen Werte unverändert
+    """
+    if isinstance(value, dict):
+        return {k: copy_nested(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [copy_nested(v) for v in value]
+
+    return value
+
+
+class AtomicJSONStorage(Storage):
+    """
+    Storage Klasse für die TinyDB Instanz, die einen schnelleren JSON Codec nutzt
+    (orjson oder ujson, falls installiert, sonst json aus der Standardbibliothek).
+    Die Datei wird atomar geschrieben (temporäre Datei und anschließendes Umbenennen),
+    sodass bei einem Abbruch nie eine halb geschriebene Datenbank zurückbleibt.
+    """
+    def __init__(self, path: str):
+        """
+        Legt die Datenbankdatei an, falls sie noch nicht existiert.
+
+        Args:
+            path (str): Pfad zur Datenbankdatei
+        """
+        super().__init__()
+        self.path = path
+        self.codec = self.codec_name()
+        if not os.path.exists(path):
+            with open(path, 'ab'):
+                pass
+
+    @staticmethod
+    def codec_name():
+        """
+        Ermittelt den schnellsten verfügbaren JSON Codec.
+
+        Returns:
+            str: 'orjson', 'ujson' oder 'json'
+        """
+        if orjson is not None:
+            return 'orjson'
+
+        if ujson is not None:
+            return 'ujson'
+
+        return 'json'
+
+    def read(self):
+        """
+        Liest und parsed die gesamte Datenbankdatei.
+
+        Returns:
+            dict: Inhalt der Datenbank oder None, wenn die Datei leer ist
+        """
+        with open(self.path, 'rb') as f:
+            content = f.read()
+
+        if not content:
+            return None
+
+        if self.codec == 'orjson':
+            return orjson.loads(content)
+
+        if self.codec == 'ujson':
+            return ujson.loads(content)
+
+        return json.loads(content)
+
+    def write(self, data):
+        """
+        Serialisiert die gesamte Datenbank in eine temporäre Datei
+        und ersetzt damit die Datenbankdatei.
+
+        Args:
+            data (dict): Inhalt der Datenbank
+        """
+        if self.codec == 'orjson':
+            content = orjson.dumps(data)
+
+        elif self.codec == 'ujson':
+            content = ujson.dumps(data, ensure_ascii=False).encode('utf-8')
+
+        else:
+            content = json.dumps(data, ensure_ascii=False).encode('utf-8')
+
+        tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(content)
+                f.flush()
+                os.fsync(f.fileno())
+
+            os.replace(tmp_path, self.path)
+
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+
+# Auswahl der Storage Klasse über 'DATABASE_STORAGE' in der Konfiguration
+STORAGES = {
+    'json': JSONStorage,
+    'fastjson': AtomicJSONStorage,
+}
 
 
 class TinyDbHandler(BaseDb):
     """
     Handler für die Interaktion mit einer TinyDB Datenbank.
     """
+    # Schlüssel, deren Häufigkeiten für distinct mitgeführt werden
+    COUNTED_KEYS = ('category', 'tags')
+
     def __init__(self):
         """
         Initialisiert den TinyDB-Handler und öffnet die Datenbank.
         """
         logging.info("Starting TinyDB Handler...")
+
+        # In-Memory Index der UUIDs je Table (wird lazy aus dem Table aufgebaut)
+        self._uuid_index = {}
+
+        # Häufigkeit der Tags und Kategorien je Table (siehe _get_value_counts)
+        self._value_counts = {}
+
+        # Optionale In-Memory Indexes für Abfragen je Table (siehe handler.Index)
+        self.use_index = bool(current_app.config.get('DATABASE_INDEX', False))
+        self._table_indexes = {}
+        self._insert_locks = {}
+
+        # Optionaler Spalten-Cache für vektorisierte Filter und Summen (siehe handler.Columns)
+        self.use_columns = bool(current_app.config.get('DATABASE_COLUMNAR', False))
+        if self.use_columns and not ColumnCache.available():
+            logging.warning("DATABASE_COLUMNAR benötigt NumPy und wird nicht genutzt")
+            self.use_columns = False
+
+        self._column_caches = {}
+
+        storage_name = current_app.config.get('DATABASE_STORAGE', 'json')
+        self._storage_cls = STORAGES.get(storage_name)
+        if self._storage_cls is None:
+            raise NotImplementedError(f"The configured storage {storage_name} is not supported !")
+
+        if self._storage_cls is AtomicJSONStorage:
+            logging.info(f"TinyDB Storage mit JSON Codec: {AtomicJSONStorage.codec_name()}")
+
+        # Sharding: Eine Datei (und ein Lock) je Collection in einem Verzeichnis
+        # mit dem Namen der Datenbank (ohne Dateiendung)
+        self.path = os.path.join(
+            current_app.config['DATABASE_URI'],
+            current_app.config['DATABASE_NAME']
+        )
+        self.sharded = bool(current_app.config.get('DATABASE_SHARDED', False))
+        self._shards = {}
+        self._shards_lock = threading.Lock()
+        if self.sharded:
+            self.path = os.path.splitext(self.path)[0]
+            os.makedirs(self.path, exist_ok=True)
+            logging.info(f"TinyDB mit einer Datei je Collection in {self.path}")
+
         try:
-            self.connection = TinyDB(os.path.join(
-                    current_app.config['DATABASE_URI'],
-                    current_app.config['DATABASE_NAME']
-                ),
-                storage=FileLockMiddleware(JSONStorage)
-            )
+            if self.sharded:
+                # Metadaten-Shard als Standardverbindung
+                self.connection = self._db('metadata')
+
+            else:
+                self.connection = self._open(self.path)
 
             if not hasattr(self, 'connection'):
                 raise IOError('Es konnte kein Connection Objekt erstellt werden')
@@ -65,9 +472,89 @@ class TinyDbHandler(BaseDb):
         Außerdem wird der Table für Metadaten erstellt, falls er noch nicht existiert.
         """
         # Table für Metadaten
-        self.connection.table('metadata')
+        self._table('metadata')
+
+    def _shard_path(self, collection: str):
+        """
+        Liefert den Pfad zur Datenbankdatei einer Collection.
+
+        Args:
+            collection (str): Name der Collection
+        Returns:
+            str: Pfad zur Datei der Collection (bzw. der gemeinsamen Datei ohne Sharding)
+        """
+        if not self.sharded:
+            return self.path
+
+        if not re.fullmatch(r'[\w-]+', collection):
+            raise ValueError(f"Ungültiger Name für eine Collection: {collection}")
+
+        return os.path.join(self.path, f'{collection}.json')
+
+    def _db(self, collection: str, create: bool=True):
+        """
+        Liefert die TinyDB Instanz, in der eine Collection gespeichert ist.
+        Mit Sharding wird die Datei der Collection (mit eigenem Lock) beim
+        ersten Zugriff geöffnet.
+
+        Args:
+            collection (str): Name der Collection
+            create (bool): Datei anlegen, falls sie noch nicht existiert. Default: True
+        Returns:
+            TinyDB: Datenbank der Collection oder None, wenn sie nicht existiert
+                    und nicht angelegt werden soll
+        """
+        if not self.sharded:
+            return self.connection
+
+        db = self._shards.get(collection)
+        if db is not None:
+            return db
+
+        path = self._shard_path(collection)
+        if not create and not os.path.exists(path):
+            return None
+
+        with self._shards_lock:
+            if collection not in self._shards:
+                self._shards[collection] = self._open(
+                    path, lock_file=os.path.join(self.path, f'{collection}.lock')
+                )
+
+            return self._shards[collection]
+
+    def _open(self, path: str, lock_file: str=None):
+        """
+        Öffnet eine Datenbankdatei mit Locking, Cache und revalidierenden Tables.
+
+        Args:
+            path (str): Pfad zur Datenbankdatei
+            lock_file (str): Pfad zur Lock-Datei. Default: db.lock in DATABASE_URI
+        Returns:
+            TinyDB: Geöffnete Datenbank
+        """
+        db = TinyDB(
+            path,
+            storage=FileLockMiddleware(
+                RevalidatingCacheMiddleware(self._storage_cls), lock_file=lock_file
+            )
+        )
+        db.table_class = DetachedTable
+        return db
+
+    def _table(self, collection: str):
+        """
+        Liefert den Table einer Collection (aus der Datei der Collection bei Sharding).
+
+        Args:
+            collection (str): Name der Collection
+        Returns:
+            tinydb.table.Table: Table der Collection
+        """
+        return self._db(collection).table(collection)
 
-    def _select(self, collection: list, condition=None, multi='AND'):
+    def _select(self, collection: list, condition=None, multi='AND',
+                sort=None, limit=None, offset=0, after=None):
         """
         Selektiert Datensätze aus der Datenbank, die die angegebene Bedingung erfüllen.
 
@@ -85,6 +572,11 @@ class TinyDbHandler(BaseDb):
             multi, str ['AND' | 'OR']:      Wenn 'condition' eine Liste mit conditions ist,
                                             werden diese logisch wie hier angegeben verknüpft.
                                             Default: 'AND'
+            sort, tuple:                    (key, descending) Sortierung für 'limit'
+            limit, int:                     Nur die ersten sortierten Ergebnisse liefern
+            offset, int:                    Anzahl der zu überspringenden Ergebnisse
+            after, tuple:                   Nur Ergebnisse nach (Wert, uuid) in
+                                            Sortierreihenfolge (Keyset-Paginierung)
         Returns:
             list: Liste der ausgewählten Datensätze
         """
@@ -92,8 +584,24 @@ class TinyDbHandler(BaseDb):
         query = self._form_complete_query(condition, multi)
         result = []
 
+        if limit is not None:
+            return self._select_page(collection, condition, multi, query,
+                                     sort or ('date_tx', True), offset + limit,
+                                     after)[offset:]
+
         for col in collection:
-            col = self.connection.table(col)
+            if self.sharded and self._db(col, create=False) is None:
+                # Collection without data
+                continue
+
+            if query is not None and (self.use_columns or self.use_index):
+                # Narrow down the documents to check with the columns or the index
+                docs = self._index_search(col, condition, multi)
+                if docs is not None:
+                    result.extend(d for d in docs if query(d))
+                    continue
+
+            col = self._table(col)
 
             if query is None:
                 # Get all entries from collection
@@ -118,36 +626,47 @@ class TinyDbHandler(BaseDb):
                 - inserted, int: Zahl der neu eingefügten IDs
         """
         # Da es keine Unique contraints in TinyDB gibt,
-        # müssen die Datensätze zuvor vin der DB gesucht
-        # und Duplikate anschließend gefiltert werden.
-        duplicates = self._double_check(collection, data)
+        # werden die Datensätze zuvor mit dem UUID-Index abgeglichen
+        # und Duplikate anschließend gefiltert.
+        with self._insert_locks.setdefault(collection, threading.Lock()):
+            duplicates = self._double_check(collection, data)
+            signature = self._storage_signature(collection)
+
+            # Insert Many (INSERT IGNORE)
+            if isinstance(data, list):
+
+                # Pop duplicates from list (also within the given data)
+                unique_data = []
+                unique_ids = set()
+                for d in data:
+                    uuid = d.get('uuid')
+                    if uuid in duplicates or uuid in unique_ids:
+                        continue
 
-        # Insert Many (INSERT IGNORE)
-        if isinstance(data, list):
-
-            # Pop duplicates from list
-            unique_data = []
-            for d in data:
-                if d.get('uuid') not in duplicates:
                     # Add to unique
+                    unique_ids.add(uuid)
                     unique_data.append(d)
 
-            # No non-duplicates in data
-            if not unique_data:
-                return {'inserted': 0}
+                # No non-duplicates in data
+                if not unique_data:
+                    return {'inserted': 0}
 
-            # Insert remaining data
-            result = self.connection.table(collection).insert_multiple(unique_data)
-            return {'inserted': len(result)}
+                # Insert remaining data
+                result = self._table(collection).insert_multiple(unique_data)
+                self._add_to_uuid_index(collection, unique_ids)
+                self._track_value_counts(collection, signature, added=unique_data)
+                return {'inserted': len(result)}
 
-        # INSERT One
-        if data.get('uuid') in duplicates:
-            # Don't insert duplicate
-            logging.info(f'Not inserting Duplicate \'{data.get("uuid")}\'')
-            return {'inserted': 0}
+            # INSERT One
+            if data.get('uuid') in duplicates:
+                # Don't insert duplicate
+                logging.info(f'Not inserting Duplicate \'{data.get("uuid")}\'')
+                return {'inserted': 0}
 
-        result = self.connection.table(collection).insert(data)
-        return {'inserted': (1 if result else 0)}
+            result = self._table(collection).insert(data)
+            self._add_to_uuid_index(collection, {data.get('uuid')})
+            self._track_value_counts(collection, signature, added=[data])
+            return {'inserted': (1 if result else 0)}
 
     def _update(self, data, collection, condition=None, multi='AND', merge=True):
         """
@@ -172,13 +691,14 @@ class TinyDbHandler(BaseDb):
                 - updated, int: Anzahl der aktualisierten Datensätze
         """
         # run update
+        signature = self._storage_signature(collection)
         docs_to_update = self.select(collection, condition, multi)
         if not docs_to_update:
             # No match, no update
             logging.info('No matching documents found for update with condition: %s', condition)
             return { 'updated': 0 }
 
-        collection = self.connection.table(collection)
+        collection = self._table(collection)
 
         # care about the right format
         if data.get('tags') is not None and not isinstance(data.get('tags'), list):
@@ -201,9 +721,12 @@ class TinyDbHandler(BaseDb):
         if not merge:
             # Update all at once (no merging)
             update_result += collection.update(data, query)
+            self._track_value_counts(collection.name, signature, removed=docs_to_update,
+                                     added=[{**doc, **data} for doc in docs_to_update])
             return { 'updated': len(update_result) }
 
         # Update every Entry one-by-one (merge every list item)
+        updated_docs = []
         for doc in docs_to_update:
 
             # Fix TinyDBs multiple results for same doc
@@ -227,7 +750,82 @@ class TinyDbHandler(BaseDb):
                 })
             )
             update_result.append(doc.get('uuid'))
+            updated_docs.append((doc, {**doc, **data}))
+
+        self._track_value_counts(collection.name, signature,
+                                 removed=[old for old, _ in updated_docs],
+                                 added=[new for _, new in updated_docs])
+        return { 'updated': len(update_result) }
+
+    def batch(self, collection: str=None):
+        """
+        Hält das Datei-Lock für mehrere Operationen und schreibt alle
+        Änderungen erst am Ende des Blocks mit einem Schreibvorgang in die Datei.
+
+        Args:
+            collection (str, optional): Collection, in die geschrieben wird.
+                                        Mit Sharding wird nur deren Datei gelockt,
+                                        sonst alle bereits geöffneten Dateien.
+        Returns:
+            Kontextmanager für einen 'with' Block
+        """
+        if not self.sharded:
+            return self.connection.storage.batch()
+
+        if collection is None:
+            collections = list(self._shards)
+
+        else:
+            # Lock all member shards of a group
+            collections = self.get_group_ibans(collection, check_before=True)
+
+        # Always lock in the same order to prevent deadlocks
+        stack = ExitStack()
+        for name in sorted(collections):
+            stack.enter_context(self._db(name).storage.batch())
+
+        return stack
+
+    def _update_many_by_uuid(self, updates, collection, merge=True):
+        """
+        Aktualisiert mehrere Datensätze anhand ihrer UUID mit einem einzigen
+        Schreibvorgang auf den Table.
+
+        Args:
+            updates (dict): Aktualisierte Daten je Datensatz ({uuid: dict})
+            collection (str): Name der Collection, in der aktualisiert werden soll.
+            merge (bool): Wenn False, werden Listenfelder nicht gemerged, sondern
+                          komplett überschrieben. Default: True
+        Returns:
+            dict:
+                - updated, int: Anzahl der aktualisierten Datensätze
+        """
+        signature = self._storage_signature(collection)
+        collection = self._table(collection)
+        uuids = set(updates.keys())
+
+        # Result store for updated uuids
+        update_result = set()
+
+        # Counted values before and after the update (see _track_value_counts)
+        removed, added = [], []
+
+        def apply_update(doc):
+            removed.append({key: doc.get(key) for key in self.COUNTED_KEYS})
+            for key, value in updates[doc['uuid']].items():
+
+                if merge and isinstance(doc.get(key), list) and isinstance(value, list):
+                    # Merge list items
+                    doc[key] = list(set(doc.get(key) + value))
+                    continue
+
+                doc[key] = value
+
+            update_result.add(doc['uuid'])
+            added.append({key: doc.get(key) for key in self.COUNTED_KEYS})
 
+        collection.update(apply_update, where('uuid').test(lambda v: v in uuids))
+        self._track_value_counts(collection.name, signature, removed=removed, added=added)
         return { 'updated': len(update_result) }
 
     def _delete(self, collection, condition=None, multi='AND'):
@@ -249,7 +847,7 @@ class TinyDbHandler(BaseDb):
             dict:
                 - deleted, int: Anzahl der gelöschten Datensätze
         """
-        collection = self.connection.table(collection)
+        collection = self._table(collection)
 
         # Form condition into a query
         if condition is None:
@@ -257,7 +855,13 @@ class TinyDbHandler(BaseDb):
         else:
             query = self._form_complete_query(condition, multi)
 
+        # Removed documents are only needed for cached counts
+        signature = self._storage_signature(collection.name)
+        removed = collection.search(query) if collection.name in self._value_counts else []
+
         deleted_ids = collection.remove(query)
+        self._uuid_index.pop(collection.name, None)
+        self._track_value_counts(collection.name, signature, removed=removed)
         return {'deleted': len(deleted_ids)}
 
     def _truncate(self, collection):
@@ -269,16 +873,20 @@ class TinyDbHandler(BaseDb):
             dict:
                 - deleted, int: Anzahl der gelöschten Datensätze
         """
-        self.connection.drop_table(collection)
+        self._db(collection).drop_table(collection)
+        self._uuid_index.pop(collection, None)
+        self._value_counts.pop(collection, None)
+        self._table_indexes.pop(collection, None)
+        self._column_caches.pop(collection, None)
         return {'deleted': 1}
 
     def get_metadata(self, uuid):
-        collection = self.connection.table('metadata')
+        collection = self._table('metadata')
         result = collection.get(Query().uuid == uuid)
         return result
 
     def filter_metadata(self, condition, multi='AND'):
-        collection = self.connection.table('metadata')
+        collection = self._table('metadata')
         if condition is None:
             # Return all
             return collection.all()
@@ -293,7 +901,7 @@ class TinyDbHandler(BaseDb):
         if not entry.get('uuid'):
             entry = self._generate_unique_meta(entry)
 
-        collection = self.connection.table('metadata')
+        collection = self._table('metadata')
 
         if overwrite:
             # Remove Entry if exists
@@ -301,18 +909,23 @@ class TinyDbHandler(BaseDb):
 
             # Insert new Entry
             result = collection.insert(entry)
+            self._metadata_changed()
             return {'inserted': (1 if result else 0)}
 
         # Only insert if not exists
         if not collection.search(Query().uuid == entry.get('uuid')):
             result = collection.insert(entry)
+            self._metadata_changed()
             return {'inserted': (1 if result else 0)}
 
         return {'inserted': 0}
 
     def delete_metadata(self, uuid):
-        collection = self.connection.table('metadata')
+        collection = self._table('metadata')
         deleted_ids = collection.remove(Query().uuid == uuid)
+        if deleted_ids:
+            self._metadata_changed()
+
         return {'deleted': len(deleted_ids)}
 
     def _form_where(self, condition):
@@ -439,6 +1052,331 @@ class TinyDbHandler(BaseDb):
 
         return query
 
+    def _select_page(self, collection: list, condition, multi, query, sort: tuple, count: int,
+                     after: tuple=None):
+        """
+        Selektiert die ersten 'count' Datensätze in Sortierreihenfolge, ohne alle
+        Treffer zu sortieren. Mit Index werden die Dokumente in Sortierreihenfolge
+        geprüft, bis genug Treffer gefunden sind. Ohne Index wird nur teilweise
+        sortiert (heapq).
+
+        Args:
+            collection (list): Namen der Collections
+            condition (dict | list(dict)): Bedingungen (siehe BaseDb.select)
+            multi (str): ['AND' | 'OR'] Logische Verknüpfung der Bedingungen
+            query (QueryInstance): Query aus den Bedingungen oder None
+            sort (tuple): (key, descending) Sortierung
+            count (int): Anzahl der zu liefernden Datensätze
+            after (tuple): Nur Datensätze nach (Wert, uuid) in Sortierreihenfolge
+        Returns:
+            list: Sortierte Datensätze
+        """
+        sort_key, descending = sort
+        if self.use_index and len(collection) == 1 and sort_key in TableIndex.SORTED_KEYS:
+            result = self._index_page(collection[0], condition, multi, query,
+                                      sort_key, descending, count, after)
+            if result is not None:
+                return result
+
+        rows = self._select(collection, condition, multi)
+        return self._top_rows(rows, sort_key, descending, count, after)
+
+    def _top_rows(self, rows: list, sort_key: str, descending: bool, count: int,
+                  after: tuple=None):
+        """
+        Sortiert nur die ersten 'count' Datensätze (nach 'after') mit heapq.
+
+        Returns:
+            list: Sortierte Datensätze
+        """
+        key = self._sort_key(sort_key)
+        if after is not None:
+            if descending:
+                rows = [r for r in rows if key(r) < after]
+            else:
+                rows = [r for r in rows if key(r) > after]
+
+        select = heapq.nlargest if descending else heapq.nsmallest
+        return select(count, rows, key=key)
+
+    def _index_page(self, collection: str, condition, multi, query,
+                    sort_key: str, descending: bool, count: int, after: tuple=None):
+        """
+        Prüft die Dokumente in der Reihenfolge des sortierten Index
+        (ab der Position von 'after'), bis 'count' Treffer gefunden sind.
+
+        Returns:
+            list: Sortierte Datensätze oder None, wenn nicht alle Dokumente
+                  im sortierten Index enthalten sind
+        """
+        raw_table, index = self._get_table_index(collection)
+        doc_ids = index.sorted[sort_key][1]
+        if len(doc_ids) != len(raw_table):
+            # Documents without sortable value
+            return None
+
+        candidates = index.candidates(condition, multi)
+        if candidates is not None and len(candidates) * 4 < len(doc_ids):
+            # Few candidates: Sort only these
+            docs = [DetachedDocument(raw_table[str(i)], doc_id=i) for i in candidates
+                    if query is None or query(raw_table[str(i)])]
+            return self._top_rows(docs, sort_key, descending, count, after)
+
+        # Seek to the position after the cursor
+        if descending:
+            end = index.seek(sort_key, *after)[0] if after is not None else len(doc_ids)
+            positions = range(end - 1, -1, -1)
+
+        else:
+            start = index.seek(sort_key, *after)[1] if after is not None else 0
+            positions = range(start, len(doc_ids))
+
+        result = []
+        for pos in positions:
+            if len(result) >= count:
+                break
+
+            doc_id = doc_ids[pos]
+            if candidates is not None and doc_id not in candidates:
+                continue
+
+            doc = raw_table[str(doc_id)]
+            if query is None or query(doc):
+                result.append(DetachedDocument(doc, doc_id=doc_id))
+
+        return result
+
+    def _get_table_index(self, collection: str):
+        """
+        Liefert die Rohdaten und den Index eines Tables. Der Index wird neu
+        aufgebaut, sobald sich der Table seit dem letzten Aufbau geändert hat
+        (eigene Schreibvorgänge oder neu eingelesene Datei durch Änderungen
+        anderer Prozesse).
+
+        Args:
+            collection (str): Name der Collection
+        Returns:
+            tuple: Rohdaten des Tables ({doc_id (str): dict}) und TableIndex
+        """
+        # Every write replaces the raw table dict in the (cached) storage
+        tables = self._db(collection).storage.read() or {}
+        raw_table = tables.get(collection, {})
+
+        index = self._table_indexes.get(collection)
+        if index is None or index.raw_table is not raw_table:
+            index = TableIndex(raw_table)
+            self._table_indexes[collection] = index
+
+        return raw_table, index
+
+    def _get_columns(self, collection: str):
+        """
+        Liefert die Rohdaten und den Spalten-Cache eines Tables. Der Cache wird wie
+        der Index (siehe _get_table_index) bei Änderungen des Tables neu aufgebaut.
+
+        Args:
+            collection (str): Name der Collection
+        Returns:
+            tuple: Rohdaten des Tables ({doc_id (str): dict}) und ColumnCache
+        """
+        tables = self._db(collection).storage.read() or {}
+        raw_table = tables.get(collection, {})
+
+        columns = self._column_caches.get(collection)
+        if columns is None or columns.raw_table is not raw_table:
+            columns = ColumnCache(raw_table)
+            self._column_caches[collection] = columns
+
+        return raw_table, columns
+
+    def _distinct(self, collection: str, key: str):
+        """
+        Ermittelt die unterschiedlichen Werte eines Schlüssels. Für 'category'
+        und 'tags' werden die mitgeführten Häufigkeiten gelesen (siehe
+        _get_value_counts), sonst werden alle Dokumente durchsucht.
+
+        Args:
+            collection (str): Name der Collection
+            key (str): Schlüssel
+        Returns:
+            set: Unterschiedliche Werte
+        """
+        if self.sharded and self._db(collection, create=False) is None:
+            return set()
+
+        if key in self.COUNTED_KEYS:
+            counts = self._get_value_counts(collection)[key]
+            return {value for value, count in counts.items() if count > 0}
+
+        values = set()
+        for doc in self._table(collection).all():
+            value = doc.get(key)
+            for v in (value if isinstance(value, list) else [value]):
+                try:
+                    values.add(v)
+                except TypeError:
+                    continue
+
+        return values
+
+    def _aggregate_sums(self, collection: str, condition, multi, group_by: list):
+        """
+        Summiert die Beträge in einem Durchlauf über die gefundenen Dokumente
+        (ohne Sortierung und Formatierung der Datensätze). Mit Spalten-Cache werden
+        Filter und Summen vektorisiert berechnet, sofern die Bedingungen und
+        Schlüssel von ihm unterstützt werden.
+
+        Args:
+            collection (str): Name der Collection
+            condition (dict | list(dict)): Bedingungen (siehe BaseDb.select)
+            multi (str): ['AND' | 'OR'] Logische Verknüpfung der Bedingungen
+            group_by (list): Schlüssel, nach denen gruppiert wird
+        Returns:
+            dict: Summe der Beträge je Schlüssel und Wert
+        """
+        sums = {key: {} for key in group_by}
+        if self.sharded and self._db(collection, create=False) is None:
+            return sums
+
+        if self.use_columns and set(group_by).issubset(
+                ColumnCache.CODED_KEYS + ColumnCache.LIST_KEYS):
+            _, columns = self._get_columns(collection)
+            mask = columns.mask(condition, multi)
+            if mask is not None:
+                return {key: columns.group_sums(mask, key) for key in group_by}
+
+        for doc in self._select([collection], condition, multi):
+            amount = doc.get('amount') or 0.0
+            for key, key_sums in sums.items():
+                values = doc.get(key)
+                if not isinstance(values, list):
+                    values = [values]
+                elif not values:
+                    values = [None]
+
+                for value in values:
+                    try:
+                        key_sums[value] = key_sums.get(value, 0.0) + amount
+                    except TypeError:
+                        # Unhashable values can't be grouped
+                        continue
+
+        return sums
+
+    def _aggregate_timeseries(self, collection: str, condition, multi,
+                              interval: str, split_by: str):
+        """
+        Summiert Einnahmen und Ausgaben je Zeitraum. Mit NumPy werden die Zeiträume
+        vektorisiert über Spalten für 'date_tx' und 'amount' berechnet und summiert
+        (aus dem Spalten-Cache, sofern aktiv), ohne NumPy in einem einfachen Durchlauf.
+
+        Args:
+            collection (str): Name der Collection
+            condition (dict | list(dict)): Bedingungen (siehe BaseDb.select)
+            multi (str): ['AND' | 'OR'] Logische Verknüpfung der Bedingungen
+            interval (str): ['month' | 'week'] Länge der Zeiträume
+            split_by (str): Optionaler Schlüssel für die Aufteilung der Zeiträume
+        Returns:
+            dict: Einnahmen und Ausgaben je (Beginn des Zeitraums, Wert von split_by)
+        """
+        if self.sharded and self._db(collection, create=False) is None:
+            return {}
+
+        if self.use_columns and split_by in (None,) + ColumnCache.CODED_KEYS:
+            _, columns = self._get_columns(collection)
+            mask = columns.mask(condition, multi)
+            if mask is not None:
+                mask &= ~np.isnan(columns.numeric['date_tx'])
+                codes, split_values = columns.split_codes(split_by)
+                return bucket_sums(
+                    columns.numeric['date_tx'][mask].astype(np.int64),
+                    np.nan_to_num(columns.numeric['amount'][mask]),
+                    codes[mask], split_values, interval
+                )
+
+        docs = [d for d in self._select([collection], condition, multi)
+                if d.get('date_tx') is not None]
+        if not docs:
+            return {}
+
+        splits = [None] * len(docs)
+        if split_by is not None:
+            splits = [d.get(split_by) for d in docs]
+            splits = [s if not isinstance(s, (list, dict)) else str(s) for s in splits]
+
+        if np is None:
+            buckets = {}
+            for doc, split in zip(docs, splits):
+                start = self._bucket_start(doc['date_tx'], interval)
+                amount = doc.get('amount') or 0.0
+                totals = buckets.setdefault((start, split), [0.0, 0.0])
+                totals[0 if amount > 0 else 1] += amount
+
+            return {k: tuple(v) for k, v in buckets.items()}
+
+        dates = np.fromiter((d['date_tx'] for d in docs), dtype=np.int64, count=len(docs))
+        amounts = np.fromiter((d.get('amount') or 0.0 for d in docs),
+                              dtype=np.float64, count=len(docs))
+
+        split_values = list(dict.fromkeys(splits))
+        split_codes = {s: i for i, s in enumerate(split_values)}
+        codes = np.fromiter((split_codes[s] for s in splits), dtype=np.int64, count=len(docs))
+        return bucket_sums(dates, amounts, codes, split_values, interval)
+
+    def _dates_by_uuid(self, collection: str, uuids: list):
+        """
+        Liefert 'date_tx' der Datensätze mit den angegebenen UUIDs.
+        Mit Index werden die Datensätze direkt über die UUID gefunden.
+
+        Args:
+            collection (str): Name der Collection
+            uuids (list): UUIDs der Datensätze
+        Returns:
+            list: Werte von 'date_tx'
+        """
+        if self.sharded and self._db(collection, create=False) is None:
+            return []
+
+        if self.use_index:
+            raw_table, index = self._get_table_index(collection)
+            by_uuid = index.inverted['uuid']
+            return [raw_table[str(doc_id)].get('date_tx')
+                    for uuid in uuids for doc_id in by_uuid.get(uuid, ())]
+
+        uuids = set(uuids)
+        return [doc.get('date_tx') for doc in self._table(collection).all()
+                if doc.get('uuid') in uuids]
+
+    def _index_search(self, collection: str, condition, multi='AND'):
+        """
+        Ermittelt mit dem Spalten-Cache oder dem Index eines Tables die Dokumente,
+        die eine Condition erfüllen können (siehe _get_columns und _get_table_index).
+
+        Args:
+            collection (str): Name der Collection
+            condition (dict | list(dict)): Bedingungen (siehe BaseDb.select)
+            multi (str): ['AND' | 'OR'] Logische Verknüpfung der Bedingungen
+        Returns:
+            list(Document): Kandidaten (die Query muss noch angewendet werden)
+                            oder None, wenn die Abfrage nicht eingegrenzt werden kann
+        """
+        if self.use_columns:
+            raw_table, columns = self._get_columns(collection)
+            mask = columns.mask(condition, multi)
+            if mask is not None:
+                return [DetachedDocument(raw_table[str(i)], doc_id=i)
+                        for i in columns.documents(mask)]
+
+        if not self.use_index:
+            return None
+
+        raw_table, index = self._get_table_index(collection)
+        doc_ids = index.candidates(condition, multi)
+        if doc_ids is None:
+            return None
+
+        return [DetachedDocument(raw_table[str(i)], doc_id=i) for i in sorted(doc_ids)]
+
     def _double_check(self, collection: str, data: list|dict):
         """
         Prüft anhand der unique IDs einer Transaktion,
@@ -448,17 +1386,133 @@ class TinyDbHandler(BaseDb):
             collection (str): Name der Collection, in der die Werte geprüft werden sollen.
             data (dict | list of dicts): Zu prüfende Transaktionen (inkl. ID)
         Returns:
-            list: Liste der IDs, die sich bereits in der Datenbank befinden
+            set: IDs, die sich bereits in der Datenbank befinden
         """
-        if isinstance(data, list):
-            query = [{'key': 'uuid', 'value': d.get('uuid')} for d in data]
-        else:
-            query = {'key': 'uuid', 'value': data.get('uuid')}
+        if not isinstance(data, list):
+            data = [data]
+
+        uuid_index = self._get_uuid_index(collection)
+        return {d.get('uuid') for d in data if d.get('uuid') in uuid_index}
+
+    def _get_uuid_index(self, collection: str):
+        """
+        Liefert den In-Memory Index aller UUIDs eines Tables.
+        Der Index wird lazy aus dem Table aufgebaut und neu erstellt,
+        sobald sich die Datenbankdatei seit dem letzten Aufbau geändert hat
+        (z.B. durch einen anderen Prozess).
+
+        Args:
+            collection (str): Name der Collection
+        Returns:
+            set: Alle UUIDs der Collection
+        """
+        signature = self._storage_signature(collection)
+        cached = self._uuid_index.get(collection)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+
+        uuids = {doc.get('uuid') for doc in self._table(collection).all()}
+        self._uuid_index[collection] = (signature, uuids)
+        return uuids
+
+    def _add_to_uuid_index(self, collection: str, uuids: set):
+        """
+        Ergänzt den UUID-Index eines Tables nach einem eigenen Insert,
+        sodass dieser nicht neu aus der Datenbankdatei aufgebaut werden muss.
+
+        Args:
+            collection (str): Name der Collection
+            uuids (set): Neu eingefügte UUIDs
+        """
+        cached = self._uuid_index.get(collection)
+        if cached is None:
+            return
+
+        cached[1].update(uuids)
+        self._uuid_index[collection] = (self._storage_signature(collection), cached[1])
+
+    def _get_value_counts(self, collection: str):
+        """
+        Liefert die Häufigkeit jedes Werts der COUNTED_KEYS eines Tables. Die
+        Häufigkeiten werden wie der UUID-Index lazy aufgebaut, bei eigenen
+        Schreibvorgängen fortgeschrieben (siehe _track_value_counts) und nur nach
+        Änderungen anderer Prozesse neu aus dem Table gezählt.
+
+        Args:
+            collection (str): Name der Collection
+        Returns:
+            dict: Counter je Schlüssel ({key: Counter})
+        """
+        signature = self._storage_signature(collection)
+        cached = self._value_counts.get(collection)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+
+        tables = self._db(collection).storage.read() or {}
+        counts = {key: Counter() for key in self.COUNTED_KEYS}
+        for doc in tables.get(collection, {}).values():
+            self._count_values(counts, doc, 1)
+
+        self._value_counts[collection] = (signature, counts)
+        return counts
+
+    def _track_value_counts(self, collection: str, signature, removed=(), added=()):
+        """
+        Schreibt die Häufigkeiten eines Tables nach einem eigenen Schreibvorgang fort.
+        Hat sich die Datei vor dem Schreibvorgang durch einen anderen Prozess
+        geändert, werden die Häufigkeiten stattdessen verworfen.
+
+        Args:
+            collection (str): Name der Collection
+            signature (tuple): Signatur der Datei vor dem Schreibvorgang
+            removed (list(dict)): Entfernte Dokumente bzw. Werte vor einem Update
+            added (list(dict)): Neue Dokumente bzw. Werte nach einem Update
+        """
+        cached = self._value_counts.get(collection)
+        if cached is None:
+            return
+
+        if cached[0] != signature:
+            self._value_counts.pop(collection, None)
+            return
+
+        for doc in removed:
+            self._count_values(cached[1], doc, -1)
+
+        for doc in added:
+            self._count_values(cached[1], doc, 1)
+
+        self._value_counts[collection] = (self._storage_signature(collection), cached[1])
+
+    @staticmethod
+    def _count_values(counts: dict, doc: dict, step: int):
+        """Zählt die Werte (bzw. Listenelemente) eines Dokuments je Schlüssel"""
+        for key, counter in counts.items():
+            value = doc.get(key)
+            for v in (value if isinstance(value, list) else [value]):
+                try:
+                    counter[v] += step
+                except TypeError:
+                    # Unhashable values can't be counted
+                    continue
 
-        results = self.select(collection=collection, condition=query, multi='OR')
-        duplicate_ids = [r.get('uuid') for r in results]
+    def _storage_signature(self, collection: str):
+        """
+        Erstellt eine Signatur der Datenbankdatei einer Collection, an der Änderungen
+        (auch durch andere Prozesse) erkannt werden können.
+
+        Args:
+            collection (str): Name der Collection
+        Returns:
+            tuple: inode, Größe und Änderungszeitpunkte der Datei
+        """
+        try:
+            stat = os.stat(self._shard_path(collection))
+
+        except FileNotFoundError:
+            return None
 
-        return duplicate_ids
+        return (stat.st_ino, stat.st_size, stat.st_mtime_ns, stat.st_ctime_ns)
 
     def _none_of_test(self, value, forbidden_values):
         """Benutzerdefinierter Test: Keines der Elemente ist in einer Liste vorhanden"""
@@ -475,7 +1529,16 @@ class TinyDbHandler(BaseDb):
         Returns:
             list: A list of table names.
         """
-        return self.connection.tables()
+        if not self.sharded:
+            return self.connection.tables()
+
+        tables = set()
+        for file_name in os.listdir(self.path):
+            collection, ext = os.path.splitext(file_name)
+            if ext == '.json':
+                tables.update(self._db(collection).tables())
+
+        return tables
 
     def min_max_collection(self, collection: str, key: str):
         """
@@ -1,10 +1,8 @@
 #!/usr/bin/python3 # pylint: disable=invalid-name
 """Reader für das Einlesen von Kontoumsätzen in den Formaten der Comdirect Bank."""
 
-import datetime
 import csv
 import re
-import camelot
 
 from reader.Generic import Reader as Generic
 
@@ -15,17 +13,16 @@ class Reader(Generic):
     Dieser Reader ist speziell für die Daten angepasst, wie sie bei der Comidrect Bank vorkommen.
     """
 
-    def from_csv(self, filepath):
+    def _csv_rows(self, filepath):
         """
         Liest Kontoumsätze von Kontoauszügen ein,
         die im CSV Format von der Comidrect Bank herintergeladen wurden.
 
-        Returns:
-            Liste mit Dictonaries, als Standard-Objekt mit allen
-            ausgelesenen Kontoumsätzen.
+        Yields:
+            Dictonary als Standard-Objekt je ausgelesenem Kontoumsatz.
         """
-        result = []
         rx = re.compile(r'(?:Auftraggeber|Empfänger)\:\s(.*)Buchungstext\:\s(.*)')
+        re_date = re.compile(r'^[0-9]{2}\.[0-9]{2}\.[0-9]{4}$')
         with open(filepath, 'r', encoding='Windows-1252') as infile:
 
             # Skip the first 4 lines of the file: Standard Comdirect Header
@@ -37,11 +34,11 @@ class Reader(Generic):
             date_format = "%d.%m.%Y"
             for row in reader:
                 date_tx = row['Buchungstag']
-                if re.match(r'^[0-9]{2}\.[0-9]{2}\.[0-9]{4}$', date_tx) is None:
+                if re_date.match(date_tx) is None:
                     # Skippe offene Buchungen oder Überschriften
                     continue
 
-                amount = float(row['Umsatz in EUR'].replace('.', '').replace(',', '.'))
+                amount = self._parse_amount(row['Umsatz in EUR'])
                 date_tx = self._parse_from_strftime(date_tx, date_format)
                 valuta = self._parse_from_strftime(row['Wertstellung (Valuta)'], date_format)
                 text_tx_match = rx.match(row['Buchungstext'])
@@ -62,9 +59,7 @@ class Reader(Generic):
                 if not line['amount']:
                     continue  # Skip Null-Buchungen
 
-                result.append(line)
-
-        return result
+                yield line
 
     def from_pdf(self, filepath):
         """
@@ -76,7 +71,7 @@ class Reader(Generic):
             ausgelesenen Kontoumsätzen entspricht.
         """
         # Nur Seiten mit den Tabellen analysieren
-        tables = camelot.read_pdf(
+        tables = self._read_pdf_tables(
             filepath,
             pages="2-end",
             flavor="stream",
@@ -91,11 +86,11 @@ class Reader(Generic):
 
         # Tabellen aller Seiten zusammenfügen
         all_rows = []
-        for t in tables[:-2]:
-            if not t.data:
+        for data in tables[:-2]:
+            if not data:
                 continue
 
-            all_rows.extend(t.data)
+            all_rows.extend(data)
 
         # Start bei den Kontoumsätzen
         start_index = 0
@@ -119,17 +114,13 @@ class Reader(Generic):
             if re_datecheck.match(row[0]) is None:
                 continue  # Skip Header and unvalid Rows
 
-            amount = float(row[4].replace('.', '').replace(',', '.'))
+            amount = self._parse_amount(row[4])
             date_format = "%d.%m.%Y"
             date_row = row[0].replace('\n', '')
 
             line = {
-                'date_tx': datetime.datetime.strptime(
-                        date_row[:10], date_format
-                    ).replace(tzinfo=datetime.timezone.utc).timestamp(),
-                'valuta': datetime.datetime.strptime(
-                        date_row[10:], date_format
-                    ).replace(tzinfo=datetime.timezone.utc).timestamp(),
+                'date_tx': self._parse_from_strftime(date_row[:10], date_format),
+                'valuta': self._parse_from_strftime(date_row[10:], date_format),
                 'art': row[1].replace('\n', '').replace(' ', ''),
                 'text_tx': self._newline_replace(row[3]),
                 'amount': amount,
@@ -1,9 +1,7 @@
 #!/usr/bin/python3 # pylint: disable=invalid-name
 """Reader für das Einlesen von Kontoumsätzen in dem Format, der Commerzbank."""
 
-import datetime
 import csv
-import camelot
 
 from reader.Generic import Reader as Generic
 
@@ -14,16 +12,14 @@ class Reader(Generic):
     Dieser Reader ist speziell für die Daten angepasst, wie sie bei der Commerzbank vorkommen.
     """
 
-    def from_csv(self, filepath):
+    def _csv_rows(self, filepath):
         """
         Liest Kontoumsätze von Kontoauszügen ein,
         die im CSV Format von der Commerzbank herintergeladen wurden.
 
-        Returns:
-            Liste mit Dictonaries, als Standard-Objekt mit allen ausgelesenen
-            Kontoumsätzen.
+        Yields:
+            Dictonary als Standard-Objekt je ausgelesenem Kontoumsatz.
         """
-        result = []
         with open(filepath, 'r', encoding='utf-8-sig') as infile:
 
             reader = csv.DictReader(infile, delimiter=';')
@@ -31,13 +27,9 @@ class Reader(Generic):
 
             for row in reader:
 
-                amount = float(row['Betrag'].replace('.', '').replace(',', '.'))
-                date_tx = datetime.datetime.strptime(
-                            row['Buchungstag'], date_format
-                        ).replace(tzinfo=datetime.timezone.utc).timestamp()
-                valuta = datetime.datetime.strptime(
-                            row['Wertstellung'], date_format
-                        ).replace(tzinfo=datetime.timezone.utc).timestamp()
+                amount = self._parse_amount(row['Betrag'])
+                date_tx = self._parse_from_strftime(row['Buchungstag'], date_format)
+                valuta = self._parse_from_strftime(row['Wertstellung'], date_format)
                 line = {
                     'date_tx': date_tx,
                     'valuta': valuta,
@@ -54,9 +46,7 @@ class Reader(Generic):
                 if not line['amount']:
                     continue  # Skip Null-Buchungen
 
-                result.append(line)
-
-        return result
+                yield line
 
     def from_pdf(self, filepath):
         """
@@ -67,7 +57,7 @@ class Reader(Generic):
             Liste mit Dictonaries, als Standard-Objekt mit allen
             ausgelesenen Kontoumsätzen entspricht.
         """
-        tables = camelot.read_pdf(
+        tables = self._read_pdf_tables(
             filepath,
             pages='all',
             flavor='stream',
@@ -83,11 +73,11 @@ class Reader(Generic):
 
         # Tabellen aller Seiten zusammenfügen
         self.all_rows = []
-        for t in tables:
-            if not t.data:
+        for data in tables:
+            if not data:
                 continue
 
-            self.all_rows.extend(t.data)
+            self.all_rows.extend(data)
 
         # Start bei den Kontoumsätzen
         start_index = 0
@@ -132,7 +122,7 @@ class Reader(Generic):
                 'valuta': self._parse_from_strftime(f"{row[1]}.{date_tx_year}", "%d.%m.%Y"),
                 'art': "",
                 'text_tx':  row[0],
-                'amount': float(amount.replace('.', '').replace(',', '.')),
+                'amount': self._parse_amount(amount),
                 'peer': row[0],
                 'currency': "EUR",
                 'parsed': {},
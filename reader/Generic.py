@@ -1,9 +1,26 @@
 #!/usr/bin/python3 # pylint: disable=invalid-name
 """Reader für das Einlesen von Kontoumsätzen in einem allgemeinen Format"""
 
+import os
 import datetime
+import functools
 import csv
 import re
+import multiprocessing
+from itertools import repeat
+from concurrent.futures import ProcessPoolExecutor
+
+import camelot
+from pypdf import PdfReader
+
+
+# Deutsche Beträge: Tausenderpunkte entfernen und Dezimalkomma zu Punkt
+AMOUNT_TRANSLATION = str.maketrans({'.': None, ',': '.'})
+
+# Mindestanzahl Seiten je Prozess beim Aufteilen eines PDF: Der Start eines Prozesses
+# (inkl. Import von camelot) kostet etwa so viel wie das Lesen von 4 Seiten
+# (siehe `python tests/benchmark_reader.py pdf`)
+MIN_PAGES_PER_WORKER = 5
 
 
 class Reader:
@@ -11,16 +28,59 @@ class Reader:
     Reader um aus übermittelten Daten Kontoführungsinformationen auszulesen.
     Dieser Reader ist allgemein und nicht speziell auf das Format einer Bank angepasst.
     """
-    def __init__(self):
+
+    # Version des Parsings (erhöhen, wenn sich die gelesenen Kontoumsätze ändern,
+    # damit Einträge im ParseCache ungültig werden)
+    VERSION = 1
+
+    def __init__(self, pdf_workers=1):
         """
         Initialisiert eine Instanz von Generic-Reader.
         Das Standard-Objekt, was vom Parsing zurückgegeben wird, 
         folgt dem Template in `Models.md` sofern die Felder mit den Informationen
         von hier sicher gefüllt werden können.
+
+        Args:
+            pdf_workers (int, optional): Anzahl der Prozesse, auf die die Seiten eines PDF
+                                         beim Einlesen aufgeteilt werden
+                                         (None: Anzahl der CPUs, Default: 1)
         """
         self.all_rows = []
+        self.pdf_workers = pdf_workers
 
     def from_csv(self, filepath):
+        """
+        Liest alle Kontoumsätze aus einer CSV Datei ein (siehe _csv_rows).
+
+        Returns:
+            Liste mit Dictonaries, als Standard-Objekt mit allen ausgelesenen
+            Kontoumsätzen.
+        """
+        return list(self._csv_rows(filepath))
+
+    def iter_csv(self, filepath, chunk_size=1000):
+        """
+        Liest Kontoumsätze aus einer CSV Datei blockweise ein, ohne die ganze
+        Datei im Speicher zu halten (siehe _csv_rows).
+
+        Args:
+            filepath (str): Pfad zur CSV Datei
+            chunk_size (int): Maximale Anzahl an Kontoumsätzen je Block
+        Yields:
+            Liste mit Dictonaries, als Standard-Objekt mit bis zu 'chunk_size'
+            Kontoumsätzen.
+        """
+        chunk = []
+        for line in self._csv_rows(filepath):
+            chunk.append(line)
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+
+        if chunk:
+            yield chunk
+
+    def _csv_rows(self, filepath):
         """
         Liest Kontoumsätze aus einer CSV Datei ein. Das Standardformat wird dabei mit einer
         Semikolon-separierten Liste pro Zeile angenommen, die dem Datenbankschema entspricht.
@@ -34,11 +94,9 @@ class Reader:
             - Erwartete Spalten (Reihenfolge egal, 'Gegenkonto' ist optional):
                 - Buchungstag, Valuta, Art, Betrag, Währung, Buchungstext, Gegenkonto
 
-        Returns:
-            Liste mit Dictonaries, als Standard-Objekt mit allen ausgelesenen
-            Kontoumsätzen.
+        Yields:
+            Dictonary als Standard-Objekt je ausgelesenem Kontoumsatz.
         """
-        result = []
         with open(filepath, 'r', encoding='utf-8') as infile:
 
             reader = csv.DictReader(infile, delimiter=';')
@@ -46,13 +104,9 @@ class Reader:
 
             for row in reader:
 
-                amount = float(row['Betrag'].replace('.', '').replace(',', '.'))
-                date_tx = datetime.datetime.strptime(
-                            row['Buchungstag'], date_format
-                        ).replace(tzinfo=datetime.timezone.utc).timestamp()
-                valuta = datetime.datetime.strptime(
-                            row['Valuta'], date_format
-                        ).replace(tzinfo=datetime.timezone.utc).timestamp()
+                amount = self._parse_amount(row['Betrag'])
+                date_tx = self._parse_from_strftime(row['Buchungstag'], date_format)
+                valuta = self._parse_from_strftime(row['Valuta'], date_format)
                 line = {
                     'date_tx': date_tx,
                     'valuta': valuta,
@@ -69,9 +123,7 @@ class Reader:
                 if not line['amount']:
                     continue  # Skip Null-Buchungen
 
-                result.append(line)
-
-        return result
+                yield line
 
     def from_pdf(self, filepath):
         """
@@ -97,10 +149,40 @@ class Reader:
         """
         raise NotImplementedError()
 
+    def _read_pdf_tables(self, filepath, pages='all', **kwargs):
+        """
+        Hilfsmethode um die Tabellen eines PDF mit `camelot.read_pdf` auszulesen.
+        Bei mehreren Prozessen (siehe pdf_workers) werden die Seiten in zusammenhängende
+        Bereiche mit mindestens MIN_PAGES_PER_WORKER Seiten aufgeteilt, parallel ausgelesen
+        und wieder in Reihenfolge der Seiten zusammengefügt.
+
+        Args:
+            filepath (str): Pfad zur PDF Datei
+            pages (str): Seiten wie bei `camelot.read_pdf` (z.B. 'all', '2-end', '1,3-5')
+            kwargs: Weitere Argumente für `camelot.read_pdf`
+
+        Returns:
+            list: Zeilen (Liste der Zellen) je Tabelle in Reihenfolge der Seiten
+        """
+        workers = self.pdf_workers or os.cpu_count() or 1
+        page_ranges = [pages]
+        if workers > 1:
+            page_count = len(PdfReader(filepath).pages)
+            page_ranges = split_pages(pages, page_count, workers, MIN_PAGES_PER_WORKER)
+
+        if len(page_ranges) < 2:
+            return read_pdf_pages(filepath, pages, kwargs)
+
+        # Spawn instead of fork: The reader may run in a thread of the app (e.g. a job)
+        spawn = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=len(page_ranges), mp_context=spawn) as executor:
+            results = executor.map(read_pdf_pages, repeat(filepath), page_ranges, repeat(kwargs))
+            return [table for tables in results for table in tables]
+
     def _parse_from_strftime(self, date_string, date_format):
         """
         Hilfsmethode um ein Datum aus einem String mit einem Format in einen UTC-Timestamp
-        umzuwandeln.
+        umzuwandeln. Die Ergebnisse werden zwischengespeichert (siehe parse_timestamp).
 
         Args:
             date_string (str): Datum als String
@@ -109,30 +191,132 @@ class Reader:
         Returns:
             int: UTC-Timestamp des übergebenen Datums
         """
-        try:
-            return datetime.datetime.strptime(
-                date_string, date_format
-            ).replace(tzinfo=datetime.timezone.utc).timestamp()
-
-        except ValueError as e:
-            if "day is out of range for month" in str(e):
-                # Handle invalid dates like 31.11.2023 -> 30.11.2023
-                split_char = re.search(r'[^\d]', date_string)
-                if not split_char:
-                    raise e  # No valid split character found
-
-                # Replace just the day part
-                split_char = split_char.group(0)
-                day_index = date_format.split(split_char).index('%d')
-                if day_index == -1:
-                    raise e  # No day part found in format
-
-                date_string_list = date_string.split(split_char)
-                date_string_list[day_index] = int(date_string_list[day_index]) - 1
-                date_string = split_char.join(map(str, date_string_list))
-
-                return self._parse_from_strftime(
-                    date_string, date_format
-                )
-
-            raise e  # Re-raise other ValueErrors
+        return parse_timestamp(date_string, date_format)
+
+    def _parse_amount(self, amount_string):
+        """
+        Hilfsmethode um einen Betrag im deutschen Format (z.B. '-1.234,56') in eine Zahl
+        umzuwandeln.
+
+        Args:
+            amount_string (str): Betrag als String
+
+        Returns:
+            float: Betrag
+        """
+        return float(amount_string.translate(AMOUNT_TRANSLATION))
+
+
+def read_file(reader_class, filepath, data_format='csv'):
+    """
+    Liest alle Kontoumsätze einer Datei mit einem Reader ein (z.B. in einem eigenen Prozess
+    beim Upload mehrerer Dateien). Die Seiten eines PDF werden dabei nicht weiter aufgeteilt.
+
+    Args:
+        reader_class (type): Klasse des Readers
+        filepath (str): Pfad zur Datei
+        data_format (str): Bezeichnung des Formats (http, csv, pdf)
+
+    Returns:
+        list: Dictonaries als Standard-Objekt mit allen ausgelesenen Kontoumsätzen
+    """
+    reader = reader_class(pdf_workers=1)
+    parsing_method = {
+        'pdf': reader.from_pdf,
+        'csv': reader.from_csv,
+        'http': reader.from_http
+    }.get(data_format)
+
+    return parsing_method(filepath) or []
+
+
+def read_pdf_pages(filepath, pages, kwargs):
+    """
+    Liest die Tabellen eines Seitenbereichs eines PDF aus.
+
+    Args:
+        filepath (str): Pfad zur PDF Datei
+        pages (str): Seiten wie bei `camelot.read_pdf`
+        kwargs (dict): Weitere Argumente für `camelot.read_pdf`
+
+    Returns:
+        list: Zeilen (Liste der Zellen) je Tabelle
+    """
+    return [t.data for t in camelot.read_pdf(filepath, pages=pages, **kwargs)]
+
+
+def split_pages(pages, page_count, parts, min_size=1):
+    """
+    Teilt die Seiten einer Angabe wie bei `camelot.read_pdf` (z.B. 'all', '2-end', '1,3-5')
+    in bis zu 'parts' zusammenhängende, etwa gleich große Bereiche auf.
+
+    Args:
+        pages (str): Seitenangabe
+        page_count (int): Anzahl der Seiten des PDF
+        parts (int): Maximale Anzahl der Bereiche
+        min_size (int, optional): Mindestanzahl Seiten je Bereich (bei weniger Seiten
+                                  werden entsprechend weniger Bereiche gebildet)
+
+    Returns:
+        list(str): Seitenangabe je Bereich in Reihenfolge der Seiten
+    """
+    numbers = []
+    for part in str(pages).replace(' ', '').split(','):
+        if part == 'all':
+            part = '1-end'
+
+        start, _, end = part.partition('-')
+        start = page_count if start == 'end' else int(start)
+        end = start if not end else page_count if end == 'end' else int(end)
+        numbers.extend(range(start, min(end, page_count) + 1))
+
+    if not numbers:
+        return []
+
+    parts = min(parts, len(numbers) // max(1, min_size))
+    size = -(-len(numbers) // max(1, parts))
+    return [
+        ','.join(map(str, numbers[i:i + size])) for i in range(0, len(numbers), size)
+    ]
+
+
+@functools.lru_cache(maxsize=8192)
+def parse_timestamp(date_string, date_format):
+    """
+    Wandelt ein Datum aus einem String mit einem Format in einen UTC-Timestamp um.
+    Ungültige Tage werden auf den letzten Tag des Monats korrigiert (z.B. 31.11.2023).
+    Da sich die Daten in Exporten der Banken stark wiederholen, werden die Ergebnisse
+    zwischengespeichert.
+
+    Args:
+        date_string (str): Datum als String
+        date_format (str): Formatstring wie von `datetime.strptime` verwendet
+
+    Returns:
+        int: UTC-Timestamp des übergebenen Datums
+    """
+    try:
+        return datetime.datetime.strptime(
+            date_string, date_format
+        ).replace(tzinfo=datetime.timezone.utc).timestamp()
+
+    except ValueError as e:
+        if "day is out of range for month" in str(e):
+            # Handle invalid dates like 31.11.2023 -> 30.11.2023
+            split_char = re.search(r'[^\d]', date_string)
+            if not split_char:
+                raise e  # No valid split character found
+
+            # Replace just the day part
+            split_char = split_char.group(0)
+            day_index = date_format.split(split_char).index('%d')
+            if day_index == -1:
+                raise e  # No day part found in format
+
+            date_string_list = date_string.split(split_char)
+            date_string_list[day_index] = int(date_string_list[day_index]) - 1
+            date_string = split_char.join(map(str, date_string_list))
+
+            return parse_timestamp(date_string, date_format)
+
+        raise e  # Re-raise other ValueErrors
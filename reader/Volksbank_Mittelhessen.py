@@ -1,10 +1,8 @@
 #!/usr/bin/python3 # pylint: disable=invalid-name
 """Reader für das Einlesen von Kontoumsätzen in den Formaten der Volksbank Mittelhessen."""
 
-import datetime
 import csv
 import re
-import camelot
 
 from reader.Generic import Reader as Generic
 
@@ -16,16 +14,14 @@ class Reader(Generic):
     Volksbank Mittelhessen vorkommen.
     """
 
-    def from_csv(self, filepath):
+    def _csv_rows(self, filepath):
         """
         Liest Kontoumsätze von Kontoauszügen ein,
         die im CSV Format von der Volksbank Mittelhessen herintergeladen wurden.
 
-        Returns:
-            Liste mit Dictonaries, als Standard-Objekt mit allen
-            ausgelesenen Kontoumsätzen.
+        Yields:
+            Dictonary als Standard-Objekt je ausgelesenem Kontoumsatz.
         """
-        result = []
         with open(filepath, 'r', encoding='utf-8') as infile:
 
             # Start Reading CSV content
@@ -37,13 +33,9 @@ class Reader(Generic):
                     # Skippe offene Buchungen / Hinweise
                     continue
 
-                amount = float(row['Betrag'].replace('.', '').replace(',', '.'))
-                date_tx = datetime.datetime.strptime(
-                            date_tx, date_format
-                        ).replace(tzinfo=datetime.timezone.utc).timestamp()
-                valuta = datetime.datetime.strptime(
-                            row['Valutadatum'], date_format
-                        ).replace(tzinfo=datetime.timezone.utc).timestamp()
+                amount = self._parse_amount(row['Betrag'])
+                date_tx = self._parse_from_strftime(date_tx, date_format)
+                valuta = self._parse_from_strftime(row['Valutadatum'], date_format)
 
                 line = {
                     'date_tx': date_tx,
@@ -64,9 +56,7 @@ class Reader(Generic):
                 if row.get('Mandatsreferenz'):
                     line['parsed']['Mandatsreferenz'] = row['Mandatsreferenz']
 
-                result.append(line)
-
-        return result
+                yield line
 
     def from_pdf(self, filepath):
         """
@@ -77,7 +67,7 @@ class Reader(Generic):
             Liste mit Dictonaries, als Standard-Objekt mit allen
             ausgelesenen Kontoumsätzen entspricht.
         """
-        tables = camelot.read_pdf(
+        tables = self._read_pdf_tables(
             filepath,
             pages="all", # End -1
             flavor="stream",
@@ -88,11 +78,11 @@ class Reader(Generic):
 
         # Tabellen aller Seiten zusammenfügen
         self.all_rows = []
-        for t in tables:
-            if not t.data:
+        for data in tables:
+            if not data:
                 continue
 
-            self.all_rows.extend(t.data)
+            self.all_rows.extend(data)
 
         # Start bei den Kontoumsätzen
         start_index = 0
@@ -127,14 +117,13 @@ class Reader(Generic):
             # Positives 'Haben' oder negatives 'Soll'
             amount_prefix = '' if row[3][-1] == 'H' else '-'
             amount = f"{amount_prefix}{re.sub(r'H|S', '', row[3]).strip()}"
-            amount = amount.replace('.', '').replace(',', '.')
 
             line = {
                 'date_tx': self._parse_from_strftime(f"{row[0]}{date_tx_year}", "%d.%m.%Y"),
                 'valuta': self._parse_from_strftime(f"{row[1]}{date_tx_year}", "%d.%m.%Y"),
                 'art': row[2],
                 'text_tx': "",
-                'amount': float(amount),
+                'amount': self._parse_amount(amount),
                 'peer': "",
                 'currency': "EUR",
                 'parsed': {},
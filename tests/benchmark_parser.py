@@ -0,0 +1,123 @@
+#!/usr/bin/python3 # pylint: disable=invalid-name
+"""
+Benchmark für die Parser: je Parser, mit Literal-Vorfilter (ParserEngine) und im Prozess-Pool.
+Aufruf: python tests/benchmark_parser.py [Anzahl Transaktionen] [Anzahl Prozesse]
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import random
+
+# Add Parent for importing from Modules
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(parent_dir)
+
+from handler.Rules import ParserEngine
+from handler.Tags import Tagger
+
+
+TEXTS = [
+    'EDEKA, München//München/ 2023-01-03T14:39:49 KFN 9 VJ 7777 Kartenzahlung',
+    'Wucherpfennig sagt Danke 88//HANNOV 2023-01-01T08:59:42 KFN 9 VJ 7777 Kartenzahlung',
+    'REWE Markt GmbH SAGT DANKE 2023-02-11T10:01:12 KFN 9 VJ 7777 Kartenzahlung',
+    'Stadt Halle 0000005112 OBJEKT 0001 ABGABEN LT. BESCHEID End-to-End-Ref.: '
+    '2023-01-00111-9090-0000005112 Mandatsref: M1111111 Gläubiger-ID: DE7000100000077777 '
+    'SEPA-BASISLASTSCHRIFT wiederholend',
+    'Vodafone GmbH Rechnung 123456789 EREF: 1234567890ABC MREF: VF4711 '
+    'CRED: DE12ZZZ00000012345 SEPA-BASISLASTSCHRIFT',
+    'Allianz Versicherung AG Beitrag 2023 Vertrag 12345 Mandatsref: AL12345 '
+    'Gläubiger-ID: DE93ZZZ00000000001',
+    'PayPal (Europe) S.a.r.l. et Cie., S.C.A. 1234567890 PP.1234.PP EREF: 1008123456789 '
+    'PP.1234.PP PAYPAL MREF: 5R4J224DMXXXX CRED: LU96ZZZ0000000000000000058',
+    'ARAL Station 4711 Tankstelle 2023-03-01T17:00:00 Kartenzahlung',
+    'Deutsche Bahn Fernverkehr Online-Ticket 2023-04-01',
+    'Sollzins für Überziehung 01.01.2023 - 31.03.2023',
+    'Gehalt Januar 2023 Arbeitgeber GmbH',
+    'Miete Wohnung 3. OG links Januar Dauerauftrag',
+]
+WORDS = ['Lastschrift', 'Gutschrift', 'Referenz', 'Kundennr', 'Kartenzahlung', 'Berlin',
+         'Hamburg', 'Rechnung', 'Vertrag', 'Online', 'Filiale', 'Dauerauftrag']
+
+
+# Typische benutzerdefinierte Parser (Literal am Anfang, in der Mitte oder ohne)
+USER_PARSERS = {
+    'Händler': r'([\w .,]+?)\s+SAGT DANKE',
+    'Kundennummer': r'(?i)Kundennr\.?\s([0-9]+)',
+    'Rechnungsnummer': r'Rechnung\s([0-9]+)',
+    'Kartenzahlung': r'([0-9T:-]{19})\sKFN\s[0-9]\sVJ',
+    'PayPal': r'([0-9]{10})\sPP\.[0-9]+\.PP',
+    'Vertrag': r'Vertrag\s([0-9]+)',
+}
+
+
+def load_parsers(user_parsers=False):
+    """Lädt und kompiliert die Standard-Parser (optional mit benutzerdefinierten Parsern)"""
+    path = os.path.join(parent_dir, 'settings', 'parser', '00-default.json')
+    with open(path, 'r', encoding='utf-8') as f:
+        parsers = {p['name']: p['regex'] for p in json.load(f)}
+
+    if user_parsers:
+        parsers.update(USER_PARSERS)
+
+    return {name: re.compile(regex) for name, regex in parsers.items()}
+
+
+def generate_rows(count):
+    """Erstellt synthetische Transaktionen"""
+    rnd = random.Random(42)
+    return [
+        {'parsed': {}, 'text_tx': f"{rnd.choice(TEXTS)} {' '.join(rnd.choices(WORDS, k=3))} {i}"}
+        for i in range(count)
+    ]
+
+
+def per_parser(parsers, rows):
+    """Bisheriges Vorgehen: jeder Parser auf jeden Text"""
+    for d in rows:
+        for name, regex in parsers.items():
+            re_match = regex.search(d['text_tx'])
+            if re_match:
+                d['parsed'][name] = re_match.group(1).strip()
+
+    return rows
+
+
+def benchmark(func, rows):
+    """Misst die Laufzeit des Parsings auf einer Kopie der Transaktionen"""
+    rows = [{'parsed': {}, 'text_tx': row['text_tx']} for row in rows]
+    start = time.perf_counter()
+    result = func(rows)
+    return time.perf_counter() - start, [row['parsed'] for row in result]
+
+
+def main():
+    """Vergleicht das Parsing je Parser mit der ParserEngine und parse_batch"""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else (os.cpu_count() or 1)
+    rows = generate_rows(count)
+    tagger = Tagger(None)
+
+    print(f"{count} Transaktionen, {workers} Prozesse für parse_batch")
+    for user_parsers in (False, True):
+        parsers = load_parsers(user_parsers)
+        engine = ParserEngine(parsers)
+
+        old, old_parsed = benchmark(lambda r, p=parsers: per_parser(p, r), rows)
+        new, new_parsed = benchmark(engine.parse, rows)
+        batch, batch_parsed = benchmark(
+            lambda r, e=engine: tagger.parse_batch(r, parsers=e, workers=workers), rows
+        )
+        assert old_parsed == new_parsed, 'Die ParserEngine verändert die Treffer !'
+        assert old_parsed == batch_parsed, 'parse_batch verändert die Treffer !'
+
+        print(f"{len(parsers)} Parser ({len(parsers) - len(engine.unfiltered)} mit Vorfilter)")
+        print(f"  re.search je Parser: {old:.2f}s")
+        print(f"  ParserEngine:        {new:.2f}s ({old / new:.1f}x)")
+        print(f"  parse_batch:         {batch:.2f}s ({old / batch:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
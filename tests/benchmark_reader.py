@@ -0,0 +1,185 @@
+#!/usr/bin/python3 # pylint: disable=invalid-name
+"""
+Benchmark für die Umwandlung von Datum und Betrag je Zeile beim Einlesen,
+mit strptime / str.replace und mit dem Zwischenspeicher und der Übersetzungstabelle.
+Aufruf: python tests/benchmark_reader.py [Anzahl Zeilen]
+
+Mit 'pdf' werden die Kosten je Seite beim Einlesen eines PDF und die Kosten für den Start
+eines Prozesses (inkl. Import von camelot) gemessen und daraus die Anzahl Seiten berechnet,
+ab der sich das Aufteilen auf mehrere Prozesse lohnt (siehe PDF_WORKERS).
+Aufruf: python tests/benchmark_reader.py pdf [Anzahl Seiten]
+"""
+
+import os
+import sys
+import time
+import random
+import datetime
+import tempfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+# Add Parent for importing from Modules
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(parent_dir)
+
+from reader.Generic import Reader as Generic, parse_timestamp, read_pdf_pages
+
+
+def generate_rows(count):
+    """Erstellt synthetische CSV Zeilen (Datum eines Jahres, deutsche Beträge)"""
+    rnd = random.Random(42)
+    start = datetime.date(2023, 1, 1)
+    rows = []
+    for _ in range(count):
+        date_tx = start + datetime.timedelta(days=rnd.randint(0, 364))
+        valuta = date_tx + datetime.timedelta(days=rnd.randint(0, 3))
+        amount = f"{rnd.uniform(-5000, 5000):,.2f}".translate(str.maketrans(',.', '.,'))
+        rows.append({
+            'Buchungstag': date_tx.strftime('%d.%m.%Y'),
+            'Valuta': valuta.strftime('%d.%m.%Y'),
+            'Betrag': amount,
+        })
+
+    return rows
+
+
+def convert_old(rows):
+    """Umwandlung wie bisher: zweimal strptime und zweimal str.replace je Zeile"""
+    result = []
+    for row in rows:
+        amount = float(row['Betrag'].replace('.', '').replace(',', '.'))
+        date_tx = datetime.datetime.strptime(
+                    row['Buchungstag'], "%d.%m.%Y"
+                ).replace(tzinfo=datetime.timezone.utc).timestamp()
+        valuta = datetime.datetime.strptime(
+                    row['Valuta'], "%d.%m.%Y"
+                ).replace(tzinfo=datetime.timezone.utc).timestamp()
+        result.append((date_tx, valuta, amount))
+
+    return result
+
+
+def convert_new(rows):
+    """Umwandlung mit den Hilfsmethoden des Generic Readers"""
+    reader = Generic()
+    result = []
+    for row in rows:
+        amount = reader._parse_amount(row['Betrag']) # pylint: disable=protected-access
+        date_tx = reader._parse_from_strftime(row['Buchungstag'], "%d.%m.%Y") # pylint: disable=protected-access
+        valuta = reader._parse_from_strftime(row['Valuta'], "%d.%m.%Y") # pylint: disable=protected-access
+        result.append((date_tx, valuta, amount))
+
+    return result
+
+
+def benchmark(method, rows):
+    """Wandelt alle Zeilen um und misst die Laufzeit"""
+    start = time.perf_counter()
+    result = method(rows)
+    return time.perf_counter() - start, result
+
+
+def write_pdf(path, pages, rows=40):
+    """Erstellt ein synthetisches PDF mit einer Tabelle aus Kontoumsätzen je Seite"""
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    page_ids = []
+    for page in range(pages):
+        lines = []
+        for row in range(rows):
+            y = 780 - row * 18
+            cells = ((60, f"{row % 28 + 1:02d}.01.2023"), (160, f"Buchung {page}-{row}"),
+                     (360, f"{row % 28 + 1:02d}.01.2023"), (480, f"-{row * 3 + page},{row:02d}"))
+            lines.extend(f"BT /F1 9 Tf {x} {y} Td ({text}) Tj ET" for x, text in cells)
+
+        stream = "\n".join(lines).encode()
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+                       b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>"
+                       % (len(objects)))
+        page_ids.append(len(objects))
+
+    kids = b" ".join(b"%d 0 R" % i for i in page_ids)
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, pages)
+
+    content = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, obj in enumerate(objects, 1):
+        offsets.append(len(content))
+        content += b"%d 0 obj\n%s\nendobj\n" % (number, obj)
+
+    xref = len(content)
+    content += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    content += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    content += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objects) + 1, xref)
+    with open(path, 'wb') as pdf:
+        pdf.write(content)
+
+
+def main_pdf():
+    """Vergleicht die Kosten je Seite mit den Kosten für den Start eines Prozesses"""
+    pages = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'statement.pdf')
+        write_pdf(path, pages)
+        kwargs = {'flavor': 'stream'}
+
+        # Im eigenen Prozess (camelot ist bereits importiert)
+        read_pdf_pages(path, '1', kwargs)
+        start = time.perf_counter()
+        tables = read_pdf_pages(path, 'all', kwargs)
+        per_page = (time.perf_counter() - start) / pages
+        assert len(tables) == pages, 'Es wurden nicht alle Seiten gelesen !'
+
+        # Start eines Prozesses mit dem Lesen einer Seite
+        spawn = multiprocessing.get_context('spawn')
+        start = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=1, mp_context=spawn) as executor:
+            executor.submit(read_pdf_pages, path, '1', kwargs).result()
+        overhead = time.perf_counter() - start - per_page
+
+        # Aufgeteilt auf alle CPUs
+        workers = os.cpu_count() or 1
+        start = time.perf_counter()
+        parallel = Generic(pdf_workers=workers)._read_pdf_tables(path, **kwargs) # pylint: disable=protected-access
+        parallel_time = time.perf_counter() - start
+        assert parallel == tables, 'Das Aufteilen verändert die Ergebnisse !'
+
+    # Ab n Seiten lohnt sich w > 1 Prozesse: n * t > overhead + n * t / w
+    print(f"{pages} Seiten, {workers} CPUs")
+    print(f"Je Seite:            {per_page:.3f}s")
+    print(f"Start eines Prozesses: {overhead:.3f}s")
+    print(f"Ein Prozess:         {per_page * pages:.2f}s")
+    print(f"{workers} Prozesse:          {parallel_time:.2f}s")
+    for w in (2, 4, 8):
+        print(f"Break-even bei {w} Prozessen: "
+              f"{overhead / (per_page * (1 - 1 / w)):.0f} Seiten")
+
+
+def main():
+    """Vergleicht die Kosten je Zeile der bisherigen und der neuen Umwandlung"""
+    if len(sys.argv) > 1 and sys.argv[1] == 'pdf':
+        main_pdf()
+        return
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    rows = generate_rows(count)
+
+    parse_timestamp.cache_clear()
+    old, old_result = benchmark(convert_old, rows)
+    new, new_result = benchmark(convert_new, rows)
+    assert old_result == new_result, 'Die Umwandlung verändert die Ergebnisse !'
+
+    print(f"{count} Zeilen")
+    print(f"strptime / replace:  {old:.2f}s ({old / count * 1e6:.2f}µs je Zeile)")
+    print(f"Cache / translate:   {new:.2f}s ({new / count * 1e6:.2f}µs je Zeile, "
+          f"{old / new:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/python3 # pylint: disable=invalid-name
+"""
+Benchmark für die Auswertung der Standard-Tagging-Regeln mit und ohne Literal-Vorfilter.
+Aufruf: python tests/benchmark_rules.py [Anzahl Transaktionen]
+"""
+
+import os
+import sys
+import json
+import time
+import random
+
+# Add Parent for importing from Modules
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(parent_dir)
+
+from handler.Rules import RuleEngine
+
+
+TEXTS = [
+    'EDEKA, München//München/ 2023-01-03T14:39:49 KFN 9 VJ 7777 Kartenzahlung',
+    'Wucherpfennig sagt Danke 88//HANNOV 2023-01-01T08:59:42 KFN 9 VJ 7777 Kartenzahlung',
+    'REWE Markt GmbH SAGT DANKE 2023-02-11T10:01:12 KFN 9 VJ 7777 Kartenzahlung',
+    'Stadt Halle 0000005112 OBJEKT 0001 ABGABEN LT. BESCHEID End-to-End-Ref.: 2023',
+    'ARAL Station 4711 Tankstelle 2023-03-01T17:00:00 Kartenzahlung',
+    'PayPal (Europe) S.a.r.l. et Cie., S.C.A. 1234567890 PP.1234.PP',
+    'Vodafone GmbH Rechnung 123456789 Kundennummer 987654',
+    'Allianz Versicherung AG Beitrag 2023 Vertrag 12345',
+    'Deutsche Bahn Fernverkehr Online-Ticket 2023-04-01',
+    'Sollzins für Überziehung 01.01.2023 - 31.03.2023',
+    'MEIN GARTENCENTER//Berlin 2023-01-02T12:57:02 KFN 9 VJ 7777 Kartenzahlung',
+    'DM FIL.2222 F:1111//Frankfurt/DE 2023-01-04T13:22:16 KFN 9 VJ 7777 Kartenzahlung',
+    'Gehalt Januar 2023 Arbeitgeber GmbH',
+    'Miete Wohnung 3. OG links Januar',
+    'Spende an Verein e.V. Mitgliedsbeitrag',
+]
+WORDS = ['Lastschrift', 'Gutschrift', 'Referenz', 'Kundennr', 'Kartenzahlung', 'Berlin',
+         'Hamburg', 'Rechnung', 'Vertrag', 'Online', 'Filiale', 'Dauerauftrag']
+
+
+def load_rules():
+    """Lädt die Standard-Tagging-Regeln mit dem Startfilter des Taggers"""
+    path = os.path.join(parent_dir, 'settings', 'rule', '00-default-tags.json')
+    with open(path, 'r', encoding='utf-8') as f:
+        raw_rules = json.load(f)
+
+    rules = {}
+    for rule in raw_rules:
+        condition = [{'key': 'prio', 'value': 99, 'compare': '<'}]
+        condition += rule.get('filter', [])
+        rules[rule.get('name')] = {'condition': condition, 'multi': rule.get('multi', 'AND')}
+
+    return rules
+
+
+def generate_rows(count):
+    """Erstellt synthetische Transaktionen"""
+    rnd = random.Random(42)
+    rows = []
+    for i in range(count):
+        text = f"{rnd.choice(TEXTS)} {' '.join(rnd.choices(WORDS, k=3))} {i}"
+        rows.append({
+            'uuid': str(i), 'prio': 0, 'tags': [], 'parsed': {},
+            'amount': round(rnd.uniform(-500, 500), 2),
+            'art': rnd.choice(['Lastschrift', 'Überweisung', 'Auszahlung']),
+            'text_tx': text,
+        })
+
+    return rows
+
+
+def benchmark(rules, rows, prefilter):
+    """Wendet alle Regeln an und misst die Laufzeit"""
+    engine = RuleEngine(rules, prefilter=prefilter)
+    start = time.perf_counter()
+    result = engine.run(rows, lambda r_name, row: None)
+    return time.perf_counter() - start, result['matched']
+
+
+def main():
+    """Vergleicht die Auswertung je Regel mit der vorgefilterten Auswertung"""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    rules = load_rules()
+    rows = generate_rows(count)
+
+    per_rule, per_rule_matched = benchmark(rules, rows, prefilter=False)
+    prefiltered, prefiltered_matched = benchmark(rules, rows, prefilter=True)
+    assert per_rule_matched == prefiltered_matched, 'Der Vorfilter verändert die Treffer !'
+
+    print(f"{len(rules)} Regeln, {count} Transaktionen")
+    print(f"re.search je Regel: {per_rule:.2f}s")
+    print(f"Literal-Vorfilter:  {prefiltered:.2f}s ({per_rule / prefiltered:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/python3 # pylint: disable=invalid-name
+"""
+Benchmark für das Lesen und Schreiben der TinyDB Datenbankdatei
+mit der Standard JSONStorage und der AtomicJSONStorage.
+Aufruf: python tests/benchmark_storage.py [Anzahl Transaktionen ...]
+"""
+
+import os
+import sys
+import time
+import random
+import tempfile
+
+from tinydb import JSONStorage
+
+# Add Parent for importing from Modules
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(parent_dir)
+
+from handler.TinyDb import AtomicJSONStorage
+
+
+def generate_db(count):
+    """Erstellt eine Datenbank mit synthetischen Transaktionen auf drei Konten"""
+    rnd = random.Random(42)
+    db = {'metadata': {}}
+    for i in range(count):
+        iban = f"DE8937040044053201300{i % 3}"
+        db.setdefault(iban, {})[str(i + 1)] = {
+            'uuid': f"{i:032x}", 'iban': iban, 'prio': 0,
+            'date_tx': 1672531200 + i * 600, 'valuta': 1672531200 + i * 600,
+            'art': rnd.choice(['Lastschrift', 'Überweisung', 'Auszahlung']),
+            'text_tx': f"EDEKA, München//München/ Kartenzahlung Referenz {i}",
+            'amount': round(rnd.uniform(-500, 500), 2), 'currency': 'EUR',
+            'category': rnd.choice([None, 'Lebensmittel', 'Freizeit']),
+            'tags': rnd.sample(['Supermarkt', 'Karte', 'Stadt', 'Miete'], k=2),
+            'parsed': {'Mandatsreferenz': f"M{i}"},
+        }
+
+    return db
+
+
+def benchmark(storage_cls, path, db):
+    """Misst einen vollständigen Schreib- und Lesevorgang"""
+    storage = storage_cls(path)
+    start = time.perf_counter()
+    storage.write(db)
+    written = time.perf_counter() - start
+
+    start = time.perf_counter()
+    result = storage.read()
+    read = time.perf_counter() - start
+
+    storage.close()
+    assert result == db, 'Die Daten wurden nicht korrekt gespeichert !'
+    return written, read
+
+
+def main():
+    """Vergleicht die Storages für verschiedene Datenbankgrößen"""
+    counts = [int(c) for c in sys.argv[1:]] or [10000, 100000, 500000]
+    print(f"JSON Codec der AtomicJSONStorage: {AtomicJSONStorage.codec_name()}")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for count in counts:
+            db = generate_db(count)
+            for storage_cls in (JSONStorage, AtomicJSONStorage):
+                path = os.path.join(tmp_dir, f"{storage_cls.__name__}.json")
+                written, read = benchmark(storage_cls, path, db)
+                size = os.path.getsize(path) / 1024 / 1024
+                print(f"{count:>7} Transaktionen ({size:.1f} MB), {storage_cls.__name__:<17}: "
+                      f"Schreiben {written:.2f}s, Lesen {read:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
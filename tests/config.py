@@ -22,3 +22,13 @@ DATABASE_URI = '/tmp/pynance-test' # For tiny (/path/to/)
 # For mongo: Collection name ('testdata')
 #DATABASE_NAME = 'testdata'
 DATABASE_NAME = 'testdata.json'
+
+# For tiny: Storage ('json': Standard TinyDB JSONStorage,
+#                    'fastjson': orjson/ujson (if installed) with atomic writes)
+DATABASE_STORAGE = 'fastjson'
+
+# For tiny: In-memory indexes (date_tx, amount, category, tags, uuid) for queries
+DATABASE_INDEX = True
+
+# For tiny: Columnar cache (NumPy) for vectorized filters and sums in stats
+DATABASE_COLUMNAR = True
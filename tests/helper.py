@@ -146,6 +146,7 @@ class MockDatabase:
 
     def __init__(self):
         """Konstruktor hinterlegt Variablen"""
+        self.metadata_version = 0
         self.query1 = [
             {
                 'key': 'prio', 'value': 1,
@@ -156,17 +157,10 @@ class MockDatabase:
             }
         ]
         self.query_categorize = [
-            {'key': 'prio', 'value': 1, 'compare': '<'},
-            {'key': 'tags', 'value': ['Stadt', 'Steuer'], 'compare': 'in'},
-            {'key': {'parsed': 'Gläubiger-ID'}, 'value': 'DE7000100000077777', 'compare': '=='}
+            {'key': 'prio', 'value': 1, 'compare': '<'}
         ]
         self.query_tag = [
-            {'key': 'prio', 'value': 99, 'compare': '<'},
-            {'key': 'text_tx', 'value': '(ABGABEN\\sLT\\.\\sBESCHEID)', 'compare': 'regex'}
-        ]
-        self.query_tag_multi = [
-            {'key': 'prio', 'value': 99, 'compare': '<'},
-            {'key': 'amount', 'value': 10000000, 'compare': 'gt'}
+            {'key': 'prio', 'value': 99, 'compare': '<'}
         ]
         self.query_ai = [
             {'key': 'category', 'value': None, 'compare': '=='},
@@ -248,13 +242,28 @@ class MockDatabase:
             return [self.db_all[0], self.db_all[2]]
 
         if condition == self.query_categorize:
-            return [{'uuid': 'test_categorize'}]
+            return [
+                {
+                'uuid': 'test_categorize', 'prio': 0, 'tags': ['Stadt'],
+                'parsed': {'Gläubiger-ID': 'DE7000100000077777'}
+                }, {
+                'uuid': 'test_categorize_no_match', 'prio': 0, 'tags': [], 'parsed': {}
+                }
+            ]
 
         if condition == self.query_tag:
-            return [{'uuid': 'test_tag'}]
-
-        if condition == self.query_tag_multi:
-            return [{'uuid': 'test_tag'}, {'uuid': 'test_tag2'}]
+            return [
+                {
+                'uuid': 'test_tag', 'prio': 0, 'tags': [], 'amount': 20000000.0,
+                'text_tx': 'Stadt Halle 0000005112 OBJEKT 0001 ABGABEN LT. BESCHEID'
+                }, {
+                'uuid': 'test_tag2', 'prio': 0, 'tags': [], 'amount': 30000000.0,
+                'text_tx': 'Sonstiges'
+                }, {
+                'uuid': 'test_tag_no_match', 'prio': 0, 'tags': [], 'amount': -11.63,
+                'text_tx': 'Wucherpfennig sagt Danke'
+                }
+            ]
 
         if condition == self.query_ai:
             return [
@@ -304,6 +313,29 @@ class MockDatabase:
 
         return {'updated': 0}
 
+    def update_many_by_uuid(self, updates, collection=None, merge=True): # pylint: disable=unused-argument
+        """
+        Nimmt alle Argumente der echten Funktion entgegen und prüft jede
+        Aktualisierung wie bei einem einzelnen Update.
+
+        Returns:
+            dict:
+                - updated, int: Anzahl der angeblich aktualisierten Datensätze
+        """
+        updated = 0
+        for uuid, data in updates.items():
+            condition = {'key': 'uuid', 'value': uuid}
+            updated += self.update(data, collection, condition).get('updated', 0)
+
+        return {'updated': updated}
+
+    def ruleset_version(self, collection, key): # pylint: disable=unused-argument
+        """Mock: Es wurde noch nie vollständig geprüft"""
+        return None
+
+    def set_ruleset_version(self, collection, key, version): # pylint: disable=unused-argument
+        """Mock: Speichert keine Version"""
+
     def filter_metadata(self, condition, *args, **kwargs): # pylint: disable=unused-argument
         """Mock der Filtermetadatenabfrage
         Args:
@@ -360,7 +392,7 @@ class MockDatabase:
                     "filter": [{
                         "key": "amount",
                         "value": 10000000,
-                        "compare": "gt"
+                        "compare": ">"
                     }]
                 }
             ]
@@ -5,6 +5,8 @@ import json
 import os
 import sys
 import io
+import time
+import socket
 from bs4 import BeautifulSoup
 
 # Add Parent for importing from 'app.py'
@@ -12,6 +14,7 @@ parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.append(parent_dir)
 
 from helper import get_testfile_contents
+from handler.Jobs import JobQueue
 
 EXAMPLE_CSV = os.path.join(
     os.path.dirname(os.path.realpath(__file__)),
@@ -176,6 +179,240 @@ def test_double_upload(test_app):
             assert len(rows) == 5, f"Es wurden zu viele Einträge ({len(rows)}) angelegt"
 
 
+def test_upload_batch(test_app):
+    """Testet den Upload mehrerer Dateien in einem Request (parallel eingelesen)"""
+    iban = 'DE89370400440532011000'
+    with test_app.app_context():
+
+        with test_app.test_client() as client:
+            content = get_testfile_contents(EXAMPLE_CSV, binary=True)
+            files = {
+                'file-batch': [
+                    (io.BytesIO(content), 'input_commerzbank.csv'),
+                    (io.BytesIO(b'Spalte;Andere\n1;2\n'), 'kaputt.csv'),
+                    (io.BytesIO(content), 'input_commerzbank_kopie.csv'),
+                    (io.BytesIO(b'%PDF-1.4\nkaputt\n'), 'kaputt.pdf', 'application/pdf'),
+                ],
+                'bank': 'Commerzbank'
+            }
+            result = client.post(
+                f"/api/upload/{iban}",
+                data=files, content_type='multipart/form-data'
+            )
+
+            # Check Response
+            assert result.status_code == 201, \
+                f"Die Seite hat den Upload nicht wie erwartet verarbeitet: {result.text}"
+            files = result.json.get('files')
+            assert [f.get('filename') for f in files] == \
+                ['input_commerzbank.csv', 'kaputt.csv', 'input_commerzbank_kopie.csv',
+                 'kaputt.pdf'], \
+                "Die Ergebnisse entsprechen nicht der Reihenfolge der Dateien"
+            assert files[0].get('inserted') == 5, "Die erste Datei wurde nicht gespeichert"
+            assert 'error' in files[1], "Die fehlerhafte Datei wurde nicht gemeldet"
+            assert files[2].get('inserted') == 0, \
+                "Die gleichen Transaktionen wurden doppelt gespeichert"
+            assert 'PdfStreamError' in files[3].get('error', ''), \
+                f"Das defekte PDF wurde nicht gemeldet: {files[3]}"
+            assert result.json.get('inserted') == 5, "Die Summe der Einträge ist falsch"
+
+            client.delete(f"/api/deleteDatabase/{iban}")
+
+
+def test_import_file_results(test_app):
+    """Testet, dass der Import einer Datei das Ergebnis nur einmal liefert"""
+    iban = 'DE89370400440532011000'
+    with test_app.app_context():
+        path = f"/tmp/{os.getpid()}-import.csv"
+        with open(path, 'wb') as f:
+            f.write(get_testfile_contents(EXAMPLE_CSV, binary=True))
+
+        results = list(test_app.host.import_file(path, iban, bank='Commerzbank'))
+        assert results == [{'inserted': 5, 'processed': 5}], \
+            f"Der Import liefert nicht genau ein Ergebnis je Block: {results}"
+        assert not os.path.exists(path), "Die Datei wurde nach dem Import nicht gelöscht"
+
+        test_app.host.db_handler.truncate(iban)
+
+
+def wait_for_job(client, job_id, timeout=30):
+    """Fragt den Status eines Jobs ab, bis dieser abgeschlossen ist"""
+    deadline = time.monotonic() + timeout
+    while True:
+        result = client.get(f"/api/jobs/{job_id}")
+        assert result.status_code == 200, f"Der Job {job_id} wurde nicht gefunden"
+        if result.json.get('status') in ('done', 'failed') or time.monotonic() > deadline:
+            return result.json
+
+        time.sleep(0.05)
+
+
+def test_background_jobs(test_app):
+    """Testet Upload, Tagging und Reparse als Hintergrund-Job"""
+    iban = 'DE89370400440532011000'
+    with test_app.app_context():
+
+        with test_app.test_client() as client:
+            # Upload
+            content = get_testfile_contents(EXAMPLE_CSV, binary=True)
+            files = {
+                'file-batch': (io.BytesIO(content), 'input_commerzbank.csv'),
+                'bank': 'Commerzbank',
+                'background': 'true'
+            }
+            result = client.post(
+                f"/api/upload/{iban}",
+                data=files, content_type='multipart/form-data'
+            )
+            assert result.status_code == 202, \
+                f"Der Upload wurde nicht als Job gestartet: {result.text}"
+
+            job = wait_for_job(client, result.json.get('job'))
+            assert job.get('status') == 'done', f"Der Upload-Job ist fehlgeschlagen: {job}"
+            assert job.get('name') == 'upload', "Die Bezeichnung des Jobs ist falsch"
+            assert job.get('result', {}).get('inserted') == 5, \
+                "Der Job hat nicht alle Einträge gespeichert"
+
+            # Tagging und Kategorisierung
+            result = client.put(f"/api/tag-and-cat/{iban}", json={'background': True})
+            assert result.status_code == 202, \
+                f"Das Tagging wurde nicht als Job gestartet: {result.text}"
+            job = wait_for_job(client, result.json.get('job'))
+            assert job.get('status') == 'done', f"Der Tagging-Job ist fehlgeschlagen: {job}"
+            assert 'tagged' in job.get('result', {}), "Das Ergebnis des Taggings fehlt"
+            assert isinstance(job['result'].get('entries'), int), \
+                "Das Ergebnis des Jobs enthält die Liste der Einträge statt der Anzahl"
+            assert job.get('progress'), "Der Tagging-Job hat keinen Fortschritt gespeichert"
+
+            # Reparse
+            result = client.put(f"/api/reparse/{iban}?background=1")
+            assert result.status_code == 202, \
+                f"Der Reparse wurde nicht als Job gestartet: {result.text}"
+            job = wait_for_job(client, result.json.get('job'))
+            assert job.get('status') == 'done', f"Der Reparse-Job ist fehlgeschlagen: {job}"
+            assert job.get('result', {}).get('processed') == 5, \
+                "Der Reparse hat nicht alle Einträge verarbeitet"
+
+            # Unbekannter Job
+            result = client.get("/api/jobs/unbekannt")
+            assert result.status_code == 404, "Ein unbekannter Job wurde gefunden"
+
+            client.delete(f"/api/deleteDatabase/{iban}")
+
+
+def test_job_cleanup(test_app):
+    """Testet das Löschen abgelaufener und das Abbrechen verwaister Jobs beim Start"""
+    with test_app.app_context():
+        db_handler = test_app.host.db_handler
+        now = time.time()
+        jobs = {
+            'job-expired': {'status': 'done', 'updated': now - 3600},
+            'job-recent': {'status': 'failed', 'updated': now},
+            'job-orphaned': {'status': 'running', 'updated': now - 3600, 'pid': os.getpid()},
+            'job-remote': {'status': 'queued', 'updated': now - 3600, 'host': 'anderer-host'},
+        }
+        for uuid, job in jobs.items():
+            db_handler.save_job({'uuid': uuid, 'name': 'test', 'host': socket.gethostname(),
+                                 'pid': 1, **job})
+
+        try:
+            JobQueue(db_handler, test_app, ttl=60)
+            assert db_handler.get_job('job-expired') is None, \
+                "Ein abgelaufener Job wurde nicht gelöscht"
+            assert db_handler.get_job('job-recent').get('status') == 'failed', \
+                "Ein nicht abgelaufener Job wurde gelöscht"
+            assert db_handler.get_job('job-orphaned').get('status') == 'failed', \
+                "Ein verwaister Job wurde nicht als fehlgeschlagen markiert"
+            assert db_handler.get_job('job-remote').get('status') == 'queued', \
+                "Ein Job eines anderen Rechners wurde geändert"
+
+        finally:
+            db_handler.save_job({'uuid': 'job-remote', 'status': 'done', 'updated': now})
+            db_handler.delete_jobs(time.time() + 1)
+
+
+def test_reparse_changed_only(test_app, monkeypatch):
+    """Testet, dass der Reparse nur geänderte Transaktionen blockweise speichert"""
+    iban = 'DE89370400440532011000'
+    monkeypatch.setitem(test_app.config, 'REPARSE_CHUNK_SIZE', 2)
+    with test_app.app_context():
+        db_handler = test_app.host.db_handler
+
+        with test_app.test_client() as client:
+            content = get_testfile_contents(EXAMPLE_CSV, binary=True)
+            files = {
+                'file-batch': (io.BytesIO(content), 'input_commerzbank.csv'),
+                'bank': 'Commerzbank'
+            }
+            client.post(f"/api/upload/{iban}", data=files, content_type='multipart/form-data')
+
+            # Neuer Parser trifft 4 der 5 Transaktionen
+            db_handler.set_metadata({
+                'uuid': 'reparse-test', 'metatype': 'parser',
+                'name': 'Kartenfolgenummer', 'regex': 'KFN ([0-9]+)'
+            })
+            try:
+                for expected in (4, 0):
+                    result = client.put(f"/api/reparse/{iban}")
+                    lines = [json.loads(line) for line in result.text.splitlines()]
+                    assert [line['processed'] for line in lines] == [2, 4, 5], \
+                        f"Die Blöcke entsprechen nicht REPARSE_CHUNK_SIZE: {lines}"
+                    assert all(line['count'] == 5 for line in lines), "Die Anzahl ist falsch"
+                    assert sum(line['updated'] for line in lines) == expected, \
+                        f"Es wurden nicht nur geänderte Transaktionen gespeichert: {lines}"
+
+                parsed = [row['parsed'] for row in db_handler.select(iban)]
+                assert sum('Kartenfolgenummer' in p for p in parsed) == 4, \
+                    "Das Ergebnis des neuen Parsers wurde nicht gespeichert"
+
+            finally:
+                db_handler.delete_metadata('reparse-test')
+                client.delete(f"/api/deleteDatabase/{iban}")
+
+
+
+def test_reparse_resets_tagging(test_app):
+    """Testet, dass reparste Transaktionen beim inkrementellen Tagging erneut geprüft werden"""
+    iban = 'DE89370400440532011000'
+    with test_app.app_context():
+        db_handler = test_app.host.db_handler
+
+        with test_app.test_client() as client:
+            content = get_testfile_contents(EXAMPLE_CSV, binary=True)
+            files = {
+                'file-batch': (io.BytesIO(content), 'input_commerzbank.csv'),
+                'bank': 'Commerzbank'
+            }
+            client.post(f"/api/upload/{iban}", data=files, content_type='multipart/form-data')
+
+            # Regel auf einen Wert, den noch kein Parser liefert
+            db_handler.set_metadata({
+                'uuid': 'reparse-rule', 'metatype': 'rule', 'name': 'Kartenfolge 9',
+                'tags': ['KFN-Test'], 'parsed': {'Kartenfolge': 'KFN 9'}
+            })
+            try:
+                test_app.host.tagger.tag_and_cat(iban)
+                rows = db_handler.select(iban)
+                assert rows and all(r.get('tag_version') for r in rows), \
+                    "Nicht alle Transaktionen wurden als getaggt markiert"
+
+                # Neuer Parser liefert den Wert erst nach dem Reparse
+                db_handler.set_metadata({
+                    'uuid': 'reparse-test', 'metatype': 'parser',
+                    'name': 'Kartenfolge', 'regex': '(KFN [0-9]+)'
+                })
+                client.put(f"/api/reparse/{iban}")
+
+                test_app.host.tagger.tag_and_cat(iban, incremental=True)
+                tagged = [r for r in db_handler.select(iban) if 'KFN-Test' in (r.get('tags') or [])]
+                assert len(tagged) == 4, \
+                    f"Die Regel auf den geparsten Wert hat nach dem Reparse nicht getroffen: {tagged}"
+
+            finally:
+                db_handler.delete_metadata('reparse-test')
+                db_handler.delete_metadata('reparse-rule')
+                client.delete(f"/api/deleteDatabase/{iban}")
+
 def test_save_meta(test_app):
     """Testet das Speichern Metadaten"""
     with test_app.app_context():
@@ -916,3 +1153,88 @@ def test_remove_tag_multi(test_app):
                 "Die Tags wurden nicht entfernt"
             assert result.get('prio') != 0, \
                 "Die Prio wurde geändert"
+
+
+def test_transactions_cursor(test_app):
+    """Testet das seitenweise Laden der Transaktionen mit einem Cursor"""
+    with test_app.app_context():
+
+        with test_app.test_client() as client:
+            iban = "DE89370400440532013000"
+            result = client.get(f"/api/transactions/{iban}?limit=3")
+            assert result.status_code == 200, "Die erste Seite konnte nicht geladen werden"
+            first = result.json
+            assert len(first.get('transactions')) == 3 and first.get('cursor'), \
+                f"Die erste Seite ist unvollständig: {first}"
+
+            result = client.get(f"/api/transactions/{iban}?limit=3&cursor={first['cursor']}")
+            second = result.json
+            first_ids = {t.get('uuid') for t in first.get('transactions')}
+            assert second.get('transactions') and \
+                not first_ids & {t.get('uuid') for t in second.get('transactions')}, \
+                "Die zweite Seite wiederholt Transaktionen der ersten Seite"
+
+            # HTML Seite mit Cursor für die nächste Seite
+            result = client.get(f"/{iban}?cursor={first['cursor']}")
+            assert result.status_code == 200, "Die HTML Seite konnte nicht geladen werden"
+            assert second['transactions'][0]['uuid'] in result.text, \
+                "Die HTML Seite enthält nicht die Transaktionen nach dem Cursor"
+
+            result = client.get(f"/api/transactions/{iban}?cursor=kaputt")
+            assert result.status_code == 400, "Ein ungültiger Cursor wurde akzeptiert"
+
+
+def test_distinct_values(test_app):
+    """Testet das Abrufen der unterschiedlichen Tags und Kategorien"""
+    with test_app.app_context():
+
+        with test_app.test_client() as client:
+            iban = "DE89370400440532013000"
+            result = client.get(f"/api/{iban}/distinct/tags")
+            assert result.status_code == 200, "Die Tags konnten nicht abgerufen werden"
+            tags = result.json.get('values')
+            assert tags == sorted(set(tags)), f"Die Tags sind nicht eindeutig sortiert: {tags}"
+
+            expected = set()
+            for row in test_app.host.db_handler.select(iban):
+                expected.update(row.get('tags') or [])
+            assert set(tags) == expected, f"Es fehlen Tags: {expected - set(tags)}"
+
+            result = client.get(f"/api/{iban}/distinct/category")
+            cats = result.json.get('values')
+            assert None not in cats and '' not in cats, \
+                f"Leere Kategorien wurden zurückgegeben: {cats}"
+
+            result = client.get("/api/unbekannt/distinct/tags")
+            assert result.status_code == 404, "Eine unbekannte Gruppe wurde akzeptiert"
+
+
+def test_statsapi_timeseries(test_app):
+    """Testet die Zeitreihe der Einnahmen und Ausgaben"""
+    with test_app.app_context():
+
+        with test_app.test_client() as client:
+            iban = "DE89370400440532013000"
+            result = client.get(f"/api/stats/{iban}/timeseries")
+            assert result.status_code == 200, "Die Zeitreihe konnte nicht abgerufen werden"
+            series = result.json.get('series')
+            assert series and result.json.get('interval') == 'month', \
+                f"Die Zeitreihe ist unvollständig: {result.json}"
+            assert all(len(s['period']) == 7 for s in series), \
+                f"Die Monate sind falsch formatiert: {series}"
+
+            # ...mit Filter
+            result = client.get(
+                f"/api/stats/{iban}/timeseries?interval=week&split=category"
+                "&startDate=02.01.2023&endDate=03.01.2023")
+            assert result.status_code == 200, "Die gefilterte Zeitreihe ist nicht erreichbar"
+            filtered = result.json.get('series')
+            assert filtered and all(len(s['period']) == 10 and 'category' in s
+                                    for s in filtered), \
+                f"Die gefilterte Zeitreihe ist falsch: {filtered}"
+            assert sum(s['income'] - s['expense'] for s in filtered) < \
+                sum(s['income'] - s['expense'] for s in series), \
+                "Der Filter wurde bei der Zeitreihe nicht angewendet"
+
+            result = client.get(f"/api/stats/{iban}/timeseries?interval=day")
+            assert result.status_code == 400, "Ein ungültiges Intervall wurde akzeptiert"
@@ -76,3 +76,89 @@ def test_add_or_update_tags(test_app):
         # Update tag (remove all)
         assert test_app.host.remove_tags(iban, tid) == {'updated': 1}, \
             "Es wurde keine Transaktion geändert (remove_tags)"
+
+
+def test_incremental_tag_and_cat(test_app, monkeypatch):
+    """Test that incremental runs only check new or changed transactions"""
+
+    with test_app.app_context():
+
+        iban = "DE89370400440532013000"
+        tid = "6884802db5e07ee68a68e2c64f9c0cdd"
+
+        # Full run marks every checked transaction
+        full = test_app.host.tagger.tag_and_cat(iban)
+        assert full.get('entries'), "Der vollständige Lauf hat keine Transaktionen getroffen"
+
+        rows = test_app.host.db_handler.select(iban)
+        assert all(r.get('tag_version') for r in rows), \
+            "Nicht alle Transaktionen wurden als getaggt markiert"
+
+        # Nothing changed: nothing to check
+        r = test_app.host.tagger.tag_and_cat(iban, incremental=True)
+        assert r == {'tagged': 0, 'categorized': 0, 'entries': []}, \
+            f"Der inkrementelle Lauf hat unveränderte Transaktionen geprüft: {r}"
+
+        # Repeated full run: unchanged transactions are not written again
+        writes = []
+        update_many = test_app.host.db_handler.update_many_by_uuid
+
+        def spy(updates, *args, **kwargs):
+            writes.extend(updates)
+            return update_many(updates, *args, **kwargs)
+
+        monkeypatch.setattr(test_app.host.db_handler, 'update_many_by_uuid', spy)
+        test_app.host.tagger.tag_and_cat(iban)
+        assert not writes, \
+            f"Der wiederholte Lauf hat unveränderte Transaktionen gespeichert: {writes}"
+        monkeypatch.undo()
+
+        # Manual changes reset the mark
+        test_app.host.set_manual_tag_and_cat(iban, tid, ['Bäckerei'], overwrite=True)
+        condition = {'key': 'uuid', 'value': tid}
+        row = test_app.host.db_handler.select(iban, condition)[0]
+        assert row.get('tag_version') is None and row.get('cat_version') is None, \
+            "Die Markierung wurde bei einer manuellen Änderung nicht zurückgesetzt"
+
+        test_app.host.tagger.tag_and_cat(iban, incremental=True)
+        row = test_app.host.db_handler.select(iban, condition)[0]
+        assert row.get('tag_version') is not None, \
+            "Die geänderte Transaktion wurde nicht erneut geprüft"
+
+
+def test_upload_with_autotag(test_app):
+    """Test tagging and categorizing uploaded transactions before they are stored"""
+
+    with test_app.app_context():
+
+        with test_app.test_client() as client:
+
+            iban = "DE89370400440532013000"
+            result = client.delete(f"/api/deleteDatabase/{iban}")
+            assert result.status_code == 200, "Fehler beim Leeren der Datenbank"
+
+            content = get_testfile_contents(EXAMPLE_CSV, binary=True)
+            files = {
+                'file-batch': (io.BytesIO(content), 'input_commerzbank.csv'),
+                'bank': 'Commerzbank',
+                'autotag': 'true'
+            }
+            result = client.post(
+                f"/api/upload/{iban}",
+                data=files, content_type='multipart/form-data'
+            )
+            assert result.status_code == 201, \
+                f"Die Seite hat den Upload nicht wie erwartet verarbeitet: {result.text}"
+            assert result.json.get('tagged'), \
+                f"Beim Upload wurde nichts getaggt: {result.json}"
+
+        # Stored rows are marked as checked
+        rows = test_app.host.db_handler.select(iban)
+        assert rows and all(r.get('tag_version') for r in rows), \
+            "Nicht alle importierten Transaktionen wurden als getaggt markiert"
+        assert any(r.get('tags') for r in rows), \
+            "Keine importierte Transaktion wurde getaggt gespeichert"
+
+        r = test_app.host.tagger.tag_and_cat(iban, incremental=True)
+        assert r == {'tagged': 0, 'categorized': 0, 'entries': []}, \
+            f"Beim Import getaggte Transaktionen wurden erneut geprüft: {r}"
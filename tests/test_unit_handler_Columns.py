@@ -0,0 +1,147 @@
+#!/usr/bin/python3 # pylint: disable=invalid-name
+"""Testmodul für den spaltenorientierten Cache der TinyDB."""
+
+import os
+import sys
+import pytest
+
+# Add Parent for importing from Modules
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(parent_dir)
+
+from helper import generate_fake_data
+from handler.Columns import ColumnCache
+
+
+def get_raw_table():
+    """Liefert einen Table mit Fake-Transaktionen in der Form der TinyDB Rohdaten"""
+    return {
+        '1': {'uuid': 'a', 'date_tx': 100, 'valuta': None, 'amount': -10.5, 'prio': 0,
+              'category': None, 'tags': [], 'peer': 'EDEKA'},
+        '2': {'uuid': 'b', 'date_tx': 200, 'valuta': 200, 'amount': 20, 'prio': 1,
+              'category': 'Lebensmittel', 'tags': ['Supermarkt', 'Karte'], 'art': 'Lastschrift'},
+        '3': {'uuid': 'c', 'date_tx': 200, 'valuta': 250, 'amount': -99.9, 'prio': 2,
+              'category': 'Lebensmittel', 'tags': ['Karte', 'Karte']},
+        '5': {'uuid': 'd', 'date_tx': 300, 'valuta': 300, 'amount': None, 'prio': 99,
+              'category': 'Miete', 'tags': None, 'peer': 'Vermieter'},
+    }
+
+
+def matches(query, doc):
+    """Wendet eine TinyDB Query an (leere Werte sind nicht vergleichbar)"""
+    try:
+        return query(doc)
+    except TypeError:
+        return False
+
+
+def test_column_mask(test_app):
+    """Testet, dass die Masken die gleichen Dokumente wie die TinyDB Query liefern"""
+    if test_app.config['DATABASE_BACKEND'] != 'tiny':
+        pytest.skip("Nur für TinyDB relevant")
+
+    with test_app.app_context():
+        db_handler = test_app.host.db_handler
+        raw_table = get_raw_table()
+        columns = ColumnCache(raw_table)
+
+        conditions = [
+            ({'key': 'date_tx', 'value': 200}, 'AND'),
+            ({'key': 'amount', 'value': '-50', 'compare': '<'}, 'AND'),
+            ({'key': 'valuta', 'value': 250, 'compare': '>='}, 'AND'),
+            ({'key': 'category', 'value': 'Lebensmittel'}, 'AND'),
+            ({'key': 'category', 'value': None}, 'AND'),
+            ({'key': 'category', 'value': 'Miete', 'compare': '!='}, 'AND'),
+            ({'key': 'peer', 'value': 'EDEKA', 'compare': '!='}, 'AND'),
+            ({'key': 'uuid', 'value': 'c'}, 'AND'),
+            ({'key': 'tags', 'value': ['Karte'], 'compare': 'in'}, 'AND'),
+            ({'key': 'tags', 'value': ['Supermarkt'], 'compare': 'notin'}, 'AND'),
+            ({'key': 'tags', 'value': ['Karte', 'Supermarkt'], 'compare': 'all'}, 'AND'),
+            ({'key': 'tags', 'value': ['Karte'], 'compare': 'exact'}, 'AND'),
+            ({'key': 'tags', 'value': [], 'compare': 'exact'}, 'AND'),
+            ([{'key': 'amount', 'value': 0, 'compare': '>'},
+              {'key': 'category', 'value': None}], 'OR'),
+            ([{'key': 'prio', 'value': 2, 'compare': '<'},
+              {'key': 'tags', 'value': ['Karte'], 'compare': 'in'},
+              {'key': 'category', 'value': 'Miete'}], 'OR'),
+        ]
+        for condition, multi in conditions:
+            query = db_handler._form_complete_query(condition, multi)
+            expected = [int(i) for i, doc in raw_table.items() if matches(query, doc)]
+            mask = columns.mask(condition, multi)
+            assert mask is not None, f"Die Condition {condition} wird nicht unterstützt"
+            assert columns.documents(mask) == expected, \
+                f"Falsche Dokumente für {condition}: {columns.documents(mask)} != {expected}"
+
+        assert columns.mask({'key': 'text_tx', 'value': 'EDEKA', 'compare': 'like'}) is None, \
+            "Eine nicht unterstützte Condition liefert eine Maske"
+
+
+def test_column_mask_missing_key(test_app):
+    """Testet, dass '!=' auf Zahlenspalten wie die Query nicht auf fehlende Schlüssel trifft"""
+    if test_app.config['DATABASE_BACKEND'] != 'tiny':
+        pytest.skip("Nur für TinyDB relevant")
+
+    with test_app.app_context():
+        db_handler = test_app.host.db_handler
+        raw_table = get_raw_table()
+        raw_table['6'] = {'uuid': 'e', 'date_tx': 400, 'prio': 0, 'tags': []}
+        columns = ColumnCache(raw_table)
+
+        for key in ('valuta', 'amount'):
+            condition = {'key': key, 'value': 300, 'compare': '!='}
+            query = db_handler._form_complete_query(condition)
+            expected = [int(i) for i, doc in raw_table.items() if matches(query, doc)]
+            assert 6 not in expected, f"Die Query trifft den fehlenden Schlüssel {key}"
+            assert columns.documents(columns.mask(condition)) == expected, \
+                f"Falsche Dokumente für {condition}: {columns.documents(columns.mask(condition))}"
+
+
+def test_column_group_sums():
+    """Testet die Summen je Kategorie und Tag"""
+    columns = ColumnCache(get_raw_table())
+    mask = columns.mask(None)
+    assert columns.group_sums(mask, 'category') == \
+        pytest.approx({None: -10.5, 'Lebensmittel': -79.9, 'Miete': 0.0})
+    assert columns.group_sums(mask, 'tags') == \
+        pytest.approx({None: -10.5, 'Supermarkt': 20, 'Karte': 20 - 2 * 99.9})
+    assert columns.group_sums(mask, 'peer') == \
+        pytest.approx({None: -79.9, 'EDEKA': -10.5, 'Vermieter': 0.0})
+
+
+def test_aggregate_with_columns(test_app):
+    """Testet, dass Abfragen und Summen mit und ohne Spalten-Cache gleich sind"""
+    if test_app.config['DATABASE_BACKEND'] != 'tiny':
+        pytest.skip("Nur für TinyDB relevant")
+
+    with test_app.app_context():
+        db_handler = test_app.host.db_handler
+        iban = 'DE89370400440532013000'
+        db_handler.insert(generate_fake_data(5), iban)
+
+        condition = [{'key': 'amount', 'value': -50, 'compare': '<'},
+                     {'key': 'date_tx', 'value': 1672617600, 'compare': '>='}]
+        use_columns = db_handler.use_columns
+        try:
+            db_handler.use_columns = True
+            with_columns = (
+                db_handler.select(iban, condition),
+                db_handler._aggregate_sums(iban, condition, 'AND', ['category', 'tags']),
+                db_handler._aggregate_timeseries(iban, condition, 'AND', 'week', 'category'),
+            )
+            db_handler.use_columns = False
+            without_columns = (
+                db_handler.select(iban, condition),
+                db_handler._aggregate_sums(iban, condition, 'AND', ['category', 'tags']),
+                db_handler._aggregate_timeseries(iban, condition, 'AND', 'week', 'category'),
+            )
+
+        finally:
+            db_handler.use_columns = use_columns
+
+        assert with_columns[0] == without_columns[0], "Der Spalten-Cache verändert die Abfrage"
+        for key in ('category', 'tags'):
+            assert with_columns[1][key] == pytest.approx(without_columns[1][key]), \
+                f"Der Spalten-Cache verändert die Summen für {key}"
+        assert with_columns[2] == pytest.approx(without_columns[2]), \
+            "Der Spalten-Cache verändert die Zeitreihe"
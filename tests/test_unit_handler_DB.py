@@ -3,12 +3,17 @@
 
 import os
 import sys
+import datetime
+import pytest
+from tinydb import TinyDB
 
 # Add Parent for importing from Modules
 parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.append(parent_dir)
 
 from helper import generate_fake_data, check_entry
+from handler.TinyDb import (FileLockMiddleware, RevalidatingCacheMiddleware,
+                             AtomicJSONStorage, TinyDbHandler)
 
 
 def test_add_and_get_group(test_app):
@@ -285,6 +290,40 @@ def test_update(test_app):
             check_entry(entry, data)
 
 
+def test_update_many_by_uuid(test_app):
+    """Testet das Aktualisieren mehrerer Datensätze mit individuellen Daten"""
+    with test_app.app_context():
+        updates = {
+            '13d505688ab3b940dbed47117ffddf95': {'tags': ['Bulk1']},
+            'ba9e5795e4029213ae67ac052d378d84': {'tags': ['Bulk2']},
+        }
+        updated_db = test_app.host.db_handler.update_many_by_uuid(updates,
+                                                                  'DE89370400440532013000')
+        update_many = updated_db.get('updated')
+        assert update_many == 2, \
+            f'Es wurde nicht die richtige Anzahl geupdated (update_many): {update_many}'
+
+        # Merge lists with existing values
+        updates = {'13d505688ab3b940dbed47117ffddf95': {'tags': ['Bulk2']}}
+        test_app.host.db_handler.update_many_by_uuid(updates, 'DE89370400440532013000')
+
+        query = {'key': 'uuid', 'value': '13d505688ab3b940dbed47117ffddf95'}
+        result = test_app.host.db_handler.select("DE89370400440532013000", condition=query)
+        assert sorted(result[0].get('tags')) == ['Bulk1', 'Bulk2'], \
+            f"Die Tags wurden nicht zusammengeführt: {result[0].get('tags')}"
+
+        # Overwrite lists
+        updates = {
+            '13d505688ab3b940dbed47117ffddf95': {'tags': []},
+            'ba9e5795e4029213ae67ac052d378d84': {'tags': []},
+        }
+        test_app.host.db_handler.update_many_by_uuid(updates, 'DE89370400440532013000',
+                                                     merge=False)
+        result = test_app.host.db_handler.select("DE89370400440532013000", condition=query)
+        assert result[0].get('tags') == [], \
+            f"Die Tags wurden nicht überschrieben: {result[0].get('tags')}"
+
+
 def test_select_nested(test_app):
     """Testet das Auslesen von verschachtelten Datenätzen"""
     with test_app.app_context():
@@ -389,6 +428,195 @@ def test_min_max_count(test_app):
         assert stats.get('count') == 5, f"Die Anzahl der Einträge ist falsch: {stats.get('count')}"
 
 
+def test_aggregate_sums(test_app):
+    """Testet das Summieren der Beträge je Kategorie und Tag"""
+    with test_app.app_context():
+        db_handler = test_app.host.db_handler
+        iban = 'DE89370400440532013000'
+        condition = {'key': 'amount', 'value': -50, 'compare': '<'}
+        rows = db_handler.select(iban, condition)
+
+        expected = {'category': {}, 'tags': {}}
+        for row in rows:
+            cat = row.get('category')
+            expected['category'][cat] = expected['category'].get(cat, 0.0) + row['amount']
+            for tag in row.get('tags') or [None]:
+                expected['tags'][tag] = expected['tags'].get(tag, 0.0) + row['amount']
+
+        sums = db_handler.aggregate_sums(iban, condition)
+        for key, values in expected.items():
+            assert sums[key] == pytest.approx(values), \
+                f"Die Summen für {key} sind falsch: {sums[key]} != {values}"
+
+        sums = db_handler.aggregate_sums(iban, group_by=['category'])
+        assert list(sums.keys()) == ['category'], f"Falsche Gruppierung: {sums.keys()}"
+        assert sum(sums['category'].values()) == pytest.approx(
+            sum(r['amount'] for r in db_handler.select(iban))
+        ), "Die Summe über alle Kategorien stimmt nicht mit der Summe aller Beträge überein"
+
+
+def test_rollups(test_app):
+    """Testet die monatlichen Summen und ihre Aktualisierung bei Änderungen"""
+    with test_app.app_context():
+        db_handler = test_app.host.db_handler
+
+        # Nur Bedingungen auf ganze Monate werden aus den Rollups beantwortet
+        jan_2023 = 1672531200
+        feb_2023 = 1675209600
+        assert db_handler._rollup_bounds(None) == (None, None)
+        assert db_handler._rollup_bounds([
+            {'key': 'date_tx', 'value': jan_2023, 'compare': '>='},
+            {'key': 'date_tx', 'value': feb_2023 - 1, 'compare': '<='},
+        ]) == (jan_2023, feb_2023), "Ein ganzer Monat wird nicht erkannt"
+        assert db_handler._rollup_bounds(
+            {'key': 'date_tx', 'value': jan_2023 + 86400, 'compare': '>='}
+        ) is None, "Ein Tag mitten im Monat wird aus den Rollups beantwortet"
+        assert db_handler._rollup_bounds(
+            {'key': 'category', 'value': 'Lebensmittel'}
+        ) is None, "Ein Kategoriefilter wird aus den Rollups beantwortet"
+
+        iban = 'DE89370400440532010000'
+        db_handler.insert(generate_fake_data(5), iban)
+
+        def check_sums(message):
+            raw = db_handler._aggregate_sums(iban, None, 'AND', ['category', 'tags'])
+            sums = db_handler.aggregate_sums(iban)
+            for key, values in raw.items():
+                assert sums[key] == pytest.approx(values), \
+                    f"{message}: {key} {sums[key]} != {values}"
+
+            return sums
+
+        check_sums("Die Rollups weichen von den Datensätzen ab")
+
+        # Update, Update per UUID (Tagger) und Löschen aktualisieren die Rollups
+        uuids = [r['uuid'] for r in db_handler.select(iban)]
+        db_handler.update({'category': 'Rollup-Test'}, iban, {'key': 'uuid', 'value': uuids[0]})
+        sums = check_sums("Die Rollups wurden nach einem Update nicht aktualisiert")
+        assert 'Rollup-Test' in sums['category'], "Die neue Kategorie fehlt"
+
+        db_handler.update_many_by_uuid({uuids[1]: {'tags': ['Rollup-Tag']}}, iban)
+        sums = check_sums("Die Rollups wurden nach einem Update per UUID nicht aktualisiert")
+        assert 'Rollup-Tag' in sums['tags'], "Der neue Tag fehlt"
+
+        db_handler.delete(iban, {'key': 'uuid', 'value': uuids[0]})
+        sums = check_sums("Die Rollups wurden nach dem Löschen nicht aktualisiert")
+        assert 'Rollup-Test' not in sums['category'], "Die gelöschte Kategorie ist noch vorhanden"
+
+        db_handler.truncate(iban)
+        assert db_handler.aggregate_sums(iban) == {'category': {}, 'tags': {}}, \
+            "Nach dem Leeren der Collection sind noch Rollups vorhanden"
+
+
+def test_rollups_months(test_app):
+    """Testet, dass die Rollups mehrerer Monate einer IBAN gespeichert und summiert werden"""
+    with test_app.app_context():
+        db_handler = test_app.host.db_handler
+        iban = 'DE89370400440532010000'
+        jan_2023 = 1672531200
+        feb_2023 = 1675209600
+        db_handler.insert([
+            {'date_tx': jan_2023 + 86400, 'text_tx': 'Rollup Januar', 'amount': -10.0,
+             'category': 'Januar'},
+            {'date_tx': feb_2023 + 86400, 'text_tx': 'Rollup Februar', 'amount': -20.0,
+             'category': 'Februar'},
+        ], iban)
+
+        try:
+            sums = db_handler.aggregate_sums(iban)
+            assert sums['category'] == pytest.approx({'Januar': -10.0, 'Februar': -20.0}), \
+                f"Die Summen beider Monate stimmen nicht: {sums['category']}"
+
+            rollups = db_handler._select([db_handler.ROLLUP_COLLECTION],
+                                         {'key': 'iban', 'value': iban})
+            assert {r['uuid'] for r in rollups} == \
+                {f'{iban}/2023-01', f'{iban}/2023-02', f'{iban}/built'}, \
+                f"Nicht alle Rollups der IBAN wurden gespeichert: {rollups}"
+
+            february = db_handler.aggregate_sums(iban, [
+                {'key': 'date_tx', 'value': feb_2023, 'compare': '>='},
+                {'key': 'date_tx', 'value': 1677628800 - 1, 'compare': '<='},
+            ])
+            assert february['category'] == pytest.approx({'Februar': -20.0}), \
+                f"Die Summe des zweiten Monats stimmt nicht: {february['category']}"
+
+        finally:
+            db_handler.truncate(iban)
+
+
+def test_ruleset_version(test_app):
+    """Testet das Speichern der Regelwerk-Versionen für Tags und Kategorien einer IBAN"""
+    with test_app.app_context():
+        db_handler = test_app.host.db_handler
+        iban = 'DE89370400440532010000'
+        assert db_handler.ruleset_version(iban, 'tag_version') is None, \
+            "Für eine ungeprüfte IBAN ist eine Version gespeichert"
+
+        db_handler.set_ruleset_version(iban, 'tag_version', 'tags-1')
+        db_handler.set_ruleset_version(iban, 'cat_version', 'cats-1')
+        db_handler.set_ruleset_version(iban, 'cat_version', 'cats-2')
+        assert db_handler.ruleset_version(iban, 'tag_version') == 'tags-1', \
+            "Die Version der Tags wurde nicht gespeichert"
+        assert db_handler.ruleset_version(iban, 'cat_version') == 'cats-2', \
+            "Die Version der Kategorien wurde nicht gespeichert oder ersetzt"
+
+
+def test_save_job(test_app, monkeypatch):
+    """Testet, dass ein Job beim erneuten Speichern ohne Löschen aktualisiert wird"""
+    with test_app.app_context():
+        db_handler = test_app.host.db_handler
+        job = {'uuid': 'job-save', 'name': 'test', 'status': 'running', 'updated': 1.0}
+        assert db_handler.save_job(dict(job)).get('inserted') == 1, \
+            "Ein neuer Job wurde nicht eingefügt"
+
+        def no_delete(*args, **kwargs):
+            raise AssertionError("Der Job wurde zum Speichern gelöscht")
+
+        monkeypatch.setattr(db_handler, '_delete', no_delete)
+        result = db_handler.save_job({**job, 'status': 'done', 'updated': 2.0})
+        monkeypatch.undo()
+        assert result == {'updated': 1, 'inserted': 0}, \
+            f"Der Job wurde nicht aktualisiert: {result}"
+
+        jobs = [j for j in db_handler.list_jobs() if j['uuid'] == 'job-save']
+        assert len(jobs) == 1 and jobs[0]['status'] == 'done', \
+            f"Der Job wurde nicht an Ort und Stelle aktualisiert: {jobs}"
+        db_handler.delete_jobs(3.0)
+
+
+def test_aggregate_timeseries(test_app, monkeypatch):
+    """Testet das Summieren von Einnahmen und Ausgaben je Zeitraum"""
+    with test_app.app_context():
+        db_handler = test_app.host.db_handler
+        iban = 'DE89370400440532013000'
+        rows = db_handler.select(iban)
+
+        series = db_handler.aggregate_timeseries(iban, interval='month')
+        assert [s['period'] for s in series] == sorted({s['period'] for s in series}), \
+            f"Die Zeiträume sind nicht eindeutig und sortiert: {series}"
+        assert sum(s['net'] for s in series) == pytest.approx(
+            sum(r['amount'] for r in rows), abs=0.01
+        ), "Der Saldo aller Monate stimmt nicht mit der Summe aller Beträge überein"
+        assert all(s['net'] == pytest.approx(s['income'] + s['expense']) for s in series), \
+            "Der Saldo ist nicht die Summe aus Einnahmen und Ausgaben"
+
+        # Wochen beginnen am Montag
+        weeks = db_handler.aggregate_timeseries(iban, interval='week', split_by='category')
+        for week in weeks:
+            start = datetime.datetime.strptime(week['period'], '%Y-%m-%d')
+            assert start.weekday() == 0, f"Die Woche beginnt nicht am Montag: {week}"
+            assert 'category' in week, f"Die Aufteilung nach Kategorie fehlt: {week}"
+
+        # Gleiches Ergebnis ohne NumPy
+        monkeypatch.setattr('handler.TinyDb.np', None)
+        monkeypatch.setattr(db_handler, 'use_columns', False, raising=False)
+        assert db_handler.aggregate_timeseries(iban, interval='week', split_by='category') \
+            == weeks, "Die Berechnung ohne NumPy liefert ein anderes Ergebnis"
+
+        with pytest.raises(ValueError):
+            db_handler.aggregate_timeseries(iban, interval='day')
+
+
 def test_delete(test_app):
     """Testet das Löschen von Datensätzen"""
     with test_app.app_context():
@@ -408,3 +636,306 @@ def test_delete(test_app):
         delete_many = deleted_db.get('deleted')
         assert delete_many == 4, \
             f'Es wurde nicht die richtige Anzahl an Datensätzen gelöscht: {delete_many}'
+
+
+def test_insert_after_delete(test_app):
+    """Testet den Duplikatabgleich nach dem Löschen und innerhalb eines Imports"""
+    with test_app.app_context():
+        # Gelöschte Datensätze dürfen erneut eingefügt werden
+        data = generate_fake_data(5)
+        inserted_db = test_app.host.db_handler.insert(data, collection="DE89370400440532013000")
+        id_count = inserted_db.get('inserted')
+        assert id_count == 5, \
+            f"Gelöschte Datensätze konnten nicht erneut eingefügt werden: {id_count}"
+
+        # Duplikate innerhalb einer Liste werden nur einmal eingefügt
+        data = generate_fake_data(2, json_path='input_commerzbank2.json')
+        test_app.host.db_handler.truncate('DE89370400440532011111')
+        inserted_db = test_app.host.db_handler.insert(data + data,
+                                                      collection='DE89370400440532011111')
+        id_count = inserted_db.get('inserted')
+        assert id_count == 2, \
+            f"Es wurden doppelte Datensätze aus einem Import eingefügt: {id_count}"
+
+
+def test_cached_storage(test_app):
+    """Testet den Lese-Cache und das gesammelte Schreiben der TinyDB"""
+    if test_app.config['DATABASE_BACKEND'] != 'tiny':
+        pytest.skip("Nur für TinyDB relevant")
+
+    with test_app.app_context():
+        db_handler = test_app.host.db_handler
+        json_storage = db_handler.connection.storage.storage.storage
+        calls = {'read': 0, 'write': 0}
+
+        def count(method, name):
+            def wrapper(*args, **kwargs):
+                calls[name] += 1
+                return method(*args, **kwargs)
+            return wrapper
+
+        json_storage.read = count(json_storage.read, 'read')
+        json_storage.write = count(json_storage.write, 'write')
+        try:
+            # Wiederholte Abfragen parsen die Datei nicht erneut
+            db_handler.select('DE89370400440532013000')
+            calls['read'] = 0
+            db_handler.select('DE89370400440532013000')
+            db_handler.select('DE89370400440532013000', {'key': 'amount', 'value': 0,
+                                                         'compare': '<'})
+            assert calls['read'] == 0, \
+                f"Die Datenbankdatei wurde trotz Cache neu gelesen: {calls['read']}"
+
+            # Änderungen anderer Prozesse werden erkannt
+            other = TinyDB(
+                os.path.join(test_app.config['DATABASE_URI'], test_app.config['DATABASE_NAME']),
+                storage=FileLockMiddleware(RevalidatingCacheMiddleware(type(json_storage)))
+            )
+            other.table('DE89370400440532099999').insert({'uuid': 'other-process'})
+            rows = db_handler.select('DE89370400440532099999')
+            assert [r.get('uuid') for r in rows] == ['other-process'], \
+                "Die Änderung eines anderen Prozesses wurde nicht gelesen"
+
+            # Schreibvorgänge innerhalb eines Batches werden gesammelt
+            calls['write'] = 0
+            with db_handler.batch():
+                for amount in (1, 2, 3):
+                    db_handler.update({'amount': amount}, 'DE89370400440532099999',
+                                      {'key': 'uuid', 'value': 'other-process'})
+                assert calls['write'] == 0, "Innerhalb eines Batches wurde geschrieben"
+
+            assert calls['write'] == 1, \
+                f"Der Batch wurde nicht mit einem Schreibvorgang gespeichert: {calls['write']}"
+            assert other.table('DE89370400440532099999').all()[0].get('amount') == 3, \
+                "Der Batch wurde nicht für andere Prozesse gespeichert"
+            other.close()
+
+        finally:
+            del json_storage.read
+            del json_storage.write
+            db_handler.truncate('DE89370400440532099999')
+
+
+
+def test_cached_storage_detached(test_app):
+    """Testet, dass Änderungen an ausgewählten Datensätzen den Cache nicht verändern"""
+    if test_app.config['DATABASE_BACKEND'] != 'tiny':
+        pytest.skip("Nur für TinyDB relevant")
+
+    with test_app.app_context():
+        db_handler = test_app.host.db_handler
+        iban = 'DE89370400440532099999'
+        db_handler.insert({'date_tx': 1672531200, 'text_tx': 'Detached', 'amount': -1.0,
+                           'tags': ['Stored'], 'parsed': {'Key': 'Stored'}}, iban)
+        try:
+            # In-place Änderungen an einem ausgewählten Datensatz
+            row = db_handler.select(iban)[0]
+            row['tags'].append('Changed')
+            row['parsed']['Key'] = 'Changed'
+
+            row = db_handler.select(iban)[0]
+            assert row.get('tags') == ['Stored'] and row.get('parsed') == {'Key': 'Stored'}, \
+                f"Die Änderung eines ausgewählten Datensatzes hat den Cache verändert: {row}"
+
+            # Abgebrochener Schreibvorgang
+            def failing_update(doc):
+                doc['tags'].append('Changed')
+                raise ValueError('Abbruch')
+
+            with pytest.raises(ValueError):
+                db_handler._table(iban).update(failing_update)
+
+            row = db_handler.select(iban)[0]
+            assert row.get('tags') == ['Stored'], \
+                f"Ein abgebrochener Schreibvorgang hat den Cache verändert: {row}"
+
+        finally:
+            db_handler.truncate(iban)
+
+
+def test_distinct_counts(test_app, monkeypatch):
+    """Testet die mitgeführten Häufigkeiten der Tags und Kategorien (ohne Index)"""
+    if test_app.config['DATABASE_BACKEND'] != 'tiny':
+        pytest.skip("Nur für TinyDB relevant")
+
+    with test_app.app_context():
+        db_handler = test_app.host.db_handler
+        monkeypatch.setattr(db_handler, 'use_index', False)
+        iban = 'DE89370400440532099999'
+        db_handler.insert([
+            {'date_tx': 1672531200, 'text_tx': 'Eins', 'amount': -1.0,
+             'tags': ['A', 'B'], 'category': 'X'},
+            {'date_tx': 1672531200, 'text_tx': 'Zwei', 'amount': -2.0,
+             'tags': ['B'], 'category': 'Y'},
+        ], iban)
+        try:
+            assert db_handler.distinct(iban, 'tags') == ['A', 'B']
+            assert db_handler.distinct(iban, 'category') == ['X', 'Y']
+
+            # Eigene Schreibvorgänge zählen nur die geänderten Datensätze
+            counted = []
+            count_values = db_handler._count_values
+            monkeypatch.setattr(db_handler, '_count_values',
+                                lambda *args: counted.append(args) or count_values(*args))
+
+            db_handler.insert({'date_tx': 1672531200, 'text_tx': 'Drei', 'amount': -3.0,
+                               'tags': ['C'], 'category': 'Z'}, iban)
+            assert db_handler.distinct(iban, 'tags') == ['A', 'B', 'C']
+
+            db_handler.update({'category': 'Y'}, iban,
+                              {'key': 'text_tx', 'value': 'Eins'})
+            assert db_handler.distinct(iban, 'category') == ['Y', 'Z']
+
+            rows = {r['text_tx']: r['uuid'] for r in db_handler.select(iban)}
+            db_handler.update_many_by_uuid({rows['Zwei']: {'tags': ['D']}}, iban,
+                                           merge=False)
+            assert db_handler.distinct(iban, 'tags') == ['A', 'B', 'C', 'D']
+
+            db_handler.delete(iban, {'key': 'text_tx', 'value': 'Drei'})
+            assert db_handler.distinct(iban, 'tags') == ['A', 'B', 'D']
+            assert db_handler.distinct(iban, 'category') == ['Y']
+            assert len(counted) == 6, \
+                f"Die Häufigkeiten wurden nach eigenen Schreibvorgängen neu gezählt: {counted}"
+
+            # Änderungen anderer Prozesse werden neu gezählt
+            other = TinyDB(
+                os.path.join(test_app.config['DATABASE_URI'], test_app.config['DATABASE_NAME']),
+                storage=FileLockMiddleware(
+                    RevalidatingCacheMiddleware(type(db_handler.connection.storage.storage.storage))
+                )
+            )
+            other.table(iban).insert({'uuid': 'other-process', 'tags': ['E']})
+            other.close()
+            assert db_handler.distinct(iban, 'tags') == ['A', 'B', 'D', 'E'], \
+                "Die Änderung eines anderen Prozesses wurde nicht gezählt"
+
+        finally:
+            db_handler.truncate(iban)
+
+
+def test_atomic_json_storage(tmp_path):
+    """Testet das Lesen und atomare Schreiben der schnellen JSON Storage"""
+    path = os.path.join(tmp_path, 'storage.json')
+    storage = AtomicJSONStorage(path)
+    assert storage.read() is None, "Eine neue Datenbankdatei muss leer sein"
+
+    data = {'DE89370400440532013000': {'1': {'text_tx': 'Bäckerei Müller', 'amount': -4.2}}}
+    storage.write(data)
+    assert storage.read() == data, "Die geschriebenen Daten wurden nicht wieder gelesen"
+    assert os.listdir(tmp_path) == ['storage.json'], \
+        "Nach dem Schreiben sind temporäre Dateien zurückgeblieben"
+
+
+def test_sharded_storage(test_app, tmp_path):
+    """Testet das Speichern jeder Collection in einer eigenen Datei"""
+    if test_app.config['DATABASE_BACKEND'] != 'tiny':
+        pytest.skip("Nur für TinyDB relevant")
+
+    with test_app.app_context():
+        config = {'DATABASE_URI': str(tmp_path), 'DATABASE_SHARDED': True}
+        original = {k: test_app.config.get(k) for k in config}
+        test_app.config.update(config)
+        try:
+            db_handler = TinyDbHandler()
+
+        finally:
+            test_app.config.update(original)
+
+        ibans = ['DE89370400440532013000', 'DE89370400440532011111']
+        for iban, json_path in zip(ibans, ['input_commerzbank.json', 'input_commerzbank2.json']):
+            inserted = db_handler.insert(generate_fake_data(2, json_path=json_path), iban)
+            assert inserted == {'inserted': 2}, f"Es wurde nicht in {iban} eingefügt: {inserted}"
+
+        shard_dir = os.path.join(tmp_path, 'testdata')
+        files = sorted(f for f in os.listdir(shard_dir) if f.endswith('.json'))
+        expected = [f'{iban}.json' for iban in ibans] + \
+            ['metadata.json', 'rollup.json', 'versions.json']
+        assert files == sorted(expected), \
+            f"Die Collections wurden nicht in eigenen Dateien gespeichert: {files}"
+        assert db_handler.list_ibans() == sorted(ibans), \
+            "Die IBANs wurden nicht aus den einzelnen Dateien gelesen"
+
+        # Abfrage über eine Gruppe liest die Dateien der Mitglieder
+        db_handler.add_iban_group('shardgroup', ibans)
+        with db_handler.batch('shardgroup'):
+            rows = db_handler.select('shardgroup')
+        assert len(rows) == 4, f"Die Gruppe liefert nicht alle Einträge: {len(rows)}"
+        assert db_handler.select('DE89370400440532099999') == [], \
+            "Eine unbekannte IBAN darf keine Einträge liefern"
+        assert not os.path.exists(os.path.join(shard_dir, 'DE89370400440532099999.json')), \
+            "Für eine Abfrage wurde eine leere Datei angelegt"
+
+        db_handler.truncate(ibans[1])
+        assert db_handler.list_ibans() == [ibans[0]], \
+            "Eine geleerte Collection wird noch aufgelistet"
+
+
+def test_select_pagination(test_app):
+    """Testet das seitenweise Selektieren in Sortierreihenfolge"""
+    with test_app.app_context():
+        db_handler = test_app.host.db_handler
+        iban = 'DE89370400440532013000'
+        db_handler.insert(generate_fake_data(5), iban)
+        condition = {'key': 'amount', 'value': 0, 'compare': '<'}
+        use_index = getattr(db_handler, 'use_index', None)
+
+        try:
+            for index in (True, False):
+                if use_index is not None:
+                    db_handler.use_index = index
+
+                for descending in (True, False):
+                    all_rows = db_handler.select(iban, condition, descending=descending)
+                    assert len(all_rows) > 2, "Zu wenige Testdaten für mehrere Seiten"
+
+                    pages = []
+                    for offset in range(0, len(all_rows) + 2, 2):
+                        pages.extend(db_handler.select(iban, condition, descending=descending,
+                                                       limit=2, offset=offset))
+
+                    assert pages == all_rows, \
+                        f"Die Seiten entsprechen nicht der Sortierung (Index: {index})"
+
+        finally:
+            if use_index is not None:
+                db_handler.use_index = use_index
+
+
+def test_select_page_cursor(test_app):
+    """Testet das seitenweise Selektieren ab einem Cursor"""
+    with test_app.app_context():
+        db_handler = test_app.host.db_handler
+        iban = 'DE89370400440532013000'
+        db_handler.insert(generate_fake_data(5), iban)
+
+        for descending in (True, False):
+            all_rows = db_handler.select(iban, descending=descending)
+            pages = []
+            cursor = None
+            for _ in range(len(all_rows)):
+                page = db_handler.select_page(iban, descending=descending,
+                                              limit=2, cursor=cursor)
+                pages.extend(page.get('transactions'))
+                cursor = page.get('cursor')
+                if cursor is None:
+                    break
+
+            assert pages == all_rows, \
+                f"Die Seiten entsprechen nicht der Sortierung (absteigend: {descending})"
+
+        # Neue Einträge vor dem Cursor verschieben die folgenden Seiten nicht
+        first = db_handler.select_page(iban, limit=2)
+        second = db_handler.select_page(iban, limit=2, cursor=first.get('cursor'))
+        inserted = db_handler.insert({**second['transactions'][0], 'uuid': None,
+                                      'text_tx': 'Neu', 'date_tx': 4102444800,
+                                      'valuta': 4102444800}, iban)
+        assert inserted == {'inserted': 1}, "Der neue Eintrag wurde nicht eingefügt"
+        again = db_handler.select_page(iban, limit=2, cursor=first.get('cursor'))
+        assert again == second, "Die Seite nach dem Cursor hat sich verschoben"
+
+        try:
+            db_handler.select_page(iban, cursor='kein-cursor')
+            assert False, "Ein ungültiger Cursor wurde akzeptiert"
+
+        except ValueError:
+            pass
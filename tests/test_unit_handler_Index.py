@@ -0,0 +1,117 @@
+#!/usr/bin/python3 # pylint: disable=invalid-name
+"""Testmodul für die In-Memory Indexes der TinyDB."""
+
+import os
+import sys
+
+# Add Parent for importing from Modules
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(parent_dir)
+
+from helper import generate_fake_data
+from handler.Index import TableIndex
+
+
+def get_raw_table():
+    """Liefert einen Table mit Fake-Transaktionen in der Form der TinyDB Rohdaten"""
+    return {
+        '1': {'uuid': 'a', 'date_tx': 100, 'amount': -10.5, 'category': None, 'tags': []},
+        '2': {'uuid': 'b', 'date_tx': 200, 'amount': 20, 'category': 'Lebensmittel',
+              'tags': ['Supermarkt', 'Karte']},
+        '3': {'uuid': 'c', 'date_tx': 200, 'amount': -99.9, 'category': 'Lebensmittel',
+              'tags': ['Karte']},
+        '4': {'uuid': 'd', 'date_tx': 300, 'amount': None, 'category': 'Miete', 'tags': None},
+    }
+
+
+def test_index_candidates():
+    """Testet die Kandidaten je Condition und deren Verknüpfung"""
+    index = TableIndex(get_raw_table())
+    cases = [
+        ({'key': 'date_tx', 'value': 200, 'compare': '>='}, 'AND', {2, 3, 4}),
+        ({'key': 'date_tx', 'value': '200', 'compare': '<'}, 'AND', {1}),
+        ({'key': 'amount', 'value': -10.5}, 'AND', {1}),
+        ({'key': 'category', 'value': 'Lebensmittel'}, 'AND', {2, 3}),
+        ({'key': 'category', 'value': None}, 'AND', {1}),
+        ({'key': 'tags', 'value': ['Supermarkt', 'Karte'], 'compare': 'in'}, 'AND', {2, 3}),
+        ({'key': 'tags', 'value': ['Supermarkt', 'Karte'], 'compare': 'all'}, 'AND', {2}),
+        ({'key': 'uuid', 'value': 'c'}, 'AND', {3}),
+        ({'key': 'text_tx', 'value': 'EDEKA', 'compare': 'regex'}, 'AND', None),
+        ({'key': 'tags', 'value': ['Karte'], 'compare': 'notin'}, 'AND', None),
+        ([
+            {'key': 'date_tx', 'value': 150, 'compare': '>'},
+            {'key': 'date_tx', 'value': 250, 'compare': '<'},
+            {'key': 'text_tx', 'value': 'EDEKA', 'compare': 'regex'},
+        ], 'AND', {2, 3}),
+        ([
+            {'key': 'prio', 'value': 1, 'compare': '<'},
+            {'key': 'category', 'value': 'Miete'},
+            {'key': 'amount', 'value': 0, 'compare': '>'},
+        ], 'OR', {2, 4}),
+        ([
+            {'key': 'category', 'value': 'Miete'},
+            {'key': 'text_tx', 'value': 'EDEKA', 'compare': 'regex'},
+        ], 'OR', None),
+    ]
+    for condition, multi, expected in cases:
+        candidates = index.candidates(condition, multi)
+        assert candidates == expected, f"Falsche Kandidaten für {condition}: {candidates}"
+
+
+def test_index_counts():
+    """Testet die Häufigkeiten der Werte invertierter Schlüssel"""
+    index = TableIndex(get_raw_table())
+    assert index.counts('tags') == {'Supermarkt': 1, 'Karte': 2}, \
+        f"Falsche Häufigkeiten der Tags: {index.counts('tags')}"
+    assert index.counts('category') == {None: 1, 'Lebensmittel': 2, 'Miete': 1}, \
+        f"Falsche Häufigkeiten der Kategorien: {index.counts('category')}"
+
+
+def test_select_with_index(test_app):
+    """Testet, dass Abfragen mit und ohne Index die gleichen Ergebnisse liefern"""
+    with test_app.app_context():
+        db_handler = test_app.host.db_handler
+        iban = 'DE89370400440532013000'
+        db_handler.insert(generate_fake_data(5), iban)
+
+        conditions = [
+            ({'key': 'amount', 'value': -50, 'compare': '<'}, 'AND'),
+            ([{'key': 'date_tx', 'value': 1672617600, 'compare': '>='},
+              {'key': 'category', 'value': None}], 'AND'),
+            ([{'key': 'amount', 'value': 0, 'compare': '>'},
+              {'key': 'text_tx', 'value': 'EDEKA', 'compare': 'like'}], 'OR'),
+            ({'key': 'tags', 'value': ['Supermarkt'], 'compare': 'in'}, 'AND'),
+        ]
+        use_index = db_handler.use_index
+        try:
+            for condition, multi in conditions:
+                db_handler.use_index = True
+                with_index = db_handler.select(iban, condition, multi)
+                db_handler.use_index = False
+                without_index = db_handler.select(iban, condition, multi)
+                assert with_index == without_index, \
+                    f"Der Index verändert das Ergebnis für {condition}"
+
+            # Änderungen werden im Index berücksichtigt
+            db_handler.use_index = True
+            condition = {'key': 'category', 'value': 'Indextest'}
+            assert not db_handler.select(iban, condition), "Die Kategorie existiert schon"
+            uuid = db_handler.select(iban)[0].get('uuid')
+            db_handler.update({'category': 'Indextest'}, iban, {'key': 'uuid', 'value': uuid})
+            assert [r.get('uuid') for r in db_handler.select(iban, condition)] == [uuid], \
+                "Der Index wurde nach einem Update nicht aktualisiert"
+
+            # Distinct mit und ohne Index
+            for key in ('tags', 'category'):
+                with_index = db_handler.distinct(iban, key)
+                db_handler.use_index = False
+                without_index = db_handler.distinct(iban, key)
+                db_handler.use_index = True
+                assert with_index == without_index, \
+                    f"Der Index verändert die Werte für {key}: {with_index} != {without_index}"
+
+            assert 'Indextest' in db_handler.distinct(iban, 'category'), \
+                "Die neue Kategorie fehlt in den unterschiedlichen Werten"
+
+        finally:
+            db_handler.use_index = use_index
@@ -0,0 +1,91 @@
+#!/usr/bin/python3 # pylint: disable=invalid-name
+"""Testmodul für den Cache eingelesener Dateien."""
+
+import os
+import sys
+
+# Add Parent for importing from Modules
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(parent_dir)
+
+from handler.ParseCache import ParseCache
+from reader.Generic import Reader as Generic
+from reader.Commerzbank import Reader as Commerzbank
+
+
+ROWS = [
+    {'date_tx': 1672531200.0, 'valuta': 1672531200.0, 'art': 'Lastschrift',
+     'text_tx': 'EDEKA, München', 'amount': -11.63, 'peer': None, 'currency': 'EUR',
+     'parsed': {}, 'category': None, 'tags': None},
+]
+
+
+def write_file(path, content):
+    """Schreibt eine Datei und liefert den Pfad"""
+    with open(path, 'wb') as f:
+        f.write(content)
+
+    return str(path)
+
+
+def test_cache_roundtrip(tmp_path):
+    """Testet Schlüssel, Speichern und Laden von Kontoumsätzen"""
+    cache = ParseCache(str(tmp_path / 'cache'), 1024 * 1024)
+    path = write_file(tmp_path / 'a.pdf', b'%PDF-1.4 A')
+    same = write_file(tmp_path / 'b.pdf', b'%PDF-1.4 A')
+    other = write_file(tmp_path / 'c.pdf', b'%PDF-1.4 C')
+
+    key = cache.key(path, Generic)
+    assert key == cache.key(same, Generic), "Gleicher Inhalt ergibt einen anderen Schlüssel"
+    assert key != cache.key(other, Generic), "Anderer Inhalt ergibt den gleichen Schlüssel"
+    assert key != cache.key(path, Commerzbank), "Anderer Reader ergibt den gleichen Schlüssel"
+
+    assert cache.get(key) is None, "Ein unbekannter Schlüssel liefert Daten"
+    cache.set(key, ROWS)
+    assert cache.get(key) == ROWS, "Die gespeicherten Kontoumsätze wurden verändert"
+    assert os.stat(cache.directory).st_mode & 0o077 == 0, \
+        "Das Verzeichnis des Caches ist für andere Benutzer zugänglich"
+    cache_file = cache._path(key) # pylint: disable=protected-access
+    assert os.stat(cache_file).st_mode & 0o077 == 0, \
+        "Die Datei des Caches ist für andere Benutzer lesbar"
+
+
+def test_cache_eviction(tmp_path):
+    """Testet das Löschen der am längsten nicht genutzten Einträge"""
+    directory = str(tmp_path / 'cache')
+    cache = ParseCache(directory, 1024 * 1024)
+    for i, key in enumerate(('a', 'b', 'c')):
+        cache.set(key, ROWS * 50)
+        os.utime(cache._path(key), (1000 + i, 1000 + i)) # pylint: disable=protected-access
+
+    # 'a' wurde zuletzt genutzt
+    cache.get('a')
+    size = os.path.getsize(cache._path('a')) # pylint: disable=protected-access
+    cache.max_size = 2 * size + size // 2
+    cache.set('d', ROWS * 50)
+
+    assert cache.get('b') is None, "Der älteste Eintrag wurde nicht gelöscht"
+    assert cache.get('c') is None, "Die maximale Größe wurde nicht eingehalten"
+    assert cache.get('a') == ROWS * 50, "Der zuletzt genutzte Eintrag wurde gelöscht"
+    assert cache.get('d') == ROWS * 50, "Der neue Eintrag wurde gelöscht"
+
+
+def test_read_input_cached(test_app, tmp_path, monkeypatch):
+    """Testet, dass eine bekannte Datei nicht erneut vom Reader gelesen wird"""
+    calls = []
+
+    def from_pdf(self, filepath): # pylint: disable=unused-argument
+        calls.append(filepath)
+        return [dict(row) for row in ROWS]
+
+    monkeypatch.setattr(Generic, 'from_pdf', from_pdf)
+    with test_app.app_context():
+        host = test_app.host
+        monkeypatch.setattr(host, 'parse_cache', ParseCache(str(tmp_path / 'cache'), 1024 * 1024))
+        path = write_file(tmp_path / 'upload.pdf', b'%PDF-1.4 Upload')
+
+        first = host.read_input(path, bank='Generic', data_format='pdf')
+        second = host.read_input(path, bank='Generic', data_format='pdf')
+
+        assert len(calls) == 1, "Die Datei wurde trotz Cache erneut gelesen"
+        assert first == second, "Die Kontoumsätze aus dem Cache weichen ab"
@@ -0,0 +1,178 @@
+#!/usr/bin/python3 # pylint: disable=invalid-name
+"""Testmodul für die Auswertung von Regeln im Arbeitsspeicher."""
+
+import os
+import sys
+import re
+import json
+
+# Add Parent for importing from Modules
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(parent_dir)
+
+from handler.Rules import RuleEngine, LiteralPrefilter, ParserEngine
+
+
+def get_rows():
+    """Liefert Fake-Transaktionen für die Regeltests"""
+    return [
+        {
+            'uuid': 'edeka', 'prio': 0, 'tags': [], 'amount': -99.58,
+            'text_tx': 'EDEKA, München//München/ Kartenzahlung', 'parsed': {}
+        }, {
+            'uuid': 'stadt', 'prio': 0, 'tags': ['Stadt'], 'amount': -221.98,
+            'text_tx': 'Stadt Halle ABGABEN LT. BESCHEID',
+            'parsed': {'Gläubiger-ID': 'DE7000100000077777'}
+        }, {
+            'uuid': 'manuell', 'prio': 99, 'tags': [], 'amount': -11.63,
+            'text_tx': 'EDEKA sagt Danke', 'parsed': {}
+        }
+    ]
+
+
+def test_compile_conditions():
+    """Testet die Vergleichsoperatoren der kompilierten Conditions"""
+    engine = RuleEngine({})
+    rows = get_rows()
+    cases = [
+        ({'key': 'text_tx', 'value': '(EDEKA|Aldi)', 'compare': 'regex'}, ['edeka', 'manuell']),
+        ({'key': 'text_tx', 'value': 'edeka', 'compare': 'like'}, ['edeka', 'manuell']),
+        ({'key': 'amount', 'value': -100, 'compare': '<'}, ['stadt']),
+        ({'key': 'amount', 'value': '-99.58'}, ['edeka']),
+        ({'key': 'tags', 'value': ['Stadt', 'Steuer'], 'compare': 'in'}, ['stadt']),
+        ({'key': 'tags', 'value': ['Stadt'], 'compare': 'notin'}, ['edeka', 'manuell']),
+        ({'key': 'tags', 'value': [], 'compare': 'exact'}, ['edeka', 'manuell']),
+        ({'key': {'parsed': 'Gläubiger-ID'}, 'value': 'DE7000100000077777'}, ['stadt']),
+        ({'key': 'unknown', 'value': 1, 'compare': '!='}, []),
+    ]
+    for condition, expected in cases:
+        predicate = engine.compile_condition(condition)
+        matched = [r['uuid'] for r in rows if predicate(r)]
+        assert matched == expected, f"Condition {condition} trifft {matched}"
+
+    # Prio wird immer mit AND verknüpft
+    predicate = engine.compile_query([
+        {'key': 'prio', 'value': 99, 'compare': '<'},
+        {'key': 'text_tx', 'value': 'EDEKA', 'compare': 'regex'},
+        {'key': 'amount', 'value': -200, 'compare': '<'},
+    ], multi='OR')
+    matched = [r['uuid'] for r in rows if predicate(r)]
+    assert matched == ['edeka', 'stadt'], f"Die OR-Verknüpfung mit Prio trifft {matched}"
+
+
+def test_run_sequential_rules():
+    """Testet, dass nachfolgende Regeln die Änderungen vorheriger Regeln sehen"""
+    engine = RuleEngine({
+        'Supermarkt': {
+            'condition': [{'key': 'text_tx', 'value': 'EDEKA', 'compare': 'regex'}],
+        },
+        'Lebensmittel': {
+            'condition': [{'key': 'tags', 'value': ['Supermarkt'], 'compare': 'in'}],
+        },
+    })
+
+    def action(r_name, row): # pylint: disable=unused-argument
+        return {'tags': [r_name]}
+
+    result = engine.run(get_rows(), action)
+    assert result['matched']['Supermarkt'] == ['edeka', 'manuell'], \
+        f"Die erste Regel trifft {result['matched']['Supermarkt']}"
+    assert result['matched']['Lebensmittel'] == ['edeka', 'manuell'], \
+        f"Die zweite Regel sieht die Änderungen nicht: {result['matched']['Lebensmittel']}"
+    assert result['updates'] == {
+        'edeka': {'tags': ['Supermarkt', 'Lebensmittel']},
+        'manuell': {'tags': ['Supermarkt', 'Lebensmittel']},
+    }, f"Die zu speichernden Daten sind falsch: {result['updates']}"
+
+
+def test_required_literals():
+    """Testet das Ermitteln der Pflicht-Literale aus RegExes"""
+    engine = RuleEngine({})
+    cases = [
+        ('(ABGABEN\\sLT\\.\\sBESCHEID)', {'bescheid'}),
+        ('((?<!BY\\s)EDEKA|Wucherpfennig|^Kaufland)', {'edeka', 'wucherpfennig', 'kaufland'}),
+        ('([Aa]potheke|APOTHEKE|ROSSMANN)', {'apotheke', 'rossmann'}),
+        ('((^|\\W)ARAL\\s|TANKSTELLE)', {'aral', 'tankstelle'}),
+        ('(Sollzins|.*)', None),
+        ('[0-9]+', None),
+    ]
+    for regex, expected in cases:
+        condition = {'key': 'text_tx', 'value': regex, 'compare': 'regex'}
+        literals = engine._condition_literals(condition)
+        literals = literals[1] if literals else None
+        assert literals == expected, f"Falsche Literale für {regex}: {literals}"
+
+
+def test_prefilter_overlapping_literals():
+    """Testet, dass sich überlappende Literale gefunden werden"""
+    prefilter = LiteralPrefilter({
+        'abcd': {'r1'}, 'cdef': {'r2'}, 'bc': {'r3'}, 'xyz': {'r4'}
+    })
+    assert prefilter.candidates('--ABCDEF--') == {'r1', 'r2', 'r3'}, \
+        "Sich überlappende Literale wurden nicht gefunden"
+    assert prefilter.candidates(None) == set(), \
+        "Ein fehlender Text darf keine Regel vorschlagen"
+
+
+def test_prefilter_same_matches():
+    """Testet, dass der Vorfilter die Treffer der Standard-Regeln nicht verändert"""
+    path = os.path.join(parent_dir, 'settings', 'rule', '00-default-tags.json')
+    with open(path, 'r', encoding='utf-8') as f:
+        rules = {
+            r['name']: {'condition': r.get('filter'), 'multi': r.get('multi', 'AND')}
+            for r in json.load(f)
+        }
+
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'input_commerzbank.json')
+    with open(path, 'rb') as f:
+        rows = json.load(f)
+    for i, row in enumerate(rows):
+        row['uuid'] = str(i)
+
+    without_prefilter = RuleEngine(rules, prefilter=False).run(rows, lambda *args: None)
+    with_prefilter = RuleEngine(rules).run(rows, lambda *args: None)
+    assert with_prefilter['matched'] == without_prefilter['matched'], \
+        "Der Vorfilter verändert die Treffer der Regeln"
+
+
+def test_parser_engine_same_matches():
+    """Testet, dass die ParserEngine die gleichen Treffer wie jeder einzelne Parser liefert"""
+    path = os.path.join(parent_dir, 'settings', 'parser', '00-default.json')
+    with open(path, 'r', encoding='utf-8') as f:
+        parsers = {p['name']: re.compile(p['regex']) for p in json.load(f)}
+
+    # Literal nicht am Anfang, Groß-/Kleinschreibung ignorieren (global und in einer Gruppe)
+    parsers['Händler'] = re.compile(r'([\w ]+?)\s+SAGT DANKE')
+    parsers['Kundennummer'] = re.compile(r'KUNDENNR\.?\s([0-9]+)', re.IGNORECASE)
+    parsers['Vertrag'] = re.compile(r'([0-9]+)\s(?i:vertrag)')
+
+    # Literal am Anfang (sucht re selbst), ohne Literal bzw. nur in (?i:...)
+    engine = ParserEngine(parsers)
+    assert engine.unfiltered == {
+        'Mandatsreferenz', 'End-to-End-Referenz', 'Gläubiger-ID', 'Vertrag'
+    }, f"Falsche Parser ohne Vorfilter: {engine.unfiltered}"
+    assert engine.literals['Händler'] == ('SAGT DANKE',), \
+        f"Falsche Literale: {engine.literals['Händler']}"
+    assert engine.literals['Kundennummer'] == ('kundennr',), \
+        f"Falsche Literale bei IGNORECASE: {engine.literals['Kundennummer']}"
+
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'input_commerzbank.json')
+    with open(path, 'rb') as f:
+        texts = [row['text_tx'] for row in json.load(f)]
+    texts += [
+        'Vodafone GmbH Kundennr. 4711 VERTRAG 0815 EREF: 1234567890ABC MREF: VF4711',
+        'Allianz kundennr 42 Mandatsref: AL12345 Gläubiger-ID: DE93ZZZ00000000001',
+        'mref: klein geschrieben eref: 123',
+        'REWE Markt GmbH SAGT DANKE 2023-02-11T10:01:12 KFN 9 VJ 7777',
+        'EDEKA sagt Danke 42 Vertrag',
+    ]
+
+    for text in texts:
+        expected = {}
+        for name, regex in parsers.items():
+            re_match = regex.search(text)
+            if re_match:
+                expected[name] = re_match.group(1).strip()
+
+        assert engine.search(text) == expected, f"Falsche Treffer für '{text}'"
+
@@ -50,6 +50,24 @@ def test_parsing_regex(test_app):
                     f"In Eintrag {i} gab es False-Positives"
 
 
+
+def test_parse_batch(test_app):
+    """Testet, dass parse_batch im Prozess-Pool die gleichen Treffer wie parse liefert"""
+    with test_app.app_context():
+        tagger = Tagger(MockDatabase())
+
+        path = os.path.join(
+            os.path.dirname(os.path.abspath(__file__)),
+            'input_commerzbank.json'
+        )
+        with open(path, 'rb') as test_data:
+            data = json.load(test_data)
+
+        expected = tagger.parse(copy.deepcopy(data))
+        parsed_data = tagger.parse_batch(copy.deepcopy(data), workers=2, chunk_size=2)
+        assert parsed_data == expected, \
+            "parse_batch liefert andere Treffer als parse"
+
 def test_re_parsing_regex(test_app):
     """Testet das erneute Parsen der Datensätze mit übergebenen RegExes (z.B. für benutzerdefinierte Regeln)"""
     with test_app.app_context():
@@ -115,6 +133,18 @@ def test_tag_and_cat(test_app):
             "Result does not match with Mocker Fake"
 
 
+def test_tag_and_cat_streaming(test_app):
+    """Testet die Teilergebnisse je Regel beim Tagging und Kategorisieren"""
+    with test_app.app_context():
+        tagger = Tagger(MockDatabase())
+        partials = list(tagger.tag_and_cat(iban="DE89370400440532013000", streaming=True))
+        steps = {p.get('step') for p in partials[:-1]}
+        assert steps == {'tag', 'cat'}, \
+            f"Es fehlen Teilergebnisse des Taggings oder der Kategorisierung: {steps}"
+        assert partials[-1] == tagger.tag_and_cat(iban="DE89370400440532013000"), \
+            "Das letzte Teilergebnis ist nicht das Gesamtergebnis"
+
+
 def test_tag_or_cat_custom(test_app):
     """Testet das Kategorisieren und Taggen von Datensätze mit
     Parametern, die beim Aufruf übergeben werden (benutzerdefinierte Regeln)"""
@@ -190,3 +220,67 @@ def test_categorize_streaming(test_app):
 
         assert final is not None and isinstance(final, dict), "Final result missing or invalid"
         assert 'test_categorize' in final.get('entries', []), "Final result does not contain expected categorized UUID"
+
+
+def test_cache_invalidation(test_app):
+    """Testet das Cachen der Parser und Regeln bis zur nächsten Änderung der Metadaten"""
+    with test_app.app_context():
+        tagger = Tagger(MockDatabase())
+
+        tagger.tag(iban="DE89370400440532013000")
+        tagger.tag(iban="DE89370400440532013000")
+        cache_info = tagger.cache_info()
+        assert cache_info.get('misses') == 3 and cache_info.get('hits') == 3, \
+            f"Regeln und kompilierte Regeln wurden nicht gecached: {cache_info}"
+
+        # Änderung der Metadaten verwirft den Cache
+        tagger.db_handler.metadata_version += 1
+        tagger._load_parsers()
+        cache_info = tagger.cache_info()
+        assert cache_info.get('misses') == 4 and cache_info.get('size') == 1, \
+            f"Der Cache wurde nach einer Änderung nicht verworfen: {cache_info}"
+
+        # Metadaten-Änderungen der Datenbank ändern die Version
+        version = test_app.host.db_handler.metadata_version
+        test_app.host.db_handler.set_metadata({'metatype': 'config', 'name': 'cache_test'})
+        assert test_app.host.db_handler.metadata_version != version, \
+            "Das Speichern von Metadaten ändert die Version nicht"
+
+
+def test_cache_invalidation_other_process(test_app):
+    """Testet, dass Metadaten-Änderungen eines anderen Handlers (Prozesses) den Cache verwerfen"""
+    with test_app.app_context():
+        db_handler = test_app.host.db_handler
+        tagger = Tagger(db_handler)
+        parsers = tagger._load_parsers()
+
+        # Eigene Instanz des Handlers wie in einem anderen Prozess
+        other = type(db_handler)()
+        other.set_metadata({
+            'uuid': 'other-process', 'metatype': 'parser',
+            'name': 'Anderer Prozess', 'regex': '(ANDERER PROZESS)'
+        })
+        try:
+            assert 'Anderer Prozess' not in parsers, "Der Parser war schon vorher vorhanden"
+            assert 'Anderer Prozess' in tagger._load_parsers(), \
+                "Der Cache wurde nach der Änderung eines anderen Prozesses nicht verworfen"
+
+        finally:
+            other.delete_metadata('other-process')
+
+
+def test_tag_and_cat_rows(test_app, monkeypatch):
+    """Testet das Taggen noch nicht gespeicherter Transaktionen (z.B. beim Import)"""
+    with test_app.app_context():
+        tagger = Tagger(test_app.host.db_handler)
+        rows = [{'date_tx': 1672531200, 'text_tx': 'EDEKA Markt', 'amount': -5.0, 'parsed': {}}]
+        result = tagger.tag_and_cat_rows(rows)
+        assert result.get('tagged') == 1, f"Die Transaktion wurde nicht getaggt: {result}"
+        assert rows[0].get('uuid') and rows[0].get('tag_version'), \
+            f"Die Transaktion wurde nicht vorbereitet oder markiert: {rows[0]}"
+
+        # Generatoren ohne Ergebnis
+        monkeypatch.setattr(tagger, '_tag_generator', lambda *args, **kwargs: iter(()))
+        result = tagger.tag_and_cat_rows([])
+        assert result == {'tagged': 0, 'categorized': 0}, \
+            f"Ein Generator ohne Ergebnis liefert ein falsches Ergebnis: {result}"
@@ -10,7 +10,7 @@ parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.append(parent_dir)
 
 from helper import check_transaktion_list
-from reader.Generic import Reader as Generic
+from reader.Generic import Reader as Generic, split_pages
 
 
 def test_read_from_csv(test_app):
@@ -26,6 +26,23 @@ def test_read_from_csv(test_app):
         check_transaktion_list(transaction_list)
 
 
+def test_iter_csv(test_app):
+    """Testet das blockweise Einlesen einer CSV Datei mit Kontoumsätzen"""
+    with test_app.app_context():
+        uri = os.path.join(
+            os.path.dirname(os.path.abspath(__file__)),
+            'input_generic.csv'
+        )
+        reader = Generic()
+        chunks = list(reader.iter_csv(uri, chunk_size=2))
+
+        assert chunks, "Es wurden keine Blöcke eingelesen"
+        assert all(0 < len(chunk) <= 2 for chunk in chunks), \
+            "Die Blöcke sind größer als chunk_size"
+        assert [row for chunk in chunks for row in chunk] == reader.from_csv(uri), \
+            "Die Blöcke ergeben nicht die gleichen Kontoumsätze wie from_csv"
+
+
 @pytest.mark.skip(reason="Currently not implemented yet")
 def test_read_from_pdf():
     """Testet das Einlesen einer PDF Datei mit Kontoumsätzen"""
@@ -62,3 +79,34 @@ def test_strftime_parser(test_app):
         for fmt, date_str, expected_timestamp in date_formats:
             ts = reader._parse_from_strftime(date_str, fmt) # pylint: disable=protected-access
             assert ts == expected_timestamp, f"Failed for format {fmt}"
+
+
+def test_amount_parser(test_app):
+    """Testet die Umwandlung von Beträgen im deutschen Format"""
+    with test_app.app_context():
+        reader = Generic()
+
+        amounts = [
+            ("-11,63", -11.63),
+            ("1.234,56", 1234.56),
+            ("-1.000.000,00", -1000000.0),
+            (" 5,5 ", 5.5),
+            ("0,00", 0.0),
+        ]
+
+        for amount_str, expected in amounts:
+            amount = reader._parse_amount(amount_str) # pylint: disable=protected-access
+            assert amount == expected, f"Failed for amount {amount_str}"
+
+
+def test_split_pages():
+    """Testet die Aufteilung der Seiten eines PDF auf mehrere Prozesse"""
+    assert split_pages('all', 6, 3) == ['1,2', '3,4', '5,6'], "Falsche Aufteilung für 'all'"
+    assert split_pages('2-end', 6, 2) == ['2,3,4', '5,6'], "Falsche Aufteilung für '2-end'"
+    assert split_pages('1,3-4', 6, 4) == ['1', '3', '4'], "Falsche Aufteilung für Bereiche"
+    assert split_pages('all', 3, 8) == ['1', '2', '3'], "Mehr Bereiche als Seiten"
+    assert split_pages('all', 5, 1) == ['1,2,3,4,5'], "Ein Prozess teilt die Seiten auf"
+    assert split_pages('4-end', 3, 2) == [], "Seiten außerhalb des PDF"
+    assert split_pages('all', 4, 8, 5) == ['1,2,3,4'], "Kurzes PDF wurde aufgeteilt"
+    assert split_pages('2-end', 11, 8, 5) == ['2,3,4,5,6', '7,8,9,10,11'], \
+        "Falsche Aufteilung mit Mindestanzahl Seiten"